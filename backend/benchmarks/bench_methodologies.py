@@ -0,0 +1,78 @@
+"""
+Response size and latency of POST /methodologies against a large synthetic
+methodology library: the old per-methodology component library copy versus
+the shared component_library returned once.
+
+Run from the backend directory:
+    python benchmarks/bench_methodologies.py --methodologies 300 --components 10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+import main  # noqa: E402
+
+
+def build_library(n_methodologies: int, n_components: int):
+    components = [f"Component {i}" for i in range(n_components * 4)]
+    return [
+        {
+            "name": f"Methodology {i}",
+            "theme": "FLN",
+            "description": "Synthetic methodology used for benchmarking",
+            "components": random.sample(components, n_components),
+            "geographies": ["all"],
+            "budget_range_lakhs": [0, 100]
+        }
+        for i in range(n_methodologies)
+    ]
+
+
+def legacy_response(methodologies):
+    component_map = main.generate_component_library(methodologies)
+    component_library = [
+        {"component": c, "used_in": sources}
+        for c, sources in component_map.items()
+    ]
+    return {
+        "methodologies": [
+            {**m, "available_components": component_library}
+            for m in methodologies
+        ]
+    }
+
+
+def current_response(methodologies):
+    component_index = main.generate_component_library(methodologies)
+    return {
+        "methodologies": methodologies,
+        "component_library": main.select_component_library(component_index, methodologies)
+    }
+
+
+def measure(label, build, methodologies, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = json.dumps(build(methodologies), default=str)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"{label:<10} {len(body) / 1024:>12.1f} KiB {elapsed_ms:>12.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--methodologies", type=int, default=300)
+    parser.add_argument("--components", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    library = build_library(args.methodologies, args.components)
+
+    print(f"{'shape':<10} {'payload':>16} {'build+dump':>15}")
+    measure("legacy", legacy_response, library, args.repeat)
+    measure("current", current_response, library, args.repeat)
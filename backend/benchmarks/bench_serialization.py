@@ -0,0 +1,122 @@
+"""
+Bytes on the wire and serialization CPU time for the largest responses:
+template listings with full lfa_structure, methodology listings with their
+component library, and ToC responses carrying base64 Mermaid URLs.
+Compares stdlib json with json_dumps (orjson when installed) and raw bytes
+with gzip / brotli at the levels the compression middleware uses.
+
+Run from the backend directory:
+    python benchmarks/bench_serialization.py --templates 200 --methodologies 300
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+import main  # noqa: E402
+from bson import ObjectId  # noqa: E402
+
+
+def build_templates(n_templates: int):
+    return {
+        "count": n_templates,
+        "templates": [
+            {
+                "_id": ObjectId(),
+                "template_id": f"TPL_{i}",
+                "name": f"Template {i}",
+                "theme": "FLN",
+                "description": "Synthetic template used for benchmarking " * 3,
+                "lfa_structure": {
+                    level: [
+                        {"statement": f"{level} statement {j} " * 4, "indicators": [f"Indicator {k}" for k in range(4)]}
+                        for j in range(6)
+                    ]
+                    for level in ("goal", "outcomes", "outputs", "activities")
+                },
+                "created_at": datetime.now(timezone.utc),
+                "rating_stats": {"count": 12, "sum": 50, "mean": 4.17, "bayesian_score": 3.82}
+            }
+            for i in range(n_templates)
+        ]
+    }
+
+
+def build_methodologies(n_methodologies: int):
+    components = [f"Component {i}" for i in range(40)]
+    methodologies = [
+        {
+            "name": f"Methodology {i}",
+            "theme": "FLN",
+            "description": "Synthetic methodology used for benchmarking",
+            "components": random.sample(components, 10),
+            "geographies": ["all"],
+            "budget_range_lakhs": [0, 100]
+        }
+        for i in range(n_methodologies)
+    ]
+    return {
+        "methodologies": methodologies,
+        "component_library": main.select_component_library(
+            main.generate_component_library(methodologies), methodologies
+        )
+    }
+
+
+def build_toc(n_nodes: int):
+    nodes = [{"id": f"N{i}", "type": "output", "label": f"Output node {i} " * 3} for i in range(n_nodes)]
+    edges = [{"source": f"N{i}", "target": f"N{i + 1}"} for i in range(n_nodes - 1)]
+    diagram = main.generate_toc_mermaid(
+        [main.ToCNode(**n) for n in nodes], [main.ToCEdge(**e) for e in edges]
+    )
+    return {
+        "logic_issues": [],
+        "ai_suggestions": [],
+        "mermaid_diagram": diagram,
+        "mermaid_preview_url": main.mermaid_to_live_url(diagram),
+        "mermaid_png_url": main.mermaid_to_image_url(diagram, "png"),
+        "mermaid_svg_url": main.mermaid_to_image_url(diagram, "svg")
+    }
+
+
+def stdlib_dumps(content):
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def timed(fn, content, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = fn(content)
+    return body, (time.perf_counter() - start) * 1000 / repeat
+
+
+def report(label, content, repeat):
+    body, stdlib_ms = timed(stdlib_dumps, content, repeat)
+    _, fast_ms = timed(main.json_dumps, content, repeat)
+
+    sizes = {"raw": len(body), "gzip": len(main.compress_body(body, "gzip"))}
+    if main.brotli:
+        sizes["br"] = len(main.compress_body(body, "br"))
+
+    wire = "  ".join(f"{name} {size / 1024:>8.1f} KiB" for name, size in sizes.items())
+    print(f"{label:<14} json {stdlib_ms:>8.2f} ms  fast {fast_ms:>8.2f} ms  {wire}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--templates", type=int, default=200)
+    parser.add_argument("--methodologies", type=int, default=300)
+    parser.add_argument("--toc-nodes", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"serializer: {'orjson' if main.orjson else 'json (orjson not installed)'}")
+    report("templates", build_templates(args.templates), args.repeat)
+    report("methodologies", build_methodologies(args.methodologies), args.repeat)
+    report("toc", build_toc(args.toc_nodes), args.repeat)
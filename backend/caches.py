@@ -0,0 +1,160 @@
+"""
+In-process caching primitives.
+
+SingleFlight collapses concurrent identical calls into one execution and
+keeps the result for a short TTL. collection_version() gives each Mongo
+collection a cheap version string (a local write counter plus a fingerprint
+re-read at most once per REFERENCE_VERSION_TTL_SECONDS) for caches and ETags
+to key on; bump_collection_version() invalidates it after a local write.
+VersionedLRU holds values built from such versions, bounded by entry count.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+REFERENCE_VERSION_TTL_SECONDS = float(os.getenv("REFERENCE_VERSION_TTL_SECONDS", "60"))
+
+SINGLE_FLIGHT_TTL_SECONDS = float(os.getenv("SINGLE_FLIGHT_TTL_SECONDS", "5"))
+SINGLE_FLIGHT_MAX_RESULTS = 1024
+
+def request_fingerprint(endpoint: str, inputs: Any) -> str:
+    digest = hashlib.sha256(
+        json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{endpoint}:{digest}"
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one execution (and so one
+    history write), and keeps the result for a short TTL for immediate repeats.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Any] = {}
+
+    def run(self, key: str, fn):
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+                return cached[1]
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._inflight[key] = call
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+        except Exception as exc:
+            call["error"] = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if call["error"] is None:
+                    self._store(key, call["result"])
+            call["done"].set()
+
+        return call["result"]
+
+    def _store(self, key: str, result: Any):
+
+        now = time.monotonic()
+
+        if len(self._results) >= SINGLE_FLIGHT_MAX_RESULTS:
+            self._results = {
+                k: v for k, v in self._results.items()
+                if now - v[0] < self.ttl_seconds
+            }
+
+        self._results[key] = (now, result)
+
+_collection_versions: Dict[str, Dict[str, Any]] = {}
+_collection_versions_lock = threading.Lock()
+
+def collection_version(collection) -> str:
+    now = time.monotonic()
+
+    with _collection_versions_lock:
+        entry = _collection_versions.setdefault(
+            collection.name,
+            {"local": 0, "fingerprint": None, "checked_at": 0.0}
+        )
+        stale = (
+            entry["fingerprint"] is None
+            or now - entry["checked_at"] > REFERENCE_VERSION_TTL_SECONDS
+        )
+
+    if stale:
+        latest = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        updated = collection.find_one({}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)])
+        fingerprint = "-".join(str(part) for part in (
+            collection.estimated_document_count(),
+            latest["_id"] if latest else 0,
+            updated.get("updated_at") if updated else None
+        ))
+
+        with _collection_versions_lock:
+            entry["fingerprint"] = fingerprint
+            entry["checked_at"] = now
+
+    return f"{entry['local']}:{entry['fingerprint']}"
+
+def bump_collection_version(collection):
+    with _collection_versions_lock:
+        entry = _collection_versions.setdefault(
+            collection.name,
+            {"local": 0, "fingerprint": None, "checked_at": 0.0}
+        )
+        entry["local"] += 1
+        entry["fingerprint"] = None
+
+class VersionedLRU:
+    """
+    Bounded LRU of (version, value) per key. A lookup misses when the entry was
+    built for another version, so callers rebuild it and put() it back.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, version: Any):
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def put(self, key: Hashable, version: Any, value: Any):
+
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,415 @@
+"""
+LFA scoring that needs nothing but the snapshot itself: section completeness
+and the design-quality rule pipeline.
+
+Section scores are cached per process by a content hash of the section, so
+re-scoring an LFA only recomputes the sections that changed.
+
+Kept free of main's imports so process-pool workers stay cheap: a spawned
+worker imports this module (with tracing and metrics), not the app and its
+Mongo client.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import re
+import signal
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from metrics import TrackedThreadPoolExecutor
+from tracing import trace_span
+
+SECTION_REQUIREMENTS = {
+    "organization_profile": {
+        "weight": 10,
+        "required_fields": ["organization_id", "theme", "geography", "scale"]
+    },
+    "problem_definition": {
+        "weight": 15,
+        "required_fields": ["core_problem", "affected_group"]
+    },
+    "problem_tree": {
+        "weight": 15,
+        "required_fields": ["root_causes", "core_problem", "effects"]
+    },
+    "outcomes": {
+        "weight": 20,
+        "required_fields": ["smart_outcomes"]
+    },
+    "methodology": {
+        "weight": 15,
+        "required_fields": ["interventions"]
+    },
+    "theory_of_change": {
+        "weight": 15,
+        "required_fields": ["activities", "outputs", "outcomes", "impact"]
+    },
+    "measurement": {
+        "weight": 10,
+        "required_fields": ["indicators", "targets"]
+    }
+}
+
+LFA_SECTION_CACHE_SIZE = int(os.getenv("LFA_SECTION_CACHE_SIZE", "4096"))
+
+_section_score_cache = OrderedDict()
+_section_score_cache_lock = threading.Lock()
+
+def content_hash(data: Any) -> str:
+    # Hashing runs on every call, so it has to stay close to the cost of scoring
+    if orjson:
+        raw = orjson.dumps(data, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    else:
+        raw = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+def init_worker():
+    # Ctrl-C reaches the whole process group; the parent shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def score_lfa_section(section: str, section_data: Any) -> Dict[str, Any]:
+
+    rules = SECTION_REQUIREMENTS[section]
+
+    if not section_data:
+        return {
+            "section": section,
+            "status": "missing",
+            "score": 0,
+            "weight": rules["weight"]
+        }
+
+    # Check required fields
+    present_fields = [
+        field for field in rules["required_fields"]
+        if field in section_data and section_data[field]
+    ]
+
+    completion_ratio = len(present_fields) / len(rules["required_fields"])
+    section_score = round(rules["weight"] * completion_ratio, 2)
+
+    status = "complete" if completion_ratio == 1 else "partial"
+
+    return {
+        "section": section,
+        "status": status,
+        "score": section_score,
+        "weight": rules["weight"],
+        "missing_fields": sorted(
+            set(rules["required_fields"]) - set(present_fields)
+        )
+    }
+
+def cached_section_score(section: str, section_data: Any):
+
+    section_hash = content_hash(section_data)
+    key = (section, section_hash)
+
+    with _section_score_cache_lock:
+        result = _section_score_cache.get(key)
+        if result is not None:
+            _section_score_cache.move_to_end(key)
+            return section_hash, result
+
+    result = score_lfa_section(section, section_data)
+
+    with _section_score_cache_lock:
+        _section_score_cache[key] = result
+        if len(_section_score_cache) > LFA_SECTION_CACHE_SIZE:
+            _section_score_cache.popitem(last=False)
+
+    return section_hash, result
+
+def calculate_lfa_completeness(lfa_snapshot: Dict[str, Any]):
+
+    section_results = []
+    section_hashes = []
+    total_score = 0
+    missing_sections = []
+
+    for section in SECTION_REQUIREMENTS:
+        section_hash, result = cached_section_score(section, lfa_snapshot.get(section))
+
+        section_hashes.append(section_hash)
+        section_results.append(dict(result))
+        total_score += result["score"]
+
+        if result["status"] == "missing":
+            missing_sections.append(section)
+
+    completion_percentage = round(total_score, 2)
+
+    return {
+        "completion_percentage": completion_percentage,
+        "section_breakdown": section_results,
+        "missing_sections": missing_sections,
+        # Fingerprint of the scored input: one content hash per section
+        "snapshot_hash": content_hash(section_hashes)
+    }
+
+QUALITY_CHECKS = {
+    "outcome_quality": {
+        "severity": "high"
+    },
+    "stakeholder_alignment": {
+        "severity": "high"
+    },
+    "indicator_validity": {
+        "severity": "medium"
+    },
+    "theory_of_change_logic": {
+        "severity": "high"
+    },
+    "problem_intervention_alignment": {
+        "severity": "medium"
+    }
+}
+
+# Score penalty per feedback item, by the severity of the check that raised it
+SEVERITY_PENALTIES = {
+    "high": 10,
+    "medium": 6,
+    "low": 3
+}
+
+QUALITY_RULES_PARALLEL = os.getenv("QUALITY_RULES_PARALLEL", "false").lower() == "true"
+
+def keyword_pattern(words: List[str]):
+    """
+    One compiled alternation per keyword list, so each text is scanned once
+    (substring semantics, same as `word in text`).
+    """
+    return re.compile("|".join(re.escape(w) for w in words))
+
+class NormalizedLFA:
+    """
+    Snapshot view shared by every quality rule: text is lower-cased once here
+    instead of inside each analyzer.
+    """
+
+    def __init__(self, lfa_snapshot: Dict[str, Any]):
+
+        self.outcomes = (lfa_snapshot.get("outcomes") or {}).get("smart_outcomes", [])
+        self.outcomes_lower = [o.lower() for o in self.outcomes]
+
+        self.stakeholders = lfa_snapshot.get("stakeholders") or []
+
+        self.indicators = (lfa_snapshot.get("measurement") or {}).get("indicators", [])
+        self.indicators_lower = [str(i).lower() for i in self.indicators]
+
+        self.toc = lfa_snapshot.get("theory_of_change") or {}
+
+        self.problem = (lfa_snapshot.get("problem_definition") or {}).get("core_problem", "")
+        self.problem_lower = self.problem.lower()
+
+        self.interventions = (lfa_snapshot.get("methodology") or {}).get("interventions", [])
+        self.interventions_lower = [i.lower() for i in self.interventions]
+
+# Registered rules, run in QUALITY_CHECKS order
+QUALITY_RULES: Dict[str, Dict[str, Any]] = {}
+
+def quality_rule(check: str):
+
+    def register(analyzer):
+        QUALITY_RULES[check] = {
+            "severity": QUALITY_CHECKS[check]["severity"],
+            "analyzer": analyzer
+        }
+        return analyzer
+
+    return register
+
+MEASURABLE_PATTERN = keyword_pattern(["increase", "decrease", "%", "to", "by", "from"])
+VAGUE_OUTCOME_PATTERN = keyword_pattern(["improve", "enhance", "strengthen", "better"])
+PERCEPTION_PATTERN = keyword_pattern(["survey", "perception"])
+MISMATCH_PATTERN = keyword_pattern(["infrastructure", "hardware"])
+
+@quality_rule("outcome_quality")
+def analyze_outcome_quality(lfa: NormalizedLFA):
+
+    feedback = []
+
+    for outcome, text in zip(lfa.outcomes, lfa.outcomes_lower):
+        issues = []
+
+        if not MEASURABLE_PATTERN.search(text):
+            issues.append("Outcome is not clearly measurable")
+
+        if VAGUE_OUTCOME_PATTERN.search(text):
+            issues.append("Outcome uses vague language")
+
+        if issues:
+            feedback.append({
+                "area": "Student Outcomes",
+                "issue": outcome,
+                "problems": issues,
+                "suggestion": "Rewrite outcome using a measurable baseline, target, and timeframe"
+            })
+
+    return feedback
+
+@quality_rule("stakeholder_alignment")
+def analyze_stakeholder_alignment(lfa: NormalizedLFA):
+
+    feedback = []
+
+    if not lfa.stakeholders:
+        feedback.append({
+            "area": "Stakeholders",
+            "issue": "No stakeholders linked to outcomes",
+            "suggestion": "Map at least one stakeholder responsible for each outcome"
+        })
+        return feedback
+
+    if lfa.outcomes and len(lfa.stakeholders) < len(lfa.outcomes):
+        feedback.append({
+            "area": "Stakeholder Coverage",
+            "issue": "Fewer stakeholders than outcomes",
+            "suggestion": "Ensure accountability by mapping stakeholders to each outcome"
+        })
+
+    return feedback
+
+@quality_rule("indicator_validity")
+def analyze_indicator_quality(lfa: NormalizedLFA):
+
+    feedback = []
+
+    for indicator, text in zip(lfa.indicators, lfa.indicators_lower):
+        if PERCEPTION_PATTERN.search(text):
+            feedback.append({
+                "area": "Indicators",
+                "issue": indicator,
+                "problem": "Indicator is perception-based",
+                "suggestion": "Prefer observable or performance-based indicators"
+            })
+
+    return feedback
+
+@quality_rule("theory_of_change_logic")
+def analyze_toc_logic(lfa: NormalizedLFA):
+
+    feedback = []
+    toc = lfa.toc
+
+    required_chain = ["activities", "outputs", "outcomes", "impact"]
+
+    for step in required_chain:
+        if step not in toc or not toc[step]:
+            feedback.append({
+                "area": "Theory of Change",
+                "issue": f"Missing {step}",
+                "suggestion": f"Define clear {step} to maintain logical flow"
+            })
+
+    if "activities" in toc and "outcomes" in toc:
+        if len(toc["activities"]) > len(toc["outcomes"]) * 3:
+            feedback.append({
+                "area": "Theory of Change",
+                "issue": "Too many activities for defined outcomes",
+                "suggestion": "Reduce activities or clarify outcome pathways"
+            })
+
+    return feedback
+
+@quality_rule("problem_intervention_alignment")
+def analyze_problem_intervention_alignment(lfa: NormalizedLFA):
+
+    feedback = []
+
+    if lfa.problem and lfa.interventions:
+        if MISMATCH_PATTERN.search(lfa.problem_lower):
+            if not any("infrastructure" in i for i in lfa.interventions_lower):
+                feedback.append({
+                    "area": "Intervention Alignment",
+                    "issue": "Problem–intervention mismatch",
+                    "suggestion": "Selected interventions do not address the stated core problem"
+                })
+
+    return feedback
+
+_quality_rule_executor = None
+
+def get_quality_rule_executor() -> TrackedThreadPoolExecutor:
+
+    global _quality_rule_executor
+
+    if _quality_rule_executor is None:
+        _quality_rule_executor = TrackedThreadPoolExecutor(
+            max_workers=len(QUALITY_RULES),
+            thread_name_prefix="quality-rule"
+        )
+
+    return _quality_rule_executor
+
+def run_quality_rule(check: str, lfa: NormalizedLFA):
+
+    rule = QUALITY_RULES[check]
+
+    start = time.perf_counter()
+    with trace_span(f"quality_rule.{check}"):
+        items = rule["analyzer"](lfa)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for item in items:
+        item["check"] = check
+        item["severity"] = rule["severity"]
+
+    return items, elapsed_ms
+
+def generate_design_quality_feedback(lfa_snapshot, parallel: Optional[bool] = None):
+
+    lfa = NormalizedLFA(lfa_snapshot)
+    parallel = QUALITY_RULES_PARALLEL if parallel is None else parallel
+
+    if parallel:
+        executor = get_quality_rule_executor()
+        futures = {
+            # copy_context carries the current trace span into the worker
+            check: executor.submit(contextvars.copy_context().run, run_quality_rule, check, lfa)
+            for check in QUALITY_RULES
+        }
+        outcomes = {check: future.result() for check, future in futures.items()}
+    else:
+        outcomes = {check: run_quality_rule(check, lfa) for check in QUALITY_RULES}
+
+    feedback = []
+    rule_timings_ms = {}
+
+    for check, (items, elapsed_ms) in outcomes.items():
+        feedback.extend(items)
+        rule_timings_ms[check] = round(elapsed_ms, 3)
+
+    penalty = sum(SEVERITY_PENALTIES[item["severity"]] for item in feedback)
+    quality_score = max(0, 100 - penalty)
+
+    return {
+        "quality_score": quality_score,
+        "feedback_items": feedback,
+        "rule_timings_ms": rule_timings_ms
+    }
+
+def review_organization_lfa(lfa_snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One organization's row of a portfolio design review; runs in pool workers.
+    """
+
+    completeness = calculate_lfa_completeness(lfa_snapshot)
+    quality = generate_design_quality_feedback(lfa_snapshot, parallel=False)
+
+    return {
+        "completion_percentage": completeness["completion_percentage"],
+        "missing_sections": completeness["missing_sections"],
+        "quality_score": quality["quality_score"],
+        "feedback_count": len(quality["feedback_items"])
+    }
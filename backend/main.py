@@ -1,13 +1,16 @@
 import os
 from datetime import datetime,timezone
-from typing import Optional, List, Dict, Any
-from fastapi import FastAPI, HTTPException,Request,Query
+from typing import Optional, List, Dict, Any, Literal
+from fastapi import FastAPI, HTTPException,Request,Query,Response,Header,Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, BeforeValidator
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, ReplaceOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
 from bson import ObjectId
 from dotenv import load_dotenv
 from typing_extensions import Annotated
+from contextlib import asynccontextmanager
 import uuid
 import base64
 import json
@@ -15,13 +18,40 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 import time
+import threading
+import hashlib
+import asyncio
+import weakref
+from collections import OrderedDict
+import multiprocessing
+import re
+import math
+import difflib
+import hmac
+from urllib.parse import urlencode, urlsplit
 from openpyxl import Workbook
 from docx import Document
 from pptx import Presentation
 from fastapi.background import BackgroundTasks
 from fastapi.responses import FileResponse, JSONResponse
-from googletrans import Translator
+from fastapi.encoders import ENCODERS_BY_TYPE
+from googletrans import LANGUAGES, Translator
+import gzip
+import anyio
+import gc
+import tracemalloc
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # -------------------- ENV SETUP --------------------
 load_dotenv()
@@ -32,8 +62,65 @@ DB_NAME = os.getenv("DB_NAME", "margdarshak")
 if not MONGODB_URI:
     raise RuntimeError("MONGODB_URI not set in environment")
 
+# -------------------- METRICS, TRACING, PROFILING, CACHING, SEARCH & SCORING MODULES --------------------
+# Configured from the environment, so imported after load_dotenv()
+from metrics import (  # noqa: E402
+    METRICS,
+    METRICS_ENABLED,
+    MONGO_EVENT_LISTENERS,
+    Counter,
+    Gauge,
+    Histogram,
+    TrackedProcessPoolExecutor,
+    register_metric
+)
+from tracing import (  # noqa: E402
+    MongoCommandTracer,
+    current_span,
+    current_trace_id,
+    export_trace,
+    logger,
+    start_root_span,
+    trace_span,
+    traced
+)
+from profiling import (  # noqa: E402
+    MEMORY_TOP_STATS,
+    PROFILE_INTERVAL_SECONDS,
+    PROFILE_TTL_SECONDS,
+    TRACEMALLOC_FRAMES,
+    StackSampler,
+    format_memory_stat,
+    take_memory_snapshot
+)
+from caches import (  # noqa: E402
+    REFERENCE_VERSION_TTL_SECONDS,
+    SINGLE_FLIGHT_TTL_SECONDS,
+    SingleFlight,
+    VersionedLRU,
+    bump_collection_version,
+    collection_version,
+    request_fingerprint
+)
+from search import (  # noqa: E402
+    SIMILARITY_DIMENSIONS,
+    BM25Index,
+    TextVectorIndex,
+    fit_idf,
+    hashed_term_counts,
+    search_snippet,
+    tfidf_rows
+)
+import lfa_scoring  # noqa: E402
+from lfa_scoring import (  # noqa: E402
+    calculate_lfa_completeness,
+    generate_design_quality_feedback
+)
+
+MONGO_EVENT_LISTENERS.append(MongoCommandTracer())
+
 # -------------------- DB CONNECTION --------------------
-client = MongoClient(MONGODB_URI)
+client = MongoClient(MONGODB_URI, event_listeners=MONGO_EVENT_LISTENERS)
 db = client[DB_NAME]
 
 # -------------------- DB COLLECTION CREATION --------------------
@@ -65,12 +152,106 @@ lfa_templates_collection = db["lfa_templates"]
 organization_templates_collection = db["organization_templates"]
 template_ratings_collection = db["template_ratings"]
 export_jobs_collection = db["export_jobs"]
+idempotency_keys_collection = db["idempotency_keys"]
+lfa_snapshots_collection = db["lfa_snapshots"]
+design_review_jobs_collection = db["design_review_jobs"]
+design_review_results_collection = db["design_review_results"]
+analytics_rollups_collection = db["analytics_rollups"]
+analytics_latest_collection = db["analytics_latest"]
+context_rules_collection = db["context_rules"]
+profiles_collection = db["profiles"]
+
+# -------------------- SERIALIZATION --------------------
+# orjson when installed, stdlib json otherwise. Mongo documents can be returned
+# as-is: ObjectId and datetime are encoded here and in FastAPI's encoder table.
+# Both paths write non-finite floats as null and non-string keys (None, numbers,
+# booleans) the way json.dumps does, so a response never depends on which one ran.
+ENCODERS_BY_TYPE[ObjectId] = str
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+def finite_or_none(content: Any) -> Any:
+
+    if isinstance(content, float):
+        return content if math.isfinite(content) else None
+    if isinstance(content, dict):
+        return {key: finite_or_none(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [finite_or_none(value) for value in content]
+
+    return content
+
+def json_default(obj: Any):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return finite_or_none(obj.tolist())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def json_dumps(content: Any) -> bytes:
+
+    if orjson:
+        return orjson.dumps(content, default=json_default, option=ORJSON_OPTIONS)
+
+    return json.dumps(
+        finite_or_none(content),
+        default=json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def json_loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+class FastJSONResponse(JSONResponse):
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+def fast_json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Skip FastAPI's jsonable_encoder pass for large bodies, keeping headers
+    (ETag, Cache-Control) already set on the injected response.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content=content, headers=headers)
 
 # -------------------- FASTAPI APP --------------------
+# Startup and shutdown work is registered next to the code it belongs to with
+# @on_startup / @on_shutdown and run, in registration order, by the lifespan.
+STARTUP_HOOKS: List[Any] = []
+SHUTDOWN_HOOKS: List[Any] = []
+
+def on_startup(hook):
+    STARTUP_HOOKS.append(hook)
+    return hook
+
+def on_shutdown(hook):
+    SHUTDOWN_HOOKS.append(hook)
+    return hook
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    for hook in STARTUP_HOOKS:
+        hook()
+
+    yield
+
+    for hook in SHUTDOWN_HOOKS:
+        hook()
+
 app = FastAPI(
     title="MargDarshak Program Design Platform",
     version="1.0.0",
-    description="AI-powered program design backend for education NGOs"
+    description="AI-powered program design backend for education NGOs",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # -------------------- CORS --------------------
@@ -82,6 +263,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -------------------- DB INDEXES --------------------
+@on_startup
+def ensure_indexes():
+
+    backfill_methodology_ranges()
+
+    methodology_library_collection.create_index([
+        ("theme", 1),
+        ("geographies", 1),
+        ("budget_min_lakhs", 1),
+        ("budget_max_lakhs", 1)
+    ])
+
+    if "key_1_path_1_query_1" in idempotency_keys_collection.index_information():
+        idempotency_keys_collection.drop_index("key_1_path_1_query_1")
+    idempotency_keys_collection.create_index(
+        [("key", 1), ("client", 1), ("path", 1), ("query", 1)],
+        unique=True
+    )
+    idempotency_keys_collection.create_index(
+        "created_at",
+        expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS
+    )
+
+    lfa_snapshots_collection.create_index("organization_id", unique=True)
+
+    lfa_completeness_collection.create_index([("organization_id", 1), ("evaluated_at", -1)])
+
+    design_review_jobs_collection.create_index("job_id", unique=True)
+    design_review_results_collection.create_index(
+        [("job_id", 1), ("organization_id", 1)],
+        unique=True
+    )
+
+    analytics_rollups_collection.create_index(
+        [("metric", 1), ("dimension", 1), ("key", 1)],
+        unique=True
+    )
+    analytics_latest_collection.create_index(
+        [("metric", 1), ("organization_id", 1)],
+        unique=True
+    )
+
+    if "template_id_1_organization_id_1" not in template_ratings_collection.index_information():
+        dedupe_template_ratings()
+        template_ratings_collection.create_index(
+            [("template_id", 1), ("organization_id", 1)],
+            unique=True
+        )
+        rebuild_template_rating_stats()
+    backfill_unrated_rating_stats()
+
+    for sort_key in TEMPLATE_SORTS.values():
+        lfa_templates_collection.create_index([("is_public", 1), sort_key])
+
+    for facet_field in ("theme", "system_level", "geography_type", "applicable_states"):
+        lfa_templates_collection.create_index([("is_public", 1), (facet_field, 1)])
+    lfa_templates_collection.create_index([("is_public", 1), ("updated_at", -1)])
+
+    problem_statements_collection.create_index([("organization_id", 1), ("updated_at", -1)])
+
+    context_rules_collection.create_index("rule_id", unique=True)
+
+    organization_templates_collection.create_index("template_id")
+    organization_templates_collection.create_index("base_template_id")
+
+    for collection, organization_field, _ in SEARCH_SOURCES.values():
+        collection.create_index(organization_field)
+
+    for collection in REFERENCE_COLLECTIONS:
+        collection.create_index("updated_at")
+
+    profiles_collection.create_index("profile_id", unique=True)
+    profiles_collection.create_index("created_at", expireAfterSeconds=PROFILE_TTL_SECONDS)
+
 # -------------------- UTILITIES --------------------
 PyObjectId = Annotated[
     str,
@@ -93,9 +349,233 @@ PyObjectId = Annotated[
 def utc_now():
     return datetime.now(timezone.utc)
 
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+def is_admin_token(token: Optional[str]) -> bool:
+    # compare_digest only accepts ASCII str, and headers may carry any latin-1 text
+    return bool(ADMIN_API_TOKEN) and hmac.compare_digest(
+        (token or "").encode(), ADMIN_API_TOKEN.encode()
+    )
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Guard for operational endpoints; disabled entirely when ADMIN_API_TOKEN is unset.
+    """
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
 def serialize_mongo(doc):
-    doc["_id"] = str(doc["_id"])
-    return doc
+    return {**doc, "_id": str(doc["_id"])}
+
+def build_projection(
+    fields: Optional[str],
+    view: Optional[str],
+    model: type,
+    views: Dict[str, List[str]]
+) -> Dict[str, int]:
+    """
+    Turn a `fields=a,b,c` or `view=summary` query value into a Mongo projection.
+    Requested fields are validated against the response model so typos fail fast.
+    """
+    projection = {"_id": 0}
+
+    if view:
+        if view not in views:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown view '{view}'. Available views: {', '.join(views)}"
+            )
+        requested = list(views[view])
+    else:
+        requested = []
+
+    if fields:
+        requested.extend(f.strip() for f in fields.split(",") if f.strip())
+
+    if not requested:
+        return projection
+
+    unknown = [f for f in requested if f not in model.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+
+    projection.update({f: 1 for f in requested})
+    return projection
+
+# -------------------- CONDITIONAL GET --------------------
+# Reference data may be cached briefly by anyone; organization data is private
+# and revalidated on every use (a 304 costs one small version lookup).
+REFERENCE_MAX_AGE_SECONDS = int(os.getenv("REFERENCE_MAX_AGE_SECONDS", "300"))
+
+CACHE_POLICIES = {
+    "reference": f"public, max-age={REFERENCE_MAX_AGE_SECONDS}",
+    "organization": "private, no-cache"
+}
+
+def response_etag(request: Request, *parts) -> str:
+    """
+    ETag over the route, its query, the data version parts and the requested
+    language, since the translation middleware rewrites the body per language.
+    """
+    language = request.query_params.get("language", "en")
+    query = sorted((k, v) for k, v in request.query_params.multi_items() if k != "language")
+    digest = hashlib.sha256(
+        json.dumps([request.url.path, query, language, *parts], default=str).encode()
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+def latest_update(collection, query: Dict[str, Any]):
+    """
+    (matching document count, newest updated_at) as a cheap data version.
+    """
+    latest = collection.find_one(query, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)])
+    return collection.count_documents(query), latest.get("updated_at") if latest else None
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str = CACHE_POLICIES["organization"]
+) -> Optional[Response]:
+    """
+    Returns a 304 when If-None-Match matches; otherwise sets the validators on response.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control
+    }
+
+    # Weak comparison: the compression middleware weakens ETags of encoded bodies
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+# -------------------- REQUEST COALESCING --------------------
+analysis_single_flight = SingleFlight(SINGLE_FLIGHT_TTL_SECONDS)
+
+# -------------------- REFERENCE DATA VERSIONING --------------------
+# Master collections (methodology_library, indicator_master, ...) are seeded
+# outside the API, so in-process caches key themselves on
+# caches.collection_version(): a cheap fingerprint re-read from Mongo at most
+# once per TTL, plus a local write counter. The fingerprint (count, newest _id,
+# newest updated_at) sees inserts, deletes and edits that set updated_at. Where the deployment supports change streams
+# (replica sets, Atlas) a watcher also invalidates on every write, so edits
+# that leave updated_at alone are picked up without waiting for a restart.
+REFERENCE_CHANGE_STREAMS = os.getenv("REFERENCE_CHANGE_STREAMS", "true").lower() == "true"
+
+# Per-theme caches of reference data are bounded: themes come from clients,
+# and an unknown theme still builds (and would otherwise keep) an entry
+THEME_CACHE_MAX_ENTRIES = int(os.getenv("THEME_CACHE_MAX_ENTRIES", "64"))
+
+# Collections whose version keys an in-process cache or an ETag
+REFERENCE_COLLECTIONS = [
+    state_context_rules_collection,
+    district_challenges_collection,
+    ecosystem_patterns_collection,
+    problem_statements_collection,
+    methodology_library_collection,
+    indicator_master_collection,
+    stakeholder_master_collection,
+    practice_master_collection,
+    toc_pattern_library_collection,
+    competency_frameworks_collection,
+    policy_references_collection
+]
+
+def watch_reference_collections():
+
+    names = [collection.name for collection in REFERENCE_COLLECTIONS]
+    pipeline = [{"$match": {"ns.coll": {"$in": names}}}]
+    resume_token = None
+
+    while True:
+        try:
+            with db.watch(pipeline, start_after=resume_token) as stream:
+                for change in stream:
+                    resume_token = stream.resume_token
+                    collection_name = change.get("ns", {}).get("coll")
+                    if collection_name:
+                        bump_collection_version(db[collection_name])
+        except OperationFailure as e:
+            # Standalone servers have no change streams; the TTL fingerprint still applies
+            logger.info("Reference change stream unavailable, polling only: %s", e)
+            return
+        except PyMongoError:
+            logger.warning("Reference change stream interrupted", exc_info=True)
+            resume_token = None
+            time.sleep(5)
+
+@on_startup
+def start_reference_watcher():
+    if REFERENCE_CHANGE_STREAMS:
+        threading.Thread(
+            target=watch_reference_collections,
+            name="reference-change-stream",
+            daemon=True
+        ).start()
+
+# -------------------- MATERIALIZED LFA SNAPSHOT --------------------
+# One document per organization, kept in the shape SECTION_REQUIREMENTS expects.
+# Every endpoint that writes a design artifact updates its section in place, so
+# scoring and export endpoints can work from an organization_id alone.
+LFA_SNAPSHOT_METADATA = {"_id": 0, "organization_id": 0, "created_at": 0, "updated_at": 0}
+
+def update_lfa_snapshot(
+    organization_id: str,
+    sections: Optional[Dict[str, Any]] = None,
+    append: Optional[Dict[str, List[Any]]] = None
+):
+
+    now = utc_now()
+    update = {
+        "$set": {**(sections or {}), "updated_at": now},
+        "$setOnInsert": {"created_at": now}
+    }
+
+    if append:
+        update["$addToSet"] = {
+            path: {"$each": values} for path, values in append.items()
+        }
+
+    lfa_snapshots_collection.update_one(
+        {"organization_id": organization_id},
+        update,
+        upsert=True
+    )
+
+def load_lfa_snapshot(organization_id: str) -> Dict[str, Any]:
+
+    snapshot = lfa_snapshots_collection.find_one(
+        {"organization_id": organization_id},
+        LFA_SNAPSHOT_METADATA
+    )
+
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No LFA data recorded for this organization")
+
+    return snapshot
+
+def resolve_lfa_snapshot(organization_id: str, lfa_snapshot: Optional[Dict[str, Any]]):
+    """
+    Client-supplied snapshots still win; otherwise read the materialized one.
+    """
+    if lfa_snapshot is not None:
+        return lfa_snapshot
+
+    return load_lfa_snapshot(organization_id)
+
+# LFA SNAPSHOT RETRIEVAL API
+@app.get("/organization/{org_id}/lfa-snapshot")
+def get_lfa_snapshot(org_id: str):
+    return load_lfa_snapshot(org_id)
 
 # -------------------- ALL FUNCTIONALITIES --------------------
 
@@ -160,15 +640,36 @@ def create_organization_profile(payload: OrganizationProfileCreate):
     result = organization_profiles_collection.insert_one(doc)
     doc["_id"] = result.inserted_id
 
+    update_lfa_snapshot(str(result.inserted_id), {
+        "organization_profile": {
+            "organization_id": str(result.inserted_id),
+            "theme": payload.thematic_focus[0] if payload.thematic_focus else None,
+            "geography": payload.geography.dict(),
+            "scale": payload.reach_metrics.schools if payload.reach_metrics else None
+        }
+    })
+
     return serialize_mongo(doc)
 
 # Organization Profile Retrieval Endpoint
 @app.get("/organization/profile/{org_id}", response_model=OrganizationProfileDB)
-def get_organization_profile(org_id: str):
+def get_organization_profile(org_id: str, request: Request, response: Response):
 
     if not ObjectId.is_valid(org_id):
         raise HTTPException(status_code=400, detail="Invalid organization ID")
 
+    version = organization_profiles_collection.find_one(
+        {"_id": ObjectId(org_id)},
+        {"_id": 0, "updated_at": 1}
+    )
+
+    if not version:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    not_modified = conditional_get(request, response, response_etag(request, version.get("updated_at")))
+    if not_modified:
+        return not_modified
+
     org = organization_profiles_collection.find_one(
         {"_id": ObjectId(org_id)}
     )
@@ -178,6 +679,228 @@ def get_organization_profile(org_id: str):
 
     return serialize_mongo(org)
 
+# -------------------- GEOGRAPHY INDEX --------------------
+# state -> district -> block tree built from state_context_rules and
+# district_challenges (documents with a "block" field are block level). Both
+# collections may carry an "aliases" list; names are normalized before lookup
+# and misspellings fall back to the closest sibling name.
+GEOGRAPHY_MATCH_CUTOFF = float(os.getenv("GEOGRAPHY_MATCH_CUTOFF", "0.85"))
+GEOGRAPHY_RESOLVE_MAX_LOCATIONS = 1000
+
+GEOGRAPHY_LEVELS = ["state", "district", "block"]
+
+STATE_ALIASES = {
+    "orissa": "odisha",
+    "uttaranchal": "uttarakhand",
+    "pondicherry": "puducherry",
+    "up": "uttar pradesh",
+    "mp": "madhya pradesh",
+    "ap": "andhra pradesh",
+    "tn": "tamil nadu",
+    "wb": "west bengal",
+    "j&k": "jammu and kashmir",
+    "nct of delhi": "delhi"
+}
+
+PLACE_SUFFIX_PATTERN = re.compile(r"\b(district|dist|block|taluka|tehsil|mandal)\b")
+
+def normalize_place(name: str) -> str:
+    name = name.lower().replace("&", " and ")
+    name = re.sub(r"[^a-z0-9 ]", " ", name)
+    return " ".join(PLACE_SUFFIX_PATTERN.sub(" ", name).split())
+
+class GeographyNode:
+
+    __slots__ = ("name", "challenges", "stored_challenges", "children", "aliases")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.challenges: List[Dict[str, Any]] = []
+        self.stored_challenges: List[Any] = []  # district/block items exactly as stored
+        self.children: Dict[str, "GeographyNode"] = {}
+        self.aliases: Dict[str, str] = {}
+
+    def key(self, name: str) -> str:
+        key = normalize_place(name)
+        return self.aliases.get(key, key)
+
+    def ensure(self, name: str) -> "GeographyNode":
+        return self.children.setdefault(self.key(name), GeographyNode(name))
+
+    def add_aliases(self, aliases: List[str], name: str):
+        for alias in aliases:
+            self.aliases[normalize_place(alias)] = self.key(name)
+
+    def child(self, name: str) -> Optional["GeographyNode"]:
+
+        key = self.key(name)
+        node = self.children.get(key)
+
+        if node is None:
+            close = difflib.get_close_matches(key, self.children.keys(), n=1, cutoff=GEOGRAPHY_MATCH_CUTOFF)
+            node = self.children[close[0]] if close else None
+
+        return node
+
+def normalize_challenge(item: Any) -> Optional[Dict[str, Any]]:
+    """
+    {"challenge", "reason"} from a stored string or dict item; None if it names no challenge.
+    """
+    if isinstance(item, str):
+        return {"challenge": item, "reason": None}
+    if isinstance(item, dict) and isinstance(item.get("challenge"), str):
+        return {"challenge": item["challenge"], "reason": item.get("reason")}
+    return None
+
+def valid_challenges(items: List[Any], source: str) -> List[Any]:
+
+    valid = []
+
+    for item in items:
+        if normalize_challenge(item) is None:
+            logger.warning("Skipping malformed challenge in %s: %r", source, item)
+        else:
+            valid.append(item)
+
+    return valid
+
+def build_geography_index() -> GeographyNode:
+
+    root = GeographyNode("india")
+    root.aliases.update({normalize_place(a): normalize_place(c) for a, c in STATE_ALIASES.items()})
+
+    for rule in state_context_rules_collection.find({}, {"_id": 0}):
+        if not rule.get("state"):
+            logger.warning("Skipping state context rule without a state: %r", rule)
+            continue
+
+        root.add_aliases(rule.get("aliases", []), rule["state"])
+        root.ensure(rule["state"]).challenges.extend(
+            normalize_challenge(item)
+            for item in valid_challenges(rule.get("education_challenges", []), f"state {rule['state']}")
+        )
+
+    for record in district_challenges_collection.find({}, {"_id": 0}):
+        if not record.get("state") or not record.get("district"):
+            logger.warning("Skipping district challenges without a state and district: %r", record)
+            continue
+
+        node = root.ensure(record["state"])
+
+        if record.get("block"):
+            node = node.ensure(record["district"])
+            node.add_aliases(record.get("aliases", []), record["block"])
+            node = node.ensure(record["block"])
+        else:
+            node.add_aliases(record.get("aliases", []), record["district"])
+            node = node.ensure(record["district"])
+
+        items = valid_challenges(record.get("challenges", []), f"{record['state']}/{node.name}")
+        node.stored_challenges.extend(items)
+        node.challenges.extend(normalize_challenge(item) for item in items)
+
+    return root
+
+_geography_index_cache: Dict[str, Any] = {"version": None, "index": None}
+
+def get_geography_index() -> GeographyNode:
+
+    version = (
+        collection_version(state_context_rules_collection),
+        collection_version(district_challenges_collection)
+    )
+
+    if _geography_index_cache["version"] != version:
+        _geography_index_cache["index"] = build_geography_index()
+        _geography_index_cache["version"] = version
+
+    return _geography_index_cache["index"]
+
+def geography_path(
+    state: Optional[str],
+    district: Optional[str] = None,
+    block: Optional[str] = None
+) -> List[Any]:
+    """
+    (level, node) pairs from the state down to the most specific level that matched.
+    """
+    node = get_geography_index()
+    path = []
+
+    for level, name in zip(GEOGRAPHY_LEVELS, (state, district, block)):
+        if not name:
+            break
+
+        node = node.child(name)
+        if node is None:
+            break
+
+        path.append((level, node))
+
+    return path
+
+def resolve_geography(
+    state: Optional[str],
+    district: Optional[str] = None,
+    block: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Canonical names for a location plus its challenges, most specific level first.
+    """
+    path = geography_path(state, district, block)
+    resolved = {level: None for level in GEOGRAPHY_LEVELS}
+    resolved.update((level, node.name) for level, node in path)
+
+    challenges = []
+    seen: Dict[str, Dict[str, Any]] = {}
+
+    for level, node in reversed(path):
+        for item in node.challenges:
+            key = item["challenge"].lower()
+            if key not in seen:
+                seen[key] = {**item, "level": level}
+                challenges.append(seen[key])
+            elif not seen[key].get("reason"):
+                seen[key]["reason"] = item.get("reason")
+
+    return {
+        **resolved,
+        "matched_level": path[-1][0] if path else None,
+        "challenges": challenges
+    }
+
+class GeographyLocation(BaseModel):
+    state: str
+    district: Optional[str] = None
+    block: Optional[str] = None
+
+class GeographyResolveRequest(BaseModel):
+    locations: List[GeographyLocation] = Field(..., min_length=1, max_length=GEOGRAPHY_RESOLVE_MAX_LOCATIONS)
+    include_challenges: bool = False
+
+# GEOGRAPHY CONTEXT API
+@app.get("/geography/context")
+def get_geography_context(state: str, district: Optional[str] = None, block: Optional[str] = None):
+    return resolve_geography(state, district, block)
+
+# GEOGRAPHY BULK RESOLVE API
+@app.post("/geography/resolve")
+def bulk_resolve_geography(payload: GeographyResolveRequest):
+
+    results = []
+
+    for location in payload.locations:
+        resolved = resolve_geography(location.state, location.district, location.block)
+        if not payload.include_challenges:
+            resolved.pop("challenges")
+        results.append({"input": location.dict(), **resolved})
+
+    return {
+        "count": len(results),
+        "unresolved": sum(1 for r in results if r["matched_level"] is None),
+        "results": results
+    }
+
 # -------------------- AI-Powered Context Analysis --------------------
 # AI CONTEXT MODELS
 class LFARecommendation(BaseModel):
@@ -199,147 +922,368 @@ class AIContextAnalysisResponse(BaseModel):
     potential_challenges: List[ContextChallenge]
     generated_at: datetime
 
-# AI CONTEXT ENGINE
-def analyze_context(profile: Dict[str, Any]) -> Dict[str, Any]:
-
-    geography = profile["geography"]["state"].lower()
-    themes = [t.lower() for t in profile["thematic_focus"]]
-    maturity = profile["maturity_level"].lower()
+# -------------------- CONTEXT RULE ENGINE --------------------
+# LFA template and program pattern rules live in the context_rules collection
+# and are compiled into a decision table indexed by theme, maturity and state,
+# so a profile only evaluates the rules that can match it. DEFAULT_CONTEXT_RULES
+# apply while the collection is empty. The table is reloaded when the rule set
+# changes (checked at most once per REFERENCE_VERSION_TTL_SECONDS).
+class ContextRuleCondition(BaseModel):
+    themes: List[str] = []
+    maturity_levels: List[str] = []
+    states: List[str] = []
+    min_schools: Optional[int] = None
+    max_schools: Optional[int] = None
+
+class ContextRule(BaseModel):
+    rule_id: str
+    kind: Literal["lfa_template", "program_pattern"]
+    when: ContextRuleCondition = ContextRuleCondition()
+    then: Dict[str, str]  # LFARecommendation or ProgramPatternSuggestion fields
+    priority: int = 0  # highest matching lfa_template rule wins
+    enabled: bool = True
+
+class ContextRuleSetRequest(BaseModel):
+    rules: List[ContextRule]
+
+GENERIC_LFA_RECOMMENDATION = {
+    "template_key": "Education_Improvement_Generic",
+    "rationale": "Suitable for multi-theme education interventions"
+}
 
-    # ---- LFA TEMPLATE RECOMMENDATION ----
-    if "fln" in themes:
-        lfa_template = {
+DEFAULT_CONTEXT_RULES = [
+    {
+        "rule_id": "lfa-fln",
+        "kind": "lfa_template",
+        "when": {"themes": ["fln"]},
+        "then": {
             "template_key": "FLN_System_Strengthening",
             "rationale": "FLN requires system-wide literacy improvement across grades and teachers"
-        }
-    elif "career readiness" in themes:
-        lfa_template = {
+        },
+        "priority": 20
+    },
+    {
+        "rule_id": "lfa-career-readiness",
+        "kind": "lfa_template",
+        "when": {"themes": ["career readiness"]},
+        "then": {
             "template_key": "Youth_Career_Pathways",
             "rationale": "Career readiness needs multi-actor coordination and long-term outcomes"
-        }
-    else:
-        lfa_template = {
-            "template_key": "Education_Improvement_Generic",
-            "rationale": "Suitable for multi-theme education interventions"
-        }
-
-    # ---- PROGRAM PATTERNS ----
-    patterns = []
-
-    if "fln" in themes:
-        patterns.append({
+        },
+        "priority": 10
+    },
+    {
+        "rule_id": "lfa-generic",
+        "kind": "lfa_template",
+        "then": GENERIC_LFA_RECOMMENDATION,
+        "priority": 0
+    },
+    {
+        "rule_id": "pattern-fln-coaching",
+        "kind": "program_pattern",
+        "when": {"themes": ["fln"]},
+        "then": {
             "pattern_name": "Teacher Coaching + Classroom Observation",
             "relevance_reason": "Improves instructional quality and student literacy outcomes"
-        })
-
-    if maturity == "startup":
-        patterns.append({
+        },
+        "priority": 10
+    },
+    {
+        "rule_id": "pattern-startup-pilot",
+        "kind": "program_pattern",
+        "when": {"maturity_levels": ["startup"]},
+        "then": {
             "pattern_name": "Pilot → Iterate → Scale",
             "relevance_reason": "Minimizes risk and improves learning before expansion"
-        })
+        },
+        "priority": 5
+    }
+]
 
-    # ---- STATE-SPECIFIC CHALLENGES (DB-DRIVEN) ----
-    challenges = []
+CONTEXT_RULE_OUTPUTS = {
+    "lfa_template": LFARecommendation,
+    "program_pattern": ProgramPatternSuggestion
+}
 
-    state_rules = state_context_rules_collection.find_one({"state": geography})
+# (rule condition field, profile attribute key)
+CONTEXT_RULE_ATTRIBUTES = [
+    ("themes", "themes"),
+    ("maturity_levels", "maturity"),
+    ("states", "state")
+]
 
-    if state_rules:
-        for item in state_rules.get("education_challenges", []):
-            challenges.append({
-                "challenge": item["challenge"],
-                "reason": item["reason"]
-            })
+class ContextRuleTable:
 
-    return {
-        "lfa_recommendation": lfa_template,
-        "similar_program_patterns": patterns,
-        "potential_challenges": challenges
-    }
+    def __init__(self, rules: List[ContextRule]):
 
-# AI CONTEXT ANALYSIS ENDPOINT
-@app.post("/organization/{org_id}/ai-context", response_model=AIContextAnalysisResponse)
-def generate_ai_context(org_id: str):
+        # Sorted once so candidate evaluation can keep rule order
+        self.rules = sorted(
+            (rule for rule in rules if rule.enabled),
+            key=lambda rule: -rule.priority
+        )
+        self.index: Dict[str, Dict[str, set]] = {attribute: {} for _, attribute in CONTEXT_RULE_ATTRIBUTES}
+        self.unconstrained: Dict[str, set] = {attribute: set() for _, attribute in CONTEXT_RULE_ATTRIBUTES}
 
-    if not ObjectId.is_valid(org_id):
-        raise HTTPException(status_code=400, detail="Invalid organization ID")
+        for position, rule in enumerate(self.rules):
+            # Fail at load time rather than on a profile that happens to match
+            CONTEXT_RULE_OUTPUTS[rule.kind](**rule.then)
 
-    profile = organization_profiles_collection.find_one({"_id": ObjectId(org_id)})
+            for field, attribute in CONTEXT_RULE_ATTRIBUTES:
+                values = getattr(rule.when, field)
+                if not values:
+                    self.unconstrained[attribute].add(position)
+                for value in values:
+                    key = normalize_place(value) if attribute == "state" else value.lower()
+                    self.index[attribute].setdefault(key, set()).add(position)
 
-    if not profile:
-        raise HTTPException(status_code=404, detail="Organization not found")
+    def candidates(self, attributes: Dict[str, List[str]]) -> List[int]:
 
-    analysis = analyze_context(profile)
+        candidates = None
 
-    response_doc = {
-        "organization_id": str(profile["_id"]),
-        "lfa_recommendation": analysis["lfa_recommendation"],
-        "similar_program_patterns": analysis["similar_program_patterns"],
-        "potential_challenges": analysis["potential_challenges"],
-        "generated_at": utc_now()
-    }
+        for _, attribute in CONTEXT_RULE_ATTRIBUTES:
+            matching = set(self.unconstrained[attribute])
+            for value in attributes[attribute]:
+                matching |= self.index[attribute].get(value, set())
 
-    ai_context_analysis_collection.insert_one(response_doc)
+            candidates = matching if candidates is None else candidates & matching
+            if not candidates:
+                return []
 
-    return response_doc
+        return sorted(candidates)
 
-# -------------------- PROBLEM STATEMENT Creation --------------------
-class ProblemEvidence(BaseModel):
-    source: Optional[str] = Field(None, example="ASER 2023")
-    description: str = Field(..., example="Only 42% of Grade 3 students can read a Grade 2 text")
-    year: Optional[int] = Field(None, ge=2000)
+    @traced("context_rules.evaluate")
+    def evaluate(self, attributes: Dict[str, List[str]], schools: Optional[int]) -> Dict[str, List[Dict[str, str]]]:
 
-class ProblemStatementCreate(BaseModel):
-    organization_id: str
-    core_problem: str = Field(..., min_length=20)
-    affected_stakeholders: List[str] = Field(
-        ..., example=["Students", "Teachers"]
-    )
-    evidence: Optional[List[ProblemEvidence]]
+        matches = {kind: [] for kind in CONTEXT_RULE_OUTPUTS}
 
-class ProblemStatementDB(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
-    organization_id: str
-    core_problem: str
-    affected_stakeholders: List[str]
-    evidence: Optional[List[ProblemEvidence]]
-    created_at: datetime
-    updated_at: datetime
+        for position in self.candidates(attributes):
+            rule = self.rules[position]
 
-    class Config:
-        allow_population_by_field_name = True
-        json_encoders = {ObjectId: str}
+            if rule.when.min_schools is not None and (schools is None or schools < rule.when.min_schools):
+                continue
+            if rule.when.max_schools is not None and (schools is None or schools > rule.when.max_schools):
+                continue
 
-# Problem Statement Creation Endpoint
-@app.post("/problem-statement", response_model=ProblemStatementDB)
-def create_problem_statement(payload: ProblemStatementCreate):
+            matches[rule.kind].append(rule.then)
 
-    # Validate organization exists
-    if not ObjectId.is_valid(payload.organization_id):
-        raise HTTPException(status_code=400, detail="Invalid organization ID")
+        return matches
 
-    org = organization_profiles_collection.find_one(
-        {"_id": ObjectId(payload.organization_id)}
-    )
+_context_rules_cache: Dict[str, Any] = {"version": None, "checked_at": 0.0, "table": None}
+_context_rules_lock = threading.Lock()
 
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
+def context_rules_version():
+    latest = context_rules_collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+    return (context_rules_collection.count_documents({}), latest["updated_at"] if latest else None)
 
-    doc = payload.dict()
-    doc["created_at"] = utc_now()
+def load_context_rule_table(force: bool = False) -> ContextRuleTable:
+
+    now = time.monotonic()
+
+    with _context_rules_lock:
+        if (
+            not force
+            and _context_rules_cache["table"] is not None
+            and now - _context_rules_cache["checked_at"] < REFERENCE_VERSION_TTL_SECONDS
+        ):
+            return _context_rules_cache["table"]
+
+        version = context_rules_version()
+        _context_rules_cache["checked_at"] = now
+
+        if force or version != _context_rules_cache["version"]:
+            docs = list(context_rules_collection.find({}, {"_id": 0, "updated_at": 0})) or DEFAULT_CONTEXT_RULES
+            _context_rules_cache["table"] = ContextRuleTable([ContextRule(**doc) for doc in docs])
+            _context_rules_cache["version"] = version
+
+        return _context_rules_cache["table"]
+
+# CONTEXT RULES API
+@app.get("/context-rules")
+def list_context_rules():
+    table = load_context_rule_table()
+    return {"count": len(table.rules), "rules": [rule.dict() for rule in table.rules]}
+
+# CONTEXT RULES REPLACE API
+@app.put("/context-rules", dependencies=[Depends(require_admin)])
+def replace_context_rules(payload: ContextRuleSetRequest):
+
+    try:
+        ContextRuleTable(payload.rules)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    now = utc_now()
+
+    if payload.rules:
+        context_rules_collection.bulk_write([
+            ReplaceOne({"rule_id": rule.rule_id}, {**rule.dict(), "updated_at": now}, upsert=True)
+            for rule in payload.rules
+        ], ordered=False)
+    context_rules_collection.delete_many({"rule_id": {"$nin": [rule.rule_id for rule in payload.rules]}})
+
+    table = load_context_rule_table(force=True)
+
+    return {"message": "Context rules replaced", "count": len(table.rules)}
+
+# CONTEXT RULES RELOAD API
+@app.post("/context-rules/reload", dependencies=[Depends(require_admin)])
+def reload_context_rules():
+    table = load_context_rule_table(force=True)
+    return {"message": "Context rules reloaded", "count": len(table.rules)}
+
+# AI CONTEXT ENGINE
+def analyze_context(profile: Dict[str, Any]) -> Dict[str, Any]:
+
+    geography = profile["geography"]
+    reach = profile.get("reach_metrics") or {}
+
+    state = resolve_geography(geography["state"])["state"] or geography["state"]
+
+    matches = load_context_rule_table().evaluate(
+        {
+            "themes": [t.lower() for t in profile["thematic_focus"]],
+            "maturity": [profile["maturity_level"].lower()],
+            "state": [normalize_place(state)]
+        },
+        reach.get("schools")
+    )
+
+    # ---- LFA TEMPLATE RECOMMENDATION ----
+    lfa_template = matches["lfa_template"][0] if matches["lfa_template"] else GENERIC_LFA_RECOMMENDATION
+
+    # ---- PROGRAM PATTERNS ----
+    patterns = matches["program_pattern"]
+
+    # ---- GEOGRAPHY-SPECIFIC CHALLENGES (block -> district -> state) ----
+    location = resolve_geography(
+        geography["state"],
+        geography.get("district"),
+        geography.get("block")
+    )
+
+    challenges = [
+        {
+            "challenge": item["challenge"],
+            "reason": item["reason"] or f"Reported for {location[item['level']]} {item['level']}"
+        }
+        for item in location["challenges"]
+    ]
+
+    return {
+        "lfa_recommendation": lfa_template,
+        "similar_program_patterns": patterns,
+        "potential_challenges": challenges
+    }
+
+# AI CONTEXT ANALYSIS ENDPOINT
+@app.post("/organization/{org_id}/ai-context", response_model=AIContextAnalysisResponse)
+def generate_ai_context(org_id: str):
+
+    if not ObjectId.is_valid(org_id):
+        raise HTTPException(status_code=400, detail="Invalid organization ID")
+
+    def run_analysis():
+
+        profile = organization_profiles_collection.find_one({"_id": ObjectId(org_id)})
+
+        if not profile:
+            raise HTTPException(status_code=404, detail="Organization not found")
+
+        analysis = analyze_context(profile)
+
+        response_doc = {
+            "organization_id": str(profile["_id"]),
+            "lfa_recommendation": analysis["lfa_recommendation"],
+            "similar_program_patterns": analysis["similar_program_patterns"],
+            "potential_challenges": analysis["potential_challenges"],
+            "generated_at": utc_now()
+        }
+
+        ai_context_analysis_collection.insert_one(response_doc)
+
+        return response_doc
+
+    return analysis_single_flight.run(
+        request_fingerprint("ai-context", org_id),
+        run_analysis
+    )
+
+# -------------------- PROBLEM STATEMENT Creation --------------------
+class ProblemEvidence(BaseModel):
+    source: Optional[str] = Field(None, example="ASER 2023")
+    description: str = Field(..., example="Only 42% of Grade 3 students can read a Grade 2 text")
+    year: Optional[int] = Field(None, ge=2000)
+
+class ProblemStatementCreate(BaseModel):
+    organization_id: str
+    core_problem: str = Field(..., min_length=20)
+    affected_stakeholders: List[str] = Field(
+        ..., example=["Students", "Teachers"]
+    )
+    evidence: Optional[List[ProblemEvidence]]
+
+class ProblemStatementDB(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    organization_id: str
+    core_problem: str
+    affected_stakeholders: List[str]
+    evidence: Optional[List[ProblemEvidence]]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        allow_population_by_field_name = True
+        json_encoders = {ObjectId: str}
+
+# Problem Statement Creation Endpoint
+@app.post("/problem-statement", response_model=ProblemStatementDB)
+def create_problem_statement(payload: ProblemStatementCreate):
+
+    # Validate organization exists
+    if not ObjectId.is_valid(payload.organization_id):
+        raise HTTPException(status_code=400, detail="Invalid organization ID")
+
+    org = organization_profiles_collection.find_one(
+        {"_id": ObjectId(payload.organization_id)}
+    )
+
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    doc = payload.dict()
+    doc["created_at"] = utc_now()
     doc["updated_at"] = utc_now()
 
     result = problem_statements_collection.insert_one(doc)
     doc["_id"] = result.inserted_id
 
+    index_search_artifact(payload.organization_id, "problem_statement", doc)
+    index_problem_statement(doc)
+
+    update_lfa_snapshot(payload.organization_id, {
+        "problem_definition": {
+            "core_problem": payload.core_problem,
+            "affected_group": payload.affected_stakeholders
+        }
+    })
+
     return doc
 
 # Problem Statement Retrieval Endpoint
 @app.get("/organization/{org_id}/problem-statements", response_model=List[ProblemStatementDB])
-def get_problem_statements(org_id: str):
+def get_problem_statements(org_id: str, request: Request, response: Response):
 
     if not ObjectId.is_valid(org_id):
         raise HTTPException(status_code=400, detail="Invalid organization ID")
 
+    not_modified = conditional_get(
+        request,
+        response,
+        response_etag(request, latest_update(problem_statements_collection, {"organization_id": org_id}))
+    )
+    if not_modified:
+        return not_modified
+
     statements = list(
         problem_statements_collection.find(
             {"organization_id": org_id}
@@ -348,6 +1292,221 @@ def get_problem_statements(org_id: str):
 
     return statements
 
+# -------------------- PROBLEM SIMILARITY INDEX --------------------
+# A search.TextVectorIndex over every problem statement and ecosystem
+# pattern. IDF is fixed at build time; new statements are appended with it.
+# The index is persisted to disk and caught up from Mongo (by _id) on load
+# and whenever the collection version moves.
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", "/tmp/problem_similarity_index.npz")
+PROBLEM_DUPLICATE_THRESHOLD = float(os.getenv("PROBLEM_DUPLICATE_THRESHOLD", "0.85"))
+ECOSYSTEM_PATTERN_MIN_SIMILARITY = float(os.getenv("ECOSYSTEM_PATTERN_MIN_SIMILARITY", "0.2"))
+
+_problem_similarity = {"index": None, "meta": None, "dirty": False}
+_problem_similarity_lock = threading.Lock()
+
+def problem_entry(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "kind": "problem",
+        "ref_id": str(doc["_id"]),
+        "organization_id": doc.get("organization_id")
+    }
+
+def build_problem_similarity_index():
+
+    patterns = list(ecosystem_patterns_collection.find({}, {"core_problem_pattern": 1, "theme": 1}))
+    problems = list(
+        problem_statements_collection.find({}, {"core_problem": 1, "organization_id": 1}).sort("_id", 1)
+    )
+
+    texts = [p.get("core_problem_pattern", "") for p in patterns] + [p.get("core_problem", "") for p in problems]
+    entries = [
+        {"kind": "pattern", "ref_id": str(p["_id"]), "theme": p.get("theme")}
+        for p in patterns
+    ] + [problem_entry(p) for p in problems]
+
+    index = TextVectorIndex.build(texts, entries)
+    meta = {
+        "dimensions": SIMILARITY_DIMENSIONS,
+        "patterns_version": collection_version(ecosystem_patterns_collection),
+        "problems_version": collection_version(problem_statements_collection),
+        "last_problem_id": str(problems[-1]["_id"]) if problems else None
+    }
+
+    return index, meta
+
+def catch_up_problem_similarity_index(index: TextVectorIndex, meta: Dict[str, Any]):
+
+    query = {}
+    if meta["last_problem_id"]:
+        query["_id"] = {"$gt": ObjectId(meta["last_problem_id"])}
+
+    problems = list(
+        problem_statements_collection.find(query, {"core_problem": 1, "organization_id": 1}).sort("_id", 1)
+    )
+
+    if problems:
+        index.add([p.get("core_problem", "") for p in problems], [problem_entry(p) for p in problems])
+        meta["last_problem_id"] = str(problems[-1]["_id"])
+
+    meta["problems_version"] = collection_version(problem_statements_collection)
+
+    return len(problems)
+
+def get_problem_similarity_index() -> TextVectorIndex:
+
+    with _problem_similarity_lock:
+        index, meta = _problem_similarity["index"], _problem_similarity["meta"]
+
+        if index is None and os.path.exists(SIMILARITY_INDEX_PATH):
+            try:
+                index, meta = TextVectorIndex.load(SIMILARITY_INDEX_PATH)
+            except Exception:
+                index, meta = None, None
+
+        if (
+            index is None
+            or meta["dimensions"] != SIMILARITY_DIMENSIONS
+            or meta["patterns_version"] != collection_version(ecosystem_patterns_collection)
+        ):
+            index, meta = build_problem_similarity_index()
+            _problem_similarity["dirty"] = True
+
+        if meta["problems_version"] != collection_version(problem_statements_collection):
+            if catch_up_problem_similarity_index(index, meta):
+                _problem_similarity["dirty"] = True
+
+        _problem_similarity["index"], _problem_similarity["meta"] = index, meta
+
+    return index
+
+def index_problem_statement(doc: Dict[str, Any]):
+
+    with _problem_similarity_lock:
+        index, meta = _problem_similarity["index"], _problem_similarity["meta"]
+
+        # Not loaded yet: the first lookup catches up from Mongo
+        if index is None:
+            return
+
+        index.add([doc["core_problem"]], [problem_entry(doc)])
+        # Statements can land out of _id order; never move the catch-up point back
+        if meta["last_problem_id"] is None or doc["_id"] > ObjectId(meta["last_problem_id"]):
+            meta["last_problem_id"] = str(doc["_id"])
+        _problem_similarity["dirty"] = True
+
+def save_problem_similarity_index():
+
+    with _problem_similarity_lock:
+        index, meta = _problem_similarity["index"], _problem_similarity["meta"]
+        if index is None or not _problem_similarity["dirty"]:
+            return
+        meta = dict(meta)
+        _problem_similarity["dirty"] = False
+
+    index.save(SIMILARITY_INDEX_PATH, meta)
+
+@on_startup
+def load_problem_similarity_index():
+    get_problem_similarity_index()
+    save_problem_similarity_index()
+
+@on_shutdown
+def persist_problem_similarity_index():
+    save_problem_similarity_index()
+
+def text_similarity(a: str, b: str) -> float:
+    vectors = get_problem_similarity_index().vectorize([a, b])
+    return float(vectors[0] @ vectors[1])
+
+def find_similar_problems(
+    text: str,
+    organization_id: Optional[str] = None,
+    limit: int = 5,
+    min_score: float = 0.1
+):
+    """
+    Nearest ecosystem patterns, similar statements from other organizations
+    and near-duplicates within the organization's own statements.
+    """
+    scores, entries = get_problem_similarity_index().scores(text)
+    order = np.argsort(-scores)
+
+    results = {"patterns": [], "similar_problems": [], "possible_duplicates": []}
+
+    for i in order:
+        score = float(scores[i])
+        if score < min_score:
+            break
+
+        entry = entries[i]
+        hit = {**entry, "score": round(score, 4)}
+
+        if entry["kind"] == "pattern":
+            bucket = "patterns"
+        elif organization_id and entry["organization_id"] == organization_id:
+            if score < PROBLEM_DUPLICATE_THRESHOLD:
+                continue
+            bucket = "possible_duplicates"
+        else:
+            bucket = "similar_problems"
+
+        if len(results[bucket]) < limit:
+            results[bucket].append(hit)
+
+        if all(len(hits) >= limit for hits in results.values()):
+            break
+
+    return results
+
+class SimilarProblemsRequest(BaseModel):
+    text: str = Field(..., min_length=10)
+    organization_id: Optional[str] = None
+    limit: int = Field(5, ge=1, le=50)
+    min_score: float = Field(0.1, ge=0, le=1)
+
+# PROBLEM SIMILARITY API
+@app.post("/problem-statements/similar")
+def similar_problem_statements(payload: SimilarProblemsRequest):
+    return find_similar_problems(
+        payload.text,
+        payload.organization_id,
+        payload.limit,
+        payload.min_score
+    )
+
+# PROBLEM DUPLICATES API
+@app.get("/organization/{org_id}/problem-statements/duplicates")
+def duplicate_problem_statements(
+    org_id: str,
+    threshold: float = Query(PROBLEM_DUPLICATE_THRESHOLD, ge=0, le=1)
+):
+
+    matrix, entries = get_problem_similarity_index().snapshot()
+
+    mask = np.array([
+        e["kind"] == "problem" and e["organization_id"] == org_id
+        for e in entries
+    ], dtype=bool)
+
+    if not mask.any():
+        return {"organization_id": org_id, "pairs": []}
+
+    ids = [e["ref_id"] for e, keep in zip(entries, mask) if keep]
+    vectors = matrix[mask]
+    similarity = vectors @ vectors.T
+
+    # Each unordered pair once; masking with triu would let threshold=0 match the zeroed half
+    upper_a, upper_b = np.triu_indices(len(ids), k=1)
+    hits = similarity[upper_a, upper_b] >= threshold
+
+    pairs = [
+        {"problem_ids": [ids[a], ids[b]], "score": round(float(similarity[a, b]), 4)}
+        for a, b in zip(upper_a[hits], upper_b[hits])
+    ]
+    pairs.sort(key=lambda pair: pair["score"], reverse=True)
+
+    return {"organization_id": org_id, "pairs": pairs}
+
 # --------------------AI Problem Refinement Assistant --------------------
 class ProblemIssue(BaseModel):
     issue_type: str  # vague, solution-biased, missing-actor, etc.
@@ -531,6 +1690,8 @@ def ai_refine_problem_statement(problem_id: str):
 
     problem_refinements_collection.insert_one(response_doc)
 
+    record_issue_type_rollups(problem["organization_id"], analysis["identified_issues"])
+
     return response_doc
 
 # -------------------- Problem Tree Builder --------------------
@@ -538,6 +1699,7 @@ class ProblemTreeRequest(BaseModel):
     organization_id: str
     state: str
     district: str
+    block: Optional[str] = None
     theme: str
     refined_problem_statement: str
     suggested_root_causes: List[Dict[str, str]]
@@ -558,18 +1720,24 @@ def get_similar_program_patterns(theme: str):
         {"_id": 0}
     )
 
-def get_district_challenges(state: str, district: str):
-    record = district_challenges_collection.find_one(
-        {"state": state.lower(), "district": district.lower()},
-        {"_id": 0}
-    )
-    return record["challenges"] if record else []
+def get_district_challenges(state: str, district: str, block: Optional[str] = None):
+    """
+    The district record's challenges as stored, preceded by the block's when one
+    is given. State-level challenges are not included.
+    """
+    challenges = []
+
+    for level, node in reversed(geography_path(state, district, block)):
+        if level != "state":
+            challenges.extend(node.stored_challenges)
+
+    return challenges
 
 def validate_problem_against_ecosystem(problem_text: str, pattern: Dict[str, Any]):
     feedback = []
 
     if pattern:
-        if pattern["core_problem_pattern"].lower() not in problem_text.lower():
+        if text_similarity(problem_text, pattern["core_problem_pattern"]) < ECOSYSTEM_PATTERN_MIN_SIMILARITY:
             feedback.append(
                 "Your problem statement deviates from common ecosystem patterns. Ensure this is intentional."
             )
@@ -653,7 +1821,7 @@ def mermaid_to_image_url(mermaid_code: str, format: str = "png") -> str:
 def generate_problem_tree(payload: ProblemTreeRequest):
 
     ecosystem_pattern = get_similar_program_patterns(payload.theme)
-    district_challenges = get_district_challenges(payload.state, payload.district)
+    district_challenges = get_district_challenges(payload.state, payload.district, payload.block)
 
     problem_tree = build_problem_tree_structure(
         payload.refined_problem_statement,
@@ -688,6 +1856,14 @@ def generate_problem_tree(payload: ProblemTreeRequest):
 
     problem_tree_collection.insert_one(record)
 
+    update_lfa_snapshot(payload.organization_id, {
+        "problem_tree": {
+            "root_causes": [c["label"] for c in problem_tree["causes"]],
+            "core_problem": problem_tree["core_problem"]["label"],
+            "effects": [e["label"] for e in problem_tree["effects"]]
+        }
+    })
+
     return {
     "problem_tree": problem_tree,
     "mermaid_diagram": mermaid_diagram,
@@ -837,6 +2013,14 @@ def create_student_outcome(payload: StudentOutcomeRequest):
     }
 
     student_outcomes_collection.insert_one(record)
+    index_search_artifact(payload.organization_id, "outcome", record)
+
+    record_smart_score_rollup(payload.theme, smart_validation["smart_score"])
+
+    update_lfa_snapshot(
+        payload.organization_id,
+        append={"outcomes.smart_outcomes": [payload.outcome_statement]}
+    )
 
     return {
         "smart_validation": smart_validation,
@@ -857,6 +2041,183 @@ class MethodologyFilterRequest(BaseModel):
 
 class MethodologyResponse(BaseModel):
     methodologies: List[Dict[str, Any]]
+    component_library: List[Dict[str, Any]]
+
+# Fields of a methodology_library document, as seeded and as read by the
+# selector; `fields=` projections are validated against these names.
+class MethodologyRecord(BaseModel):
+    name: str
+    theme: str
+    description: Optional[str] = None
+    components: List[str] = []
+    geographies: List[str] = []
+    budget_range_lakhs: List[float] = []
+    scale_range_schools: Optional[List[int]] = None
+
+METHODOLOGY_VIEWS = {
+    "summary": ["name", "theme", "description"]
+}
+
+# Derived, indexed fields maintained alongside budget_range_lakhs / scale_range_schools
+METHODOLOGY_DERIVED_FIELDS = {
+    "budget_min_lakhs": 0,
+    "budget_max_lakhs": 0,
+    "scale_min_schools": 0,
+    "scale_max_schools": 0
+}
+
+# "memory" serves filters from the cached interval index, "db" pushes them into Mongo
+METHODOLOGY_FILTER_MODE = os.getenv("METHODOLOGY_FILTER_MODE", "memory")
+
+def backfill_methodology_ranges():
+
+    methodology_library_collection.update_many(
+        {"budget_range_lakhs": {"$exists": True}, "budget_min_lakhs": {"$exists": False}},
+        [{"$set": {
+            "budget_min_lakhs": {"$arrayElemAt": ["$budget_range_lakhs", 0]},
+            "budget_max_lakhs": {"$arrayElemAt": ["$budget_range_lakhs", 1]}
+        }}]
+    )
+
+    methodology_library_collection.update_many(
+        {"scale_range_schools": {"$exists": True}, "scale_min_schools": {"$exists": False}},
+        [{"$set": {
+            "scale_min_schools": {"$arrayElemAt": ["$scale_range_schools", 0]},
+            "scale_max_schools": {"$arrayElemAt": ["$scale_range_schools", 1]}
+        }}]
+    )
+
+def build_methodology_query(theme: str, state: str, scale: int, budget: int):
+
+    return {
+        "theme": theme,
+        "geographies": {"$in": [state.lower(), "all"]},
+        "budget_min_lakhs": {"$lte": budget},
+        "budget_max_lakhs": {"$gte": budget},
+        # Methodologies without a scale range fit any scale
+        "$and": [
+            {"$or": [{"scale_min_schools": None}, {"scale_min_schools": {"$lte": scale}}]},
+            {"$or": [{"scale_max_schools": None}, {"scale_max_schools": {"$gte": scale}}]}
+        ]
+    }
+
+def scale_fits(methodology: Dict[str, Any], scale: int) -> bool:
+
+    scale_range = methodology.get("scale_range_schools")
+
+    if not scale_range:
+        return True
+
+    return scale_range[0] <= scale <= scale_range[1]
+
+class IntervalIndex:
+    """
+    Centered interval tree over (low, high, position) tuples.
+    stab(x) returns the positions of all intervals containing x in O(log n + k).
+    """
+
+    def __init__(self, intervals):
+
+        points = sorted(p for low, high, _ in intervals for p in (low, high))
+        self.center = points[len(points) // 2]
+
+        here, left, right = [], [], []
+        for interval in intervals:
+            if interval[1] < self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+
+        self.by_low = sorted(here, key=lambda iv: iv[0])
+        self.by_high = sorted(here, key=lambda iv: iv[1], reverse=True)
+        self.left = IntervalIndex(left) if left else None
+        self.right = IntervalIndex(right) if right else None
+
+    def stab(self, x) -> List[int]:
+
+        positions = []
+        node = self
+
+        while node:
+            if x < node.center:
+                for low, _, pos in node.by_low:
+                    if low > x:
+                        break
+                    positions.append(pos)
+                node = node.left
+            elif x > node.center:
+                for _, high, pos in node.by_high:
+                    if high < x:
+                        break
+                    positions.append(pos)
+                node = node.right
+            else:
+                positions.extend(pos for _, _, pos in node.by_low)
+                break
+
+        return positions
+
+class MethodologyIndex:
+    """
+    In-memory view of one theme's methodologies: an interval index over budget
+    ranges per geography, plus the component -> methodology index.
+    """
+
+    def __init__(self, methodologies: List[Dict[str, Any]]):
+
+        self.methodologies = methodologies
+        self.component_index = generate_component_library(methodologies)
+
+        by_geography = {}
+        for pos, m in enumerate(methodologies):
+            min_budget, max_budget = m["budget_range_lakhs"]
+            for geography in m.get("geographies", []):
+                by_geography.setdefault(geography, []).append((min_budget, max_budget, pos))
+
+        self.budget_trees = {
+            geography: IntervalIndex(intervals)
+            for geography, intervals in by_geography.items()
+        }
+
+    def query(self, state: str, scale: int, budget: int) -> List[Dict[str, Any]]:
+
+        positions = set()
+
+        for geography in (state.lower(), "all"):
+            tree = self.budget_trees.get(geography)
+            if tree:
+                positions.update(tree.stab(budget))
+
+        return [
+            self.methodologies[pos]
+            for pos in sorted(positions)
+            if scale_fits(self.methodologies[pos], scale)
+        ]
+
+# Methodology index per theme, rebuilt only when methodology_library changes
+_methodology_index_cache = VersionedLRU(THEME_CACHE_MAX_ENTRIES)
+
+def get_methodology_index(theme: str) -> MethodologyIndex:
+
+    version = collection_version(methodology_library_collection)
+    index = _methodology_index_cache.get(theme, version)
+
+    if index is not None:
+        return index
+
+    methodologies = list(
+        methodology_library_collection.find(
+            {"theme": theme},
+            {"_id": 0, **METHODOLOGY_DERIVED_FIELDS}
+        )
+    )
+
+    index = MethodologyIndex(methodologies)
+    _methodology_index_cache.put(theme, version, index)
+
+    return index
 
 def filter_methodologies(
     theme: str,
@@ -865,25 +2226,17 @@ def filter_methodologies(
     budget: int
 ):
 
-    results = []
-
-    cursor = methodology_library_collection.find(
-        {"theme": theme},
-        {"_id": 0}
-    )
-
-    for m in cursor:
-        geo_match = state.lower() in m["geographies"] or "all" in m["geographies"]
-
-        min_budget, max_budget = m["budget_range_lakhs"]
-        budget_match = min_budget <= budget <= max_budget
-
-        if geo_match and budget_match:
-            results.append(m)
+    if METHODOLOGY_FILTER_MODE == "db":
+        return list(
+            methodology_library_collection.find(
+                build_methodology_query(theme, state, scale, budget),
+                {"_id": 0, **METHODOLOGY_DERIVED_FIELDS}
+            )
+        )
 
-    return results
+    return get_methodology_index(theme).query(state, scale, budget)
 
-def generate_component_library(methodologies: List[Dict[str, Any]]):
+def generate_component_library(methodologies: List[Dict[str, Any]]) -> Dict[str, List[str]]:
 
     component_map = {}
 
@@ -891,25 +2244,56 @@ def generate_component_library(methodologies: List[Dict[str, Any]]):
         for component in m["components"]:
             component_map.setdefault(component, []).append(m["name"])
 
-    return [
-        {
-            "component": c,
-            "used_in": sources
-        }
-        for c, sources in component_map.items()
-    ]
+    return component_map
+
+def get_theme_component_index(theme: str) -> Dict[str, List[str]]:
+    return get_methodology_index(theme).component_index
+
+def select_component_library(
+    component_index: Dict[str, List[str]],
+    methodologies: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+
+    selected = {m["name"] for m in methodologies}
+    library = []
+
+    for component, sources in component_index.items():
+        used_in = [name for name in sources if name in selected]
+        if used_in:
+            library.append({
+                "component": component,
+                "used_in": used_in
+            })
+
+    return library
 
 @app.get("/methodologies")
-def get_all_methodologies():
+def get_all_methodologies(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    view: Optional[str] = None
+):
+
+    projection = build_projection(fields, view, MethodologyRecord, METHODOLOGY_VIEWS)
+
+    not_modified = conditional_get(
+        request,
+        response,
+        response_etag(request, collection_version(methodology_library_collection)),
+        CACHE_POLICIES["reference"]
+    )
+    if not_modified:
+        return not_modified
 
     methodologies = list(
-        methodology_library_collection.find({}, {"_id": 0})
+        methodology_library_collection.find({}, projection)
     )
 
-    return {
+    return fast_json_response({
         "count": len(methodologies),
         "methodologies": methodologies
-    }
+    }, response)
 
 # METHODOLOGY SELECTION API
 @app.post("/methodologies", response_model=MethodologyResponse)
@@ -922,16 +2306,15 @@ def get_methodologies(payload: MethodologyFilterRequest):
         payload.budget_lakhs
     )
 
-    component_library = generate_component_library(methodologies)
+    # The library is shared by every methodology, so it is returned once
+    component_library = select_component_library(
+        get_theme_component_index(payload.theme),
+        methodologies
+    )
 
     return {
-        "methodologies": [
-            {
-                **m,
-                "available_components": component_library
-            }
-            for m in methodologies
-        ]
+        "methodologies": methodologies,
+        "component_library": component_library
     }
 
 class SelectMethodologyRequest(BaseModel):
@@ -939,21 +2322,297 @@ class SelectMethodologyRequest(BaseModel):
     selected_methodology_ids: List[str]
     custom_components: List[str]
 
-# METHODOLOGY SAVE SELECTION API
-@app.post("/methodologies/select")
-def save_selected_methodology(payload: SelectMethodologyRequest):
-
+def find_selected_methodologies(selected: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Methodology documents by the id or name they were selected with. Listings
+    only expose names, so both are accepted.
+    """
+    object_ids = [ObjectId(value) for value in selected if ObjectId.is_valid(value)]
+
+    found = {}
+    for doc in methodology_library_collection.find(
+        {"$or": [{"_id": {"$in": object_ids}}, {"name": {"$in": selected}}]},
+        {"name": 1}
+    ):
+        found[str(doc["_id"])] = doc
+        found.setdefault(doc["name"], doc)
+
+    return found
+
+# METHODOLOGY SAVE SELECTION API
+@app.post("/methodologies/select")
+def save_selected_methodology(payload: SelectMethodologyRequest):
+
+    found = find_selected_methodologies(payload.selected_methodology_ids)
+    unknown = [value for value in payload.selected_methodology_ids if value not in found]
+
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown methodologies: {', '.join(unknown)}")
+
+    selected = [found[value] for value in payload.selected_methodology_ids]
+
     record = {
         "organization_id": payload.organization_id,
-        "selected_methodology_ids": payload.selected_methodology_ids,
+        "selected_methodology_ids": [str(doc["_id"]) for doc in selected],
         "custom_components": payload.custom_components,
         "created_at": datetime.utcnow()
     }
 
     selected_methodologies_collection.insert_one(record)
 
+    update_lfa_snapshot(payload.organization_id, {
+        "methodology": {
+            "interventions": [doc["name"] for doc in selected] + payload.custom_components
+        }
+    })
+
     return {"status": "Methodologies saved successfully"}
 
+# -------------------- Methodology Recommendation Engine --------------------
+RECOMMENDATION_WEIGHTS = {
+    "budget_fit": 0.35,
+    "geography_specificity": 0.175,
+    "scale_fit": 0.175,
+    "component_overlap": 0.30
+}
+
+NEUTRAL_FACTOR_SCORE = 0.5
+
+class MethodologyRecommendationRequest(BaseModel):
+    organization_id: str
+    theme: str
+    state: str
+    scale_schools: int
+    budget_lakhs: int
+    top_k: int = Field(5, ge=1, le=50)
+
+class MethodologyRecommendation(BaseModel):
+    name: str
+    score: float
+    factor_scores: Dict[str, float]
+    explanations: List[str]
+    methodology: Dict[str, Any]
+
+class MethodologyRecommendationResponse(BaseModel):
+    recommendations: List[MethodologyRecommendation]
+
+class MethodologyFeatures:
+    """
+    One theme's methodology library as NumPy feature matrices, so that every
+    candidate can be scored against a request in a single vectorized pass.
+    """
+
+    def __init__(self, methodologies: List[Dict[str, Any]]):
+
+        n = len(methodologies)
+        self.methodologies = methodologies
+        self.row_by_name = {m["name"]: i for i, m in enumerate(methodologies)}
+
+        self.budget_low = np.array([m["budget_range_lakhs"][0] for m in methodologies], dtype=float)
+        self.budget_high = np.array([m["budget_range_lakhs"][1] for m in methodologies], dtype=float)
+
+        scale_ranges = [m.get("scale_range_schools") or [np.nan, np.nan] for m in methodologies]
+        self.scale_low = np.array([r[0] for r in scale_ranges], dtype=float)
+        self.scale_high = np.array([r[1] for r in scale_ranges], dtype=float)
+
+        self.geography_vocab = {}
+        for m in methodologies:
+            for geography in m.get("geographies", []):
+                self.geography_vocab.setdefault(geography, len(self.geography_vocab))
+
+        self.geographies = np.zeros((n, len(self.geography_vocab)), dtype=bool)
+        for i, m in enumerate(methodologies):
+            for geography in m.get("geographies", []):
+                self.geographies[i, self.geography_vocab[geography]] = True
+
+        self.component_vocab = {}
+        for m in methodologies:
+            for component in m["components"]:
+                self.component_vocab.setdefault(component, len(self.component_vocab))
+
+        self.components = np.zeros((n, len(self.component_vocab)), dtype=np.float32)
+        for i, m in enumerate(methodologies):
+            for component in m["components"]:
+                self.components[i, self.component_vocab[component]] = 1.0
+        self.component_counts = np.maximum(self.components.sum(axis=1), 1.0)
+
+    def history_vector(self, components: List[str]) -> np.ndarray:
+
+        vector = np.zeros(len(self.component_vocab), dtype=np.float32)
+        for component in components:
+            col = self.component_vocab.get(component)
+            if col is not None:
+                vector[col] = 1.0
+        return vector
+
+    def score(self, state: str, scale: int, budget: int, history: np.ndarray):
+
+        n = len(self.methodologies)
+
+        # Budget: 1.0 at the middle of the range, falling to 0 at its edges
+        in_budget = (self.budget_low <= budget) & (budget <= self.budget_high)
+        half_width = np.maximum((self.budget_high - self.budget_low) / 2, 1e-9)
+        midpoint = (self.budget_high + self.budget_low) / 2
+        budget_fit = np.clip(1 - np.abs(budget - midpoint) / half_width, 0, 1)
+
+        # Geography: explicit state listing beats an "all" methodology
+        state_col = self.geography_vocab.get(state.lower())
+        all_col = self.geography_vocab.get("all")
+        specific = self.geographies[:, state_col] if state_col is not None else np.zeros(n, dtype=bool)
+        general = self.geographies[:, all_col] if all_col is not None else np.zeros(n, dtype=bool)
+        geography_fit = np.where(specific, 1.0, np.where(general, NEUTRAL_FACTOR_SCORE, 0.0))
+
+        # Scale: same shape as budget, neutral when no range is defined
+        has_scale = ~np.isnan(self.scale_low)
+        with np.errstate(invalid="ignore"):
+            in_scale = ~has_scale | ((self.scale_low <= scale) & (scale <= self.scale_high))
+            scale_half = np.maximum((self.scale_high - self.scale_low) / 2, 1e-9)
+            scale_mid = (self.scale_high + self.scale_low) / 2
+            scale_fit = np.where(
+                has_scale,
+                np.clip(1 - np.abs(scale - scale_mid) / scale_half, 0, 1),
+                NEUTRAL_FACTOR_SCORE
+            )
+
+        component_overlap = (self.components @ history) / self.component_counts
+
+        factors = {
+            "budget_fit": budget_fit,
+            "geography_specificity": geography_fit,
+            "scale_fit": scale_fit,
+            "component_overlap": component_overlap
+        }
+
+        total = sum(RECOMMENDATION_WEIGHTS[name] * values for name, values in factors.items())
+        eligible = in_budget & (specific | general) & in_scale
+
+        return np.where(eligible, total, -np.inf), factors
+
+# Feature matrices per theme, rebuilt only when the library changes
+_methodology_features_cache = VersionedLRU(THEME_CACHE_MAX_ENTRIES)
+
+def get_methodology_features(theme: str) -> MethodologyFeatures:
+
+    version = collection_version(methodology_library_collection)
+    features = _methodology_features_cache.get(theme, version)
+
+    if features is not None:
+        return features
+
+    features = MethodologyFeatures(get_methodology_index(theme).methodologies)
+    _methodology_features_cache.put(theme, version, features)
+
+    return features
+
+def get_component_history(organization_id: str, features: MethodologyFeatures) -> List[str]:
+
+    history = []
+    selected = []
+
+    for record in selected_methodologies_collection.find(
+        {"organization_id": organization_id},
+        {"_id": 0, "selected_methodology_ids": 1, "custom_components": 1}
+    ):
+        history.extend(record.get("custom_components", []))
+        selected.extend(record.get("selected_methodology_ids", []))
+
+    # Older records stored names; find_selected_methodologies accepts both
+    found = find_selected_methodologies(selected) if selected else {}
+
+    for value in selected:
+        row = features.row_by_name.get(found[value]["name"]) if value in found else None
+        if row is not None:
+            history.extend(features.methodologies[row]["components"])
+
+    return history
+
+def explain_recommendation(factor_scores: Dict[str, float]) -> List[str]:
+
+    explanations = []
+
+    if factor_scores["budget_fit"] >= 0.5:
+        explanations.append("Budget sits comfortably inside the methodology's range")
+    else:
+        explanations.append("Budget is close to the edge of the methodology's range")
+
+    if factor_scores["geography_specificity"] == 1.0:
+        explanations.append("Designed specifically for this state")
+    else:
+        explanations.append("General methodology applicable across states")
+
+    if factor_scores["scale_fit"] != NEUTRAL_FACTOR_SCORE:
+        if factor_scores["scale_fit"] >= 0.5:
+            explanations.append("Program scale matches the methodology's typical reach")
+        else:
+            explanations.append("Program scale is at the edge of the methodology's typical reach")
+
+    if factor_scores["component_overlap"] > 0:
+        explanations.append(
+            f"{round(factor_scores['component_overlap'] * 100)}% of components overlap with your earlier selections"
+        )
+
+    return explanations
+
+def recommend_methodologies(
+    organization_id: str,
+    theme: str,
+    state: str,
+    scale: int,
+    budget: int,
+    top_k: int
+):
+
+    features = get_methodology_features(theme)
+
+    if not features.methodologies:
+        return []
+
+    history = features.history_vector(get_component_history(organization_id, features))
+    scores, factors = features.score(state, scale, budget, history)
+
+    eligible = int(np.isfinite(scores).sum())
+    k = min(top_k, eligible)
+
+    if k == 0:
+        return []
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    recommendations = []
+
+    for row in top:
+        factor_scores = {
+            name: round(float(values[row]), 3)
+            for name, values in factors.items()
+        }
+        methodology = features.methodologies[row]
+
+        recommendations.append({
+            "name": methodology["name"],
+            "score": round(float(scores[row]), 4),
+            "factor_scores": factor_scores,
+            "explanations": explain_recommendation(factor_scores),
+            "methodology": methodology
+        })
+
+    return recommendations
+
+# METHODOLOGY RECOMMENDATION API
+@app.post("/methodologies/recommend", response_model=MethodologyRecommendationResponse)
+def get_methodology_recommendations(payload: MethodologyRecommendationRequest):
+
+    recommendations = recommend_methodologies(
+        payload.organization_id,
+        payload.theme,
+        payload.state,
+        payload.scale_schools,
+        payload.budget_lakhs,
+        payload.top_k
+    )
+
+    return {"recommendations": recommendations}
+
 # -------------------- THEORY OF CHANGE BUILDER --------------------
 class ToCNode(BaseModel):
     id: str
@@ -979,6 +2638,7 @@ class TheoryOfChangeResponse(BaseModel):
     mermaid_png_url: str
     mermaid_svg_url: str
 
+@traced()
 def validate_if_then_logic(nodes: List[ToCNode], edges: List[ToCEdge]):
 
     issues = []
@@ -1009,6 +2669,7 @@ def validate_if_then_logic(nodes: List[ToCNode], edges: List[ToCEdge]):
 
     return issues
 
+@traced()
 def detect_logic_gaps(theme: str, nodes: List[ToCNode]):
 
     suggestions = []
@@ -1033,6 +2694,7 @@ def detect_logic_gaps(theme: str, nodes: List[ToCNode]):
 
     return suggestions
 
+@traced()
 def generate_toc_mermaid(nodes: List[ToCNode], edges: List[ToCEdge]):
 
     lines = ["flowchart LR"]
@@ -1092,6 +2754,19 @@ def build_theory_of_change(payload: TheoryOfChangeRequest):
     }
 
     theory_of_change_collection.insert_one(record)
+    index_search_artifact(payload.organization_id, "toc_node", record)
+
+    update_lfa_snapshot(payload.organization_id, {
+        "theory_of_change": {
+            layer: [n.label for n in payload.nodes if n.type == node_type]
+            for layer, node_type in (
+                ("activities", "activity"),
+                ("outputs", "output"),
+                ("outcomes", "outcome"),
+                ("impact", "impact")
+            )
+        }
+    })
 
     return {
         "is_valid": is_valid,
@@ -1112,21 +2787,37 @@ class StakeholderSelectorResponse(BaseModel):
     available_stakeholders: List[Dict[str, Any]]
     recommended_stakeholders: List[str]
 
+# Fields of a stakeholder_master document
+class StakeholderRecord(BaseModel):
+    stakeholder_id: str
+    name: str
+    themes: List[str] = []
+
+STAKEHOLDER_VIEWS = {
+    "summary": ["stakeholder_id", "name"]
+}
+
 def get_recommended_stakeholders(theme: str):
 
     cursor = stakeholder_master_collection.find(
         {"themes": theme},
-        {"_id": 0}
+        {"_id": 0, "stakeholder_id": 1}
     )
 
     return [s["stakeholder_id"] for s in cursor]
 
 # STAKEHOLDER SELECTION API
 @app.post("/stakeholders/select", response_model=StakeholderSelectorResponse)
-def select_stakeholders(payload: StakeholderSelectorRequest):
+def select_stakeholders(
+    payload: StakeholderSelectorRequest,
+    fields: Optional[str] = None,
+    view: Optional[str] = None
+):
+
+    projection = build_projection(fields, view, StakeholderRecord, STAKEHOLDER_VIEWS)
 
     all_stakeholders = list(
-        stakeholder_master_collection.find({}, {"_id": 0})
+        stakeholder_master_collection.find({}, projection)
     )
 
     recommended = get_recommended_stakeholders(payload.theme)
@@ -1140,6 +2831,8 @@ def select_stakeholders(payload: StakeholderSelectorRequest):
 
     organization_stakeholders_collection.insert_one(record)
 
+    update_lfa_snapshot(payload.organization_id, {"stakeholders": recommended})
+
     return {
         "available_stakeholders": all_stakeholders,
         "recommended_stakeholders": recommended
@@ -1149,7 +2842,8 @@ def select_stakeholders(payload: StakeholderSelectorRequest):
 class PracticeChangeRequest(BaseModel):
     organization_id: str
     theme: str
-    stakeholder_id: str
+    # Becomes a key in the LFA snapshot, so no "." or "$"
+    stakeholder_id: str = Field(..., pattern=r"^[A-Za-z0-9_-]+$")
     current_practices: List[str]
     desired_practices: List[str]
 
@@ -1221,6 +2915,14 @@ def define_practice_change(payload: PracticeChangeRequest):
     }
 
     practice_change_collection.insert_one(record)
+    index_search_artifact(payload.organization_id, "practice", record)
+
+    update_lfa_snapshot(payload.organization_id, {
+        f"practice_changes.{payload.stakeholder_id}": {
+            "current": payload.current_practices,
+            "desired": payload.desired_practices
+        }
+    })
 
     return {
         "ai_suggestions": ai_suggestions,
@@ -1242,67 +2944,124 @@ class IndicatorGenerationRequest(BaseModel):
 class IndicatorGenerationResponse(BaseModel):
     outcome_indicators: Dict[str, str]
     practice_indicators: Dict[str, Dict[str, str]]
+    outcome_alternatives: Dict[str, List[Dict[str, Any]]] = {}
+    practice_alternatives: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
 
-def generate_outcome_indicators(theme: str, outcomes: List[str]):
+# Runner-up templates returned alongside each best match
+INDICATOR_ALTERNATIVES = int(os.getenv("INDICATOR_ALTERNATIVES", "2"))
 
-    record = indicator_master_collection.find_one(
-        {"type": "student_outcome", "theme": theme},
-        {"_id": 0}
-    )
+class IndicatorMatchIndex:
+    """
+    Hashed TF-IDF vectors (see the problem similarity index) for every
+    indicator template of a theme, grouped by ("student_outcome", None) or
+    ("practice_change", stakeholder_id).
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+
+        self.templates: Dict[tuple, List[str]] = {}
+
+        for record in records:
+            key = (record.get("type"), record.get("stakeholder_id"))
+            self.templates.setdefault(key, []).extend(record.get("indicator_templates", []))
+
+        all_templates = [t for templates in self.templates.values() for t in templates]
+        counts = hashed_term_counts(all_templates)
+        self.idf = fit_idf(counts)
+        vectors = tfidf_rows(counts, self.idf)
+
+        self.vectors: Dict[tuple, np.ndarray] = {}
+        offset = 0
+        for key, templates in self.templates.items():
+            self.vectors[key] = vectors[offset:offset + len(templates)]
+            offset += len(templates)
 
-    templates = record["indicator_templates"] if record else []
+    def match(self, key: tuple, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Best template plus runner-ups for every text, scored in one product.
+        """
+        templates = self.templates.get(key)
+        if not templates or not texts:
+            return [[] for _ in texts]
+
+        scores = tfidf_rows(hashed_term_counts(texts), self.idf) @ self.vectors[key].T
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :INDICATOR_ALTERNATIVES + 1]
+
+        return [
+            [{"indicator": templates[j], "score": round(float(scores[i, j]), 4)} for j in row]
+            for i, row in enumerate(top)
+        ]
+
+# Rebuilt only when indicator_master changes
+_indicator_match_cache = VersionedLRU(THEME_CACHE_MAX_ENTRIES)
+
+def get_indicator_match_index(theme: str) -> IndicatorMatchIndex:
+
+    version = collection_version(indicator_master_collection)
+    index = _indicator_match_cache.get(theme, version)
+
+    if index is not None:
+        return index
+
+    index = IndicatorMatchIndex(list(indicator_master_collection.find({"theme": theme}, {"_id": 0})))
+    _indicator_match_cache.put(theme, version, index)
+
+    return index
+
+def generate_outcome_indicators(theme: str, outcomes: List[str]):
+
+    matches = get_indicator_match_index(theme).match(("student_outcome", None), outcomes)
 
     indicators = {}
+    alternatives = {}
 
-    for i, outcome in enumerate(outcomes):
-        if templates:
-            indicators[outcome] = templates[i % len(templates)]
+    for outcome, ranked in zip(outcomes, matches):
+        if ranked:
+            indicators[outcome] = ranked[0]["indicator"]
+            alternatives[outcome] = ranked[1:]
         else:
             indicators[outcome] = f"% of students achieving '{outcome}'"
 
-    return indicators
+    return indicators, alternatives
 
 def generate_practice_indicators(theme: str, practice_changes: List[Dict[str, Any]]):
 
+    index = get_indicator_match_index(theme)
+
     practice_indicators = {}
+    practice_alternatives = {}
 
     for pc in practice_changes:
         stakeholder = pc["stakeholder_id"]
         desired_practices = pc["desired_practices"]
 
-        record = indicator_master_collection.find_one(
-            {
-                "type": "practice_change",
-                "stakeholder_id": stakeholder,
-                "theme": theme
-            },
-            {"_id": 0}
-        )
-
-        templates = record["indicator_templates"] if record else []
+        matches = index.match(("practice_change", stakeholder), desired_practices)
 
         stakeholder_indicators = {}
+        stakeholder_alternatives = {}
 
-        for i, practice in enumerate(desired_practices):
-            if templates:
-                stakeholder_indicators[practice] = templates[i % len(templates)]
+        for practice, ranked in zip(desired_practices, matches):
+            if ranked:
+                stakeholder_indicators[practice] = ranked[0]["indicator"]
+                stakeholder_alternatives[practice] = ranked[1:]
             else:
                 stakeholder_indicators[practice] = f"% adoption of practice: '{practice}'"
 
         practice_indicators[stakeholder] = stakeholder_indicators
+        practice_alternatives[stakeholder] = stakeholder_alternatives
 
-    return practice_indicators
+    return practice_indicators, practice_alternatives
 
 # AUTO INDICATOR GENERATION API
 @app.post("/indicators/auto-generate", response_model=IndicatorGenerationResponse)
 def auto_generate_indicators(payload: IndicatorGenerationRequest):
 
-    outcome_indicators = generate_outcome_indicators(
+    outcome_indicators, outcome_alternatives = generate_outcome_indicators(
         payload.theme,
         payload.student_outcomes
     )
 
-    practice_indicators = generate_practice_indicators(
+    practice_indicators, practice_alternatives = generate_practice_indicators(
         payload.theme,
         payload.practice_changes
     )
@@ -1317,9 +3076,19 @@ def auto_generate_indicators(payload: IndicatorGenerationRequest):
 
     generated_indicators_collection.insert_one(record)
 
+    update_lfa_snapshot(payload.organization_id, {
+        "measurement.indicators": list(outcome_indicators.values()) + [
+            indicator
+            for stakeholder_indicators in practice_indicators.values()
+            for indicator in stakeholder_indicators.values()
+        ]
+    })
+
     return {
         "outcome_indicators": outcome_indicators,
-        "practice_indicators": practice_indicators
+        "practice_indicators": practice_indicators,
+        "outcome_alternatives": outcome_alternatives,
+        "practice_alternatives": practice_alternatives
     }
 
 # --------------------  Baseline, Target & Timeline Builder--------------------
@@ -1406,278 +3175,980 @@ def build_baseline_target(payload: BaselineTargetRequest):
 
         indicator_targets_collection.insert_one(record)
 
+    update_lfa_snapshot(payload.organization_id, {
+        "measurement.targets": [
+            {
+                "indicator_name": indicator.indicator_name,
+                "baseline": indicator.baseline_value,
+                "target": indicator.target_value,
+                "start_date": indicator.start_date.isoformat(),
+                "end_date": indicator.end_date.isoformat()
+            }
+            for indicator in payload.indicators
+        ]
+    })
+
     return {"validations": validations}
 
 # --------------------  AI LFA COMPLETENESS SCORE ENGINE --------------------
-SECTION_REQUIREMENTS = {
-    "organization_profile": {
-        "weight": 10,
-        "required_fields": ["organization_id", "theme", "geography", "scale"]
-    },
-    "problem_definition": {
-        "weight": 15,
-        "required_fields": ["core_problem", "affected_group"]
-    },
-    "problem_tree": {
-        "weight": 15,
-        "required_fields": ["root_causes", "core_problem", "effects"]
-    },
-    "outcomes": {
-        "weight": 20,
-        "required_fields": ["smart_outcomes"]
-    },
-    "methodology": {
-        "weight": 15,
-        "required_fields": ["interventions"]
-    },
-    "theory_of_change": {
-        "weight": 15,
-        "required_fields": ["activities", "outputs", "outcomes", "impact"]
-    },
-    "measurement": {
-        "weight": 10,
-        "required_fields": ["indicators", "targets"]
-    }
-}
-
 class LFACompletenessRequest(BaseModel):
     organization_id: str
-    lfa_snapshot: Dict[str, Any]
+    lfa_snapshot: Optional[Dict[str, Any]] = None  # defaults to the materialized snapshot
 
-def calculate_lfa_completeness(lfa_snapshot: Dict[str, Any]):
+class LFACompletenessBatchRequest(BaseModel):
+    organization_ids: List[str] = Field(..., min_length=1)
+    use_process_pool: bool = False
 
-    section_results = []
-    total_score = 0
-    missing_sections = []
+# Batch scoring can run on a process pool. Workers are spawned rather than
+# forked (this process runs Mongo monitor and exporter threads) and, under
+# `uvicorn main:app`, only import lfa_scoring rather than the whole app.
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 2)))
 
-    for section, rules in SECTION_REQUIREMENTS.items():
-        section_data = lfa_snapshot.get(section)
+_process_pool = None
+_process_pool_lock = threading.Lock()
 
-        if not section_data:
-            missing_sections.append(section)
-            section_results.append({
-                "section": section,
-                "status": "missing",
-                "score": 0,
-                "weight": rules["weight"]
-            })
-            continue
+def get_process_pool() -> TrackedProcessPoolExecutor:
 
-        # Check required fields
-        present_fields = [
-            field for field in rules["required_fields"]
-            if field in section_data and section_data[field]
-        ]
+    global _process_pool
 
-        completion_ratio = len(present_fields) / len(rules["required_fields"])
-        section_score = round(rules["weight"] * completion_ratio, 2)
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = TrackedProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=lfa_scoring.init_worker
+            )
 
-        total_score += section_score
+    return _process_pool
 
-        status = "complete" if completion_ratio == 1 else "partial"
+@on_shutdown
+def shutdown_process_pool():
 
-        section_results.append({
-            "section": section,
-            "status": status,
-            "score": section_score,
-            "weight": rules["weight"],
-            "missing_fields": list(
-                set(rules["required_fields"]) - set(present_fields)
-            )
-        })
+    global _process_pool
 
-    completion_percentage = round(total_score, 2)
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
 
-    return {
-        "completion_percentage": completion_percentage,
-        "section_breakdown": section_results,
-        "missing_sections": missing_sections
-    }
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
 
-# LFA COMPLETENESS SCORE API
-@app.post("/lfa/completeness-score")
-def get_lfa_completeness(payload: LFACompletenessRequest):
+def record_lfa_completeness(organization_id: str, result: Dict[str, Any]) -> bool:
+    """
+    Store a completeness evaluation unless it matches the organization's last one.
+    """
+    latest = lfa_completeness_collection.find_one(
+        {"organization_id": organization_id},
+        {"_id": 0, "snapshot_hash": 1},
+        sort=[("evaluated_at", -1)]
+    )
 
-    result = calculate_lfa_completeness(payload.lfa_snapshot)
+    if latest and latest.get("snapshot_hash") == result["snapshot_hash"]:
+        return False
 
-    record = {
-        "organization_id": payload.organization_id,
+    lfa_completeness_collection.insert_one({
+        "organization_id": organization_id,
         "completion_percentage": result["completion_percentage"],
         "section_breakdown": result["section_breakdown"],
         "missing_sections": result["missing_sections"],
+        "snapshot_hash": result["snapshot_hash"],
         "evaluated_at": datetime.utcnow()
+    })
+
+    record_latest_score_rollups("completeness", organization_id, result["completion_percentage"])
+    return True
+
+# LFA COMPLETENESS SCORE API
+@app.post("/lfa/completeness-score")
+def get_lfa_completeness(payload: LFACompletenessRequest):
+
+    lfa_snapshot = resolve_lfa_snapshot(payload.organization_id, payload.lfa_snapshot)
+
+    def run_scoring():
+
+        result = calculate_lfa_completeness(lfa_snapshot)
+        record_lfa_completeness(payload.organization_id, result)
+
+        return result
+
+    return analysis_single_flight.run(
+        request_fingerprint("lfa-completeness", [payload.organization_id, lfa_snapshot]),
+        run_scoring
+    )
+
+# LFA COMPLETENESS BATCH SCORE API
+@app.post("/lfa/completeness-score/batch")
+def get_lfa_completeness_batch(payload: LFACompletenessBatchRequest):
+
+    snapshots = {
+        doc.pop("organization_id"): doc
+        for doc in lfa_snapshots_collection.find(
+            {"organization_id": {"$in": payload.organization_ids}},
+            {"_id": 0, "created_at": 0, "updated_at": 0}
+        )
     }
 
-    lfa_completeness_collection.insert_one(record)
+    organization_ids = [o for o in payload.organization_ids if o in snapshots]
+    lfa_snapshots = [snapshots[o] for o in organization_ids]
 
-    return result
+    if payload.use_process_pool and len(lfa_snapshots) > 1:
+        chunksize = max(1, len(lfa_snapshots) // (PROCESS_POOL_WORKERS * 4))
+        results = list(
+            get_process_pool().map(lfa_scoring.calculate_lfa_completeness, lfa_snapshots, chunksize=chunksize)
+        )
+    else:
+        results = [calculate_lfa_completeness(snapshot) for snapshot in lfa_snapshots]
 
-# -------------------- DESIGN QUALITY FEEDBACK SYSTEM --------------------
-QUALITY_CHECKS = {
-    "outcome_quality": {
-        "severity": "high"
-    },
-    "stakeholder_alignment": {
-        "severity": "high"
-    },
-    "indicator_validity": {
-        "severity": "medium"
-    },
-    "theory_of_change_logic": {
-        "severity": "high"
-    },
-    "problem_intervention_alignment": {
-        "severity": "medium"
+    recorded = 0
+    for organization_id, result in zip(organization_ids, results):
+        recorded += record_lfa_completeness(organization_id, result)
+
+    return {
+        "results": dict(zip(organization_ids, results)),
+        "missing_organizations": [o for o in payload.organization_ids if o not in snapshots],
+        "recorded": recorded
     }
-}
 
+# -------------------- DESIGN QUALITY FEEDBACK SYSTEM --------------------
 class DesignQualityRequest(BaseModel):
     organization_id: str
-    lfa_snapshot: Dict[str, Any]
+    lfa_snapshot: Optional[Dict[str, Any]] = None  # defaults to the materialized snapshot
+
+# DESIGN QUALITY FEEDBACK API
+@app.post("/lfa/design-quality-feedback")
+def get_design_quality_feedback(payload: DesignQualityRequest):
 
-def analyze_outcome_quality(outcomes: List[str]):
+    lfa_snapshot = resolve_lfa_snapshot(payload.organization_id, payload.lfa_snapshot)
 
-    feedback = []
+    def run_review():
 
-    measurable_keywords = ["increase", "decrease", "%", "to", "by", "from"]
-    vague_words = ["improve", "enhance", "strengthen", "better"]
+        result = generate_design_quality_feedback(lfa_snapshot)
 
-    for outcome in outcomes:
-        issues = []
+        record = {
+            "organization_id": payload.organization_id,
+            "quality_score": result["quality_score"],
+            "feedback_items": result["feedback_items"],
+            "evaluated_at": datetime.utcnow()
+        }
 
-        if not any(word in outcome.lower() for word in measurable_keywords):
-            issues.append("Outcome is not clearly measurable")
+        design_quality_feedback_collection.insert_one(record)
+        record_latest_score_rollups("quality", payload.organization_id, result["quality_score"])
 
-        if any(word in outcome.lower() for word in vague_words):
-            issues.append("Outcome uses vague language")
+        return result
 
-        if issues:
-            feedback.append({
-                "area": "Student Outcomes",
-                "issue": outcome,
-                "problems": issues,
-                "suggestion": "Rewrite outcome using a measurable baseline, target, and timeframe"
-            })
+    return analysis_single_flight.run(
+        request_fingerprint("design-quality-feedback", [payload.organization_id, lfa_snapshot]),
+        run_review
+    )
 
-    return feedback
+# -------------------- PORTFOLIO DESIGN REVIEW --------------------
+# Long-running review of every organization's LFA. Progress is checkpointed
+# on the job document after each chunk (last organization _id reviewed), so a
+# crashed job resumes from where it stopped instead of starting over.
+DESIGN_REVIEW_STALE_SECONDS = int(os.getenv("DESIGN_REVIEW_STALE_SECONDS", "300"))
+SCORE_BANDS = [0, 20, 40, 60, 80, 101]
 
-def analyze_stakeholder_alignment(stakeholders, outcomes):
+class DesignReviewJobRequest(BaseModel):
+    states: Optional[List[str]] = None
+    themes: Optional[List[str]] = None
+    chunk_size: int = Field(200, ge=1, le=5000)
+    use_process_pool: bool = True
 
-    feedback = []
+def design_review_query(filters: Dict[str, Any]) -> Dict[str, Any]:
 
-    if not stakeholders:
-        feedback.append({
-            "area": "Stakeholders",
-            "issue": "No stakeholders linked to outcomes",
-            "suggestion": "Map at least one stakeholder responsible for each outcome"
-        })
-        return feedback
+    query = {}
 
-    if outcomes and len(stakeholders) < len(outcomes):
-        feedback.append({
-            "area": "Stakeholder Coverage",
-            "issue": "Fewer stakeholders than outcomes",
-            "suggestion": "Ensure accountability by mapping stakeholders to each outcome"
-        })
+    if filters.get("states"):
+        query["geography.state"] = {"$in": filters["states"]}
+    if filters.get("themes"):
+        query["thematic_focus"] = {"$in": filters["themes"]}
 
-    return feedback
+    return query
 
-def analyze_indicator_quality(indicators):
+def claim_design_review_job(job_id: str):
+    """
+    Atomically mark a job as running. A job already running elsewhere is only
+    taken over once its heartbeat is stale.
+    """
+    stale_before = utc_now().timestamp() - DESIGN_REVIEW_STALE_SECONDS
 
-    feedback = []
+    return design_review_jobs_collection.find_one_and_update(
+        {
+            "job_id": job_id,
+            "$or": [
+                {"status": {"$in": ["queued", "failed"]}},
+                {"status": "running", "heartbeat": {"$lt": stale_before}}
+            ]
+        },
+        {"$set": {"status": "running", "heartbeat": utc_now().timestamp()}},
+        return_document=ReturnDocument.AFTER
+    )
 
-    for indicator in indicators:
-        if "survey" in indicator.lower() or "perception" in indicator.lower():
-            feedback.append({
-                "area": "Indicators",
-                "issue": indicator,
-                "problem": "Indicator is perception-based",
-                "suggestion": "Prefer observable or performance-based indicators"
-            })
+def review_chunk(job_id: str, organizations: List[Dict[str, Any]], use_process_pool: bool):
 
-    return feedback
+    organization_ids = [str(o["_id"]) for o in organizations]
 
-def analyze_toc_logic(toc):
+    snapshots = {
+        doc.pop("organization_id"): doc
+        for doc in lfa_snapshots_collection.find(
+            {"organization_id": {"$in": organization_ids}},
+            {"_id": 0, "created_at": 0, "updated_at": 0}
+        )
+    }
+    lfa_snapshots = [snapshots.get(o, {}) for o in organization_ids]
 
-    feedback = []
+    if use_process_pool:
+        chunksize = max(1, len(lfa_snapshots) // (PROCESS_POOL_WORKERS * 4))
+        reviews = list(
+            get_process_pool().map(lfa_scoring.review_organization_lfa, lfa_snapshots, chunksize=chunksize)
+        )
+    else:
+        reviews = [lfa_scoring.review_organization_lfa(snapshot) for snapshot in lfa_snapshots]
+
+    operations = []
+    for organization, organization_id, review in zip(organizations, organization_ids, reviews):
+        operations.append(UpdateOne(
+            {"job_id": job_id, "organization_id": organization_id},
+            {"$set": {
+                **review,
+                "state": organization.get("geography", {}).get("state"),
+                "themes": organization.get("thematic_focus", []),
+                "maturity_level": organization.get("maturity_level"),
+                "has_lfa": organization_id in snapshots,
+                "reviewed_at": utc_now()
+            }},
+            upsert=True
+        ))
+
+    design_review_results_collection.bulk_write(operations, ordered=False)
+
+def score_band(score: float) -> str:
+
+    for low, high in zip(SCORE_BANDS, SCORE_BANDS[1:]):
+        if low <= score < high:
+            return f"{low}-{min(high, 100)}"
+
+    return "unknown"
+
+def score_band_expression(field: str) -> Dict[str, Any]:
+    """
+    SCORE_BANDS as an aggregation expression. $bucket itself cannot be
+    grouped by state or theme, so the same boundaries are applied with
+    $switch and counted per (group, band) in Mongo.
+    """
+    return {"$switch": {
+        "branches": [
+            {
+                "case": {"$and": [{"$gte": [f"${field}", low]}, {"$lt": [f"${field}", high]}]},
+                "then": f"{low}-{min(high, 100)}"
+            }
+            for low, high in zip(SCORE_BANDS, SCORE_BANDS[1:])
+        ],
+        "default": "unknown"
+    }}
+
+def summarize_design_review(job_id: str, dimension: str) -> Dict[str, Any]:
+
+    pipeline = [{"$match": {"job_id": job_id}}]
+
+    if dimension == "themes":
+        pipeline.append({"$unwind": "$themes"})
+
+    group_key = f"${dimension}"
+
+    def band_counts(field):
+        return [{"$group": {
+            "_id": {"key": group_key, "band": score_band_expression(field)},
+            "count": {"$sum": 1}
+        }}]
+
+    pipeline.append({"$facet": {
+        "summary": [{"$group": {
+            "_id": group_key,
+            "organizations": {"$sum": 1},
+            "avg_completeness": {"$avg": "$completion_percentage"},
+            "avg_quality": {"$avg": "$quality_score"}
+        }}],
+        "completeness_distribution": band_counts("completion_percentage"),
+        "quality_distribution": band_counts("quality_score")
+    }})
+
+    facets = next(design_review_results_collection.aggregate(pipeline, allowDiskUse=True))
+    summary = {}
+
+    for row in facets["summary"]:
+        summary[row["_id"] or "unknown"] = {
+            "organizations": row["organizations"],
+            "avg_completeness": round(row["avg_completeness"], 2),
+            "avg_quality": round(row["avg_quality"], 2),
+            "completeness_distribution": {},
+            "quality_distribution": {}
+        }
 
-    required_chain = ["activities", "outputs", "outcomes", "impact"]
+    for distribution in ("completeness_distribution", "quality_distribution"):
+        for row in facets[distribution]:
+            summary[row["_id"]["key"] or "unknown"][distribution][row["_id"]["band"]] = row["count"]
 
-    for step in required_chain:
-        if step not in toc or not toc[step]:
-            feedback.append({
-                "area": "Theory of Change",
-                "issue": f"Missing {step}",
-                "suggestion": f"Define clear {step} to maintain logical flow"
-            })
+    return summary
+
+def run_design_review_job(job: Dict[str, Any]):
+    """
+    Process an already claimed job (see claim_design_review_job).
+    """
+    job_id = job["job_id"]
+
+    query = design_review_query(job["filters"])
+    if job.get("last_organization_id"):
+        query["_id"] = {"$gt": ObjectId(job["last_organization_id"])}
+
+    cursor = organization_profiles_collection.find(
+        query,
+        {"geography.state": 1, "thematic_focus": 1, "maturity_level": 1}
+    ).sort("_id", 1).batch_size(job["chunk_size"])
+
+    try:
+        chunk = []
+        for organization in cursor:
+            chunk.append(organization)
+            if len(chunk) == job["chunk_size"]:
+                review_chunk(job_id, chunk, job["use_process_pool"])
+                checkpoint_design_review(job_id, chunk)
+                chunk = []
+
+        if chunk:
+            review_chunk(job_id, chunk, job["use_process_pool"])
+            checkpoint_design_review(job_id, chunk)
+
+        design_review_jobs_collection.update_one(
+            {"job_id": job_id},
+            {"$set": {
+                "status": "completed",
+                "completed_at": utc_now(),
+                "report": {
+                    "by_state": summarize_design_review(job_id, "state"),
+                    "by_theme": summarize_design_review(job_id, "themes")
+                }
+            }}
+        )
+    except Exception as exc:
+        design_review_jobs_collection.update_one(
+            {"job_id": job_id},
+            {"$set": {"status": "failed", "error": str(exc)}}
+        )
+    finally:
+        cursor.close()
+
+def checkpoint_design_review(job_id: str, chunk: List[Dict[str, Any]]):
+
+    # Counted rather than incremented, so a chunk replayed after a crash is not double-counted
+    processed = design_review_results_collection.count_documents({"job_id": job_id})
+
+    design_review_jobs_collection.update_one(
+        {"job_id": job_id},
+        {"$set": {
+            "processed": processed,
+            "last_organization_id": str(chunk[-1]["_id"]),
+            "heartbeat": utc_now().timestamp()
+        }}
+    )
+
+# PORTFOLIO DESIGN REVIEW API
+@app.post("/portfolio/design-review")
+def start_design_review(payload: DesignReviewJobRequest, background_tasks: BackgroundTasks):
+
+    filters = {"states": payload.states, "themes": payload.themes}
+
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "status": "queued",
+        "filters": filters,
+        "chunk_size": payload.chunk_size,
+        "use_process_pool": payload.use_process_pool,
+        "total": organization_profiles_collection.count_documents(design_review_query(filters)),
+        "processed": 0,
+        "last_organization_id": None,
+        "created_at": utc_now()
+    }
+
+    design_review_jobs_collection.insert_one(job)
+    claimed = claim_design_review_job(job["job_id"])
+    background_tasks.add_task(run_design_review_job, claimed)
 
-    if "activities" in toc and "outcomes" in toc:
-        if len(toc["activities"]) > len(toc["outcomes"]) * 3:
-            feedback.append({
-                "area": "Theory of Change",
-                "issue": "Too many activities for defined outcomes",
-                "suggestion": "Reduce activities or clarify outcome pathways"
+    return {"job_id": job["job_id"], "status": claimed["status"], "total": job["total"]}
+
+# PORTFOLIO DESIGN REVIEW STATUS API
+@app.get("/portfolio/design-review/{job_id}")
+def get_design_review_status(job_id: str):
+
+    job = design_review_jobs_collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Design review job not found")
+
+    job["progress_percentage"] = (
+        round(job["processed"] / job["total"] * 100, 2) if job["total"] else 100.0
+    )
+
+    return job
+
+# PORTFOLIO DESIGN REVIEW RESUME API
+@app.post("/portfolio/design-review/{job_id}/resume")
+def resume_design_review(job_id: str, background_tasks: BackgroundTasks):
+
+    # Claimed here rather than in the task, so a job that cannot be resumed gets a 409
+    job = claim_design_review_job(job_id)
+
+    if not job:
+        current = design_review_jobs_collection.find_one({"job_id": job_id}, {"_id": 0, "status": 1})
+
+        if not current:
+            raise HTTPException(status_code=404, detail="Design review job not found")
+
+        if current["status"] == "completed":
+            raise HTTPException(status_code=409, detail="Design review job already completed")
+
+        raise HTTPException(
+            status_code=409,
+            detail=f"Design review job is still running; it can be resumed once it has made no progress for {DESIGN_REVIEW_STALE_SECONDS} seconds"
+        )
+
+    background_tasks.add_task(run_design_review_job, job)
+
+    return {"job_id": job_id, "status": "resuming"}
+
+# -------------------- ANALYTICS ROLLUPS --------------------
+# Cross-organization breakdowns served from precomputed rollup documents
+# (metric, dimension, key) -> count / sum / distribution. Rollups are kept
+# current incrementally on write; rebuild_analytics_rollups() recomputes them
+# from the source collections and can run on a schedule.
+ANALYTICS_REBUILD_INTERVAL_SECONDS = int(os.getenv("ANALYTICS_REBUILD_INTERVAL_SECONDS", "0"))
+
+# Metrics that track each organization's latest score rather than every evaluation
+LATEST_SCORE_METRICS = {
+    "completeness": (lfa_completeness_collection, "completion_percentage", "evaluated_at"),
+    "quality": (design_quality_feedback_collection, "quality_score", "evaluated_at")
+}
+
+def dimensions_for_profile(profile: Optional[Dict[str, Any]]) -> List[Any]:
+    """
+    (dimension, key) pairs an organization's scores roll up into.
+    """
+    dimensions = [["all", "all"]]
+
+    if profile:
+        dimensions.append(["state", profile["geography"]["state"].lower()])
+        dimensions.append(["maturity_level", profile["maturity_level"].lower()])
+        dimensions.extend(["theme", t.lower()] for t in profile.get("thematic_focus", []))
+
+    return dimensions
+
+def organization_dimensions_map(organization_ids) -> Dict[str, List[Any]]:
+    """
+    Rollup dimensions for many organizations from a single profile query.
+
+    Profiles are read fresh on every call so a change of state or theme is
+    picked up by the next write instead of lingering in a cache.
+    """
+    organization_ids = set(organization_ids)
+    object_ids = [ObjectId(i) for i in organization_ids if i and ObjectId.is_valid(i)]
+
+    profiles = {}
+    if object_ids:
+        profiles = {
+            str(profile["_id"]): profile
+            for profile in organization_profiles_collection.find(
+                {"_id": {"$in": object_ids}},
+                {"geography.state": 1, "thematic_focus": 1, "maturity_level": 1}
+            )
+        }
+
+    return {
+        organization_id: dimensions_for_profile(profiles.get(organization_id))
+        for organization_id in organization_ids
+    }
+
+def organization_dimensions(organization_id: str) -> List[Any]:
+
+    return organization_dimensions_map([organization_id])[organization_id]
+
+def apply_rollup_increments(metric: str, increments: Dict[Any, Dict[str, float]]):
+
+    for (dimension, key), inc in increments.items():
+        inc = {field: value for field, value in inc.items() if value}
+        if not inc:
+            continue
+
+        analytics_rollups_collection.update_one(
+            {"metric": metric, "dimension": dimension, "key": key},
+            {"$inc": inc, "$set": {"updated_at": utc_now()}},
+            upsert=True
+        )
+
+def record_latest_score_rollups(metric: str, organization_id: str, score: float):
+
+    dimensions = organization_dimensions(organization_id)
+
+    previous = analytics_latest_collection.find_one_and_update(
+        {"metric": metric, "organization_id": organization_id},
+        {"$set": {"value": score, "dimensions": dimensions, "updated_at": utc_now()}},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+
+    increments: Dict[Any, Dict[str, float]] = {}
+
+    # Swap the organization's previous contribution for the new one
+    if previous:
+        old_band = f"distribution.{score_band(previous['value'])}"
+        for dimension, key in previous["dimensions"]:
+            inc = increments.setdefault((dimension, key), {})
+            inc["count"] = inc.get("count", 0) - 1
+            inc["sum"] = inc.get("sum", 0) - previous["value"]
+            inc[old_band] = inc.get(old_band, 0) - 1
+
+    new_band = f"distribution.{score_band(score)}"
+    for dimension, key in dimensions:
+        inc = increments.setdefault((dimension, key), {})
+        inc["count"] = inc.get("count", 0) + 1
+        inc["sum"] = inc.get("sum", 0) + score
+        inc[new_band] = inc.get(new_band, 0) + 1
+
+    apply_rollup_increments(metric, increments)
+
+def record_issue_type_rollups(organization_id: str, issues: List[Dict[str, Any]]):
+
+    increments: Dict[Any, Dict[str, float]] = {}
+
+    for dimension, key in organization_dimensions(organization_id):
+        if dimension not in ("all", "state"):
+            continue
+        inc = increments.setdefault((dimension, key), {})
+        for issue in issues:
+            field = f"distribution.{issue['issue_type']}"
+            inc[field] = inc.get(field, 0) + 1
+        inc["count"] = len(issues)
+
+    apply_rollup_increments("problem_issue_types", increments)
+
+def record_smart_score_rollup(theme: str, smart_score: int):
+
+    apply_rollup_increments("smart_score", {
+        ("theme", theme.lower()): {
+            "count": 1,
+            "sum": smart_score,
+            f"distribution.{smart_score}": 1
+        }
+    })
+
+def rebuild_analytics_rollups():
+    """
+    Recompute every rollup from the source collections with aggregation pipelines.
+    """
+    started = utc_now()
+    rollups: Dict[Any, Dict[str, Any]] = {}
+    latest_docs = []
+
+    def add(metric, dimension, key, count, total, band):
+        doc = rollups.setdefault((metric, dimension, key), {
+            "metric": metric, "dimension": dimension, "key": key,
+            "count": 0, "distribution": {}
+        })
+        doc["count"] += count
+        if total is not None:
+            doc["sum"] = doc.get("sum", 0) + total
+        doc["distribution"][band] = doc["distribution"].get(band, 0) + count
+
+    for metric, (collection, field, timestamp) in LATEST_SCORE_METRICS.items():
+        pipeline = [
+            {"$sort": {"organization_id": 1, timestamp: -1}},
+            {"$group": {"_id": "$organization_id", "value": {"$first": f"${field}"}}}
+        ]
+        rows = list(collection.aggregate(pipeline, allowDiskUse=True))
+        dimensions_by_organization = organization_dimensions_map(row["_id"] for row in rows)
+        for row in rows:
+            dimensions = dimensions_by_organization[row["_id"]]
+            latest_docs.append({
+                "metric": metric,
+                "organization_id": row["_id"],
+                "value": row["value"],
+                "dimensions": dimensions
             })
+            for dimension, key in dimensions:
+                add(metric, dimension, key, 1, row["value"], score_band(row["value"]))
+
+    # Issue types: refinements join back to their problem statement's organization
+    pipeline = [
+        {"$unwind": "$identified_issues"},
+        {"$group": {
+            "_id": {
+                "problem_statement_id": "$problem_statement_id",
+                "issue_type": "$identified_issues.issue_type"
+            },
+            "count": {"$sum": 1}
+        }}
+    ]
+    rows = list(problem_refinements_collection.aggregate(pipeline, allowDiskUse=True))
 
-    return feedback
+    problem_ids = [
+        ObjectId(row["_id"]["problem_statement_id"])
+        for row in rows
+        if ObjectId.is_valid(row["_id"].get("problem_statement_id") or "")
+    ]
+    problem_organizations = {
+        str(problem["_id"]): problem.get("organization_id") or ""
+        for problem in problem_statements_collection.find(
+            {"_id": {"$in": problem_ids}}, {"organization_id": 1}
+        )
+    } if problem_ids else {}
 
-def analyze_problem_intervention_alignment(problem, interventions):
+    dimensions_by_organization = organization_dimensions_map(
+        list(problem_organizations.values()) + [""]
+    )
+    for row in rows:
+        organization_id = problem_organizations.get(row["_id"].get("problem_statement_id"), "")
+        for dimension, key in dimensions_by_organization[organization_id]:
+            if dimension in ("all", "state"):
+                add("problem_issue_types", dimension, key, row["count"], None, row["_id"]["issue_type"])
+
+    pipeline = [
+        {"$group": {
+            "_id": {"theme": {"$toLower": "$theme"}, "score": "$smart_validation.smart_score"},
+            "count": {"$sum": 1}
+        }}
+    ]
+    for row in student_outcomes_collection.aggregate(pipeline, allowDiskUse=True):
+        score = row["_id"]["score"]
+        add("smart_score", "theme", row["_id"]["theme"], row["count"], score * row["count"], str(score))
 
-    feedback = []
+    # Replace in place, then drop rollups the rebuild no longer produces
+    now = utc_now()
 
-    if problem and interventions:
-        mismatch_terms = ["infrastructure", "hardware"]
+    replace_untouched_since(
+        analytics_rollups_collection, ("metric", "dimension", "key"),
+        rollups.values(), started, now
+    )
+    analytics_rollups_collection.delete_many({"updated_at": {"$lt": started}})
 
-        if any(term in problem.lower() for term in mismatch_terms):
-            if not any("infrastructure" in i.lower() for i in interventions):
-                feedback.append({
-                    "area": "Intervention Alignment",
-                    "issue": "Problem–intervention mismatch",
-                    "suggestion": "Selected interventions do not address the stated core problem"
-                })
+    replace_untouched_since(
+        analytics_latest_collection, ("metric", "organization_id"),
+        latest_docs, started, now
+    )
+    analytics_latest_collection.delete_many({"updated_at": {"$lt": started}})
 
-    return feedback
+    return len(rollups)
+
+def replace_untouched_since(collection, key_fields, docs, started: datetime, now: datetime):
+    """
+    Write rebuilt documents without clobbering concurrent incremental updates.
+
+    A document whose updated_at is at or after `started` was incremented while
+    the rebuild was reading the source collections, so it is left as is; the
+    next rebuild reconciles it. Missing documents are inserted only if no
+    concurrent write created them first.
+    """
+    operations = []
 
-def generate_design_quality_feedback(lfa_snapshot):
+    for doc in docs:
+        key = {field: doc[field] for field in key_fields}
+        operations.append(UpdateOne(key, {"$setOnInsert": {**doc, "updated_at": now}}, upsert=True))
+        operations.append(ReplaceOne(
+            {**key, "updated_at": {"$lt": started}},
+            {**doc, "updated_at": now}
+        ))
 
-    feedback = []
+    if operations:
+        collection.bulk_write(operations, ordered=True)
 
-    outcomes = lfa_snapshot.get("outcomes", {}).get("smart_outcomes", [])
-    stakeholders = lfa_snapshot.get("stakeholders", [])
-    indicators = lfa_snapshot.get("measurement", {}).get("indicators", [])
-    toc = lfa_snapshot.get("theory_of_change", {})
-    problem = lfa_snapshot.get("problem_definition", {}).get("core_problem", "")
-    interventions = lfa_snapshot.get("methodology", {}).get("interventions", [])
+@on_startup
+def schedule_analytics_rebuild():
+
+    if ANALYTICS_REBUILD_INTERVAL_SECONDS <= 0:
+        return
+
+    def loop():
+        while True:
+            time.sleep(ANALYTICS_REBUILD_INTERVAL_SECONDS)
+            try:
+                rebuild_analytics_rollups()
+            except Exception:
+                logger.exception("Scheduled analytics rebuild failed")
 
-    feedback.extend(analyze_outcome_quality(outcomes))
-    feedback.extend(analyze_stakeholder_alignment(stakeholders, outcomes))
-    feedback.extend(analyze_indicator_quality(indicators))
-    feedback.extend(analyze_toc_logic(toc))
-    feedback.extend(analyze_problem_intervention_alignment(problem, interventions))
+    threading.Thread(target=loop, name="analytics-rebuild", daemon=True).start()
 
-    quality_score = max(0, 100 - len(feedback) * 8)
+def format_rollup(doc: Dict[str, Any]) -> Dict[str, Any]:
 
     return {
-        "quality_score": quality_score,
-        "feedback_items": feedback
+        "key": doc["key"],
+        "count": doc.get("count", 0),
+        "average": round(doc["sum"] / doc["count"], 2) if doc.get("count") and doc.get("sum") is not None else None,
+        "distribution": {k: v for k, v in doc.get("distribution", {}).items() if v},
+        "updated_at": doc.get("updated_at")
     }
 
-# DESIGN QUALITY FEEDBACK API
-@app.post("/lfa/design-quality-feedback")
-def get_design_quality_feedback(payload: DesignQualityRequest):
+# ANALYTICS ROLLUP API
+@app.get("/analytics/{metric}")
+def get_analytics_rollups(metric: str, dimension: str = "all", key: Optional[str] = None):
 
-    result = generate_design_quality_feedback(payload.lfa_snapshot)
+    query = {"metric": metric, "dimension": dimension}
+    if key:
+        query["key"] = key.lower()
 
-    record = {
-        "organization_id": payload.organization_id,
-        "quality_score": result["quality_score"],
-        "feedback_items": result["feedback_items"],
-        "evaluated_at": datetime.utcnow()
+    rollups = [
+        format_rollup(doc)
+        for doc in analytics_rollups_collection.find(query, {"_id": 0})
+    ]
+
+    return {
+        "metric": metric,
+        "dimension": dimension,
+        "rollups": rollups
+    }
+
+# ANALYTICS REBUILD API
+@app.post("/analytics/rebuild", dependencies=[Depends(require_admin)])
+def trigger_analytics_rebuild(background_tasks: BackgroundTasks):
+
+    background_tasks.add_task(rebuild_analytics_rollups)
+
+    return {"status": "Analytics rebuild scheduled"}
+
+# -------------------- THEME STARTER KIT --------------------
+# Everything the design wizard looks up for a theme, assembled once per theme
+# and rebuilt only when one of the master collections changes.
+STARTER_KIT_COLLECTIONS = [
+    methodology_library_collection,
+    stakeholder_master_collection,
+    practice_master_collection,
+    indicator_master_collection,
+    toc_pattern_library_collection,
+    competency_frameworks_collection,
+    policy_references_collection
+]
+
+_starter_kit_cache = VersionedLRU(THEME_CACHE_MAX_ENTRIES)
+
+def build_theme_starter_kit(theme: str) -> Dict[str, Any]:
+
+    stakeholders = list(stakeholder_master_collection.find({}, {"_id": 0}))
+    indicator_templates = get_indicator_match_index(theme).templates
+
+    return {
+        "theme": theme,
+        "methodology_index": get_methodology_index(theme),
+        "available_stakeholders": stakeholders,
+        "recommended_stakeholders": [
+            s["stakeholder_id"] for s in stakeholders if theme in s.get("themes", [])
+        ],
+        "practice_suggestions": {
+            record["stakeholder_id"]: {
+                "suggested_current": record.get("current_practices", []),
+                "suggested_desired": record.get("desired_practices", [])
+            }
+            for record in practice_master_collection.find({"theme": theme}, {"_id": 0})
+        },
+        "indicator_templates": {
+            "student_outcome": indicator_templates.get(("student_outcome", None), []),
+            "practice_change": {
+                stakeholder: templates
+                for (kind, stakeholder), templates in indicator_templates.items()
+                if kind == "practice_change"
+            }
+        },
+        "toc_pattern": toc_pattern_library_collection.find_one({"theme": theme}, {"_id": 0}),
+        "competencies": {
+            record["grade_range"]: record.get("competencies", [])
+            for record in competency_frameworks_collection.find({"theme": theme}, {"_id": 0})
+        },
+        "policy_references": get_policy_references()
     }
 
-    design_quality_feedback_collection.insert_one(record)
+def get_theme_starter_kit(theme: str):
+
+    version = tuple(collection_version(c) for c in STARTER_KIT_COLLECTIONS)
+    kit = _starter_kit_cache.get(theme, version)
+
+    if kit is not None:
+        return version, kit
+
+    kit = build_theme_starter_kit(theme)
+    _starter_kit_cache.put(theme, version, kit)
+
+    return version, kit
+
+# THEME STARTER KIT API
+@app.get("/themes/{theme}/starter-kit")
+def theme_starter_kit(
+    theme: str,
+    request: Request,
+    response: Response,
+    state: Optional[str] = None,
+    grade_range: Optional[str] = None
+):
+
+    version, kit = get_theme_starter_kit(theme)
+
+    not_modified = conditional_get(
+        request,
+        response,
+        response_etag(request, version),
+        CACHE_POLICIES["reference"]
+    )
+    if not_modified:
+        return not_modified
+
+    index = kit["methodology_index"]
+    methodologies = index.methodologies
+    if state:
+        geographies = {state.lower(), "all"}
+        methodologies = [
+            m for m in methodologies
+            if geographies.intersection(m.get("geographies", []))
+        ]
+
+    competencies = kit["competencies"]
+    if grade_range:
+        competencies = {grade_range: competencies.get(grade_range, [])}
+
+    return fast_json_response({
+        "theme": theme,
+        "state": state,
+        "grade_range": grade_range,
+        "methodologies": methodologies,
+        "component_library": select_component_library(index.component_index, methodologies),
+        "available_stakeholders": kit["available_stakeholders"],
+        "recommended_stakeholders": kit["recommended_stakeholders"],
+        "practice_suggestions": kit["practice_suggestions"],
+        "indicator_templates": kit["indicator_templates"],
+        "toc_pattern": kit["toc_pattern"],
+        "competencies": competencies,
+        "policy_references": kit["policy_references"]
+    }, response)
+
+# -------------------- ORGANIZATION SEARCH --------------------
+# In-process search.BM25Index per organization over its design artifacts.
+# Indexes are built lazily on the first search, extended in place as artifacts
+# are written, and rebuilt after SEARCH_INDEX_TTL_SECONDS to pick up writes
+# from other workers.
+SEARCH_INDEX_TTL_SECONDS = int(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+SEARCH_INDEX_MAX_ORGANIZATIONS = int(os.getenv("SEARCH_INDEX_MAX_ORGANIZATIONS", "256"))
+
+def template_search_text(doc: Dict[str, Any]):
+
+    # Forks store only overrides; index the content the fork actually shows
+    try:
+        doc = materialize_template(doc)
+    except HTTPException:
+        pass
+
+    return [("", f"{doc.get('name', '')}. {doc.get('description', '')}")]
+
+# kind -> (collection, organization field, doc -> [(suffix, text)])
+SEARCH_SOURCES = {
+    "problem_statement": (
+        problem_statements_collection, "organization_id",
+        lambda doc: [("", doc.get("core_problem", ""))]
+    ),
+    "outcome": (
+        student_outcomes_collection, "organization_id",
+        lambda doc: [("", doc.get("outcome_statement", ""))]
+    ),
+    "toc_node": (
+        theory_of_change_collection, "organization_id",
+        lambda doc: [(node["id"], node["label"]) for node in doc.get("nodes", [])]
+    ),
+    "practice": (
+        practice_change_collection, "organization_id",
+        lambda doc: [
+            (f"{state}-{i}", practice)
+            for state in ("current", "desired")
+            for i, practice in enumerate(doc.get(f"{state}_practices", []))
+        ]
+    ),
+    "template": (
+        organization_templates_collection, "created_by",
+        template_search_text
+    )
+}
+
+def add_search_artifact(index: BM25Index, kind: str, doc: Dict[str, Any]):
+
+    extract = SEARCH_SOURCES[kind][2]
+    # Templates are addressed by template_id everywhere else in the API
+    ref_id = str(doc["template_id"] if kind == "template" else doc["_id"])
+
+    for suffix, text in extract(doc):
+        index.remove(f"{kind}:{ref_id}:{suffix}")
+        if text:
+            index.add(
+                f"{kind}:{ref_id}:{suffix}",
+                text,
+                {"kind": kind, "ref_id": ref_id}
+            )
 
-    return result
+_search_indexes = OrderedDict()
+_search_indexes_lock = threading.Lock()
+
+def get_search_index(organization_id: str) -> BM25Index:
+
+    with _search_indexes_lock:
+        index = _search_indexes.get(organization_id)
+        if index and time.monotonic() - index.built_at < SEARCH_INDEX_TTL_SECONDS:
+            _search_indexes.move_to_end(organization_id)
+            return index
+
+    index = BM25Index()
+
+    for kind, (collection, organization_field, _) in SEARCH_SOURCES.items():
+        for doc in collection.find({organization_field: organization_id}):
+            add_search_artifact(index, kind, doc)
+
+    with _search_indexes_lock:
+        _search_indexes[organization_id] = index
+        if len(_search_indexes) > SEARCH_INDEX_MAX_ORGANIZATIONS:
+            _search_indexes.popitem(last=False)
+
+    return index
+
+def index_search_artifact(organization_id: str, kind: str, doc: Dict[str, Any]):
+    """
+    Add or refresh a freshly written artifact in the organization's index, if one is loaded.
+    """
+    with _search_indexes_lock:
+        index = _search_indexes.get(organization_id)
+
+    if index:
+        add_search_artifact(index, kind, doc)
+
+# ORGANIZATION SEARCH API
+@app.get("/organization/{org_id}/search")
+def search_organization_artifacts(
+    org_id: str,
+    q: str = Query(..., min_length=1),
+    kind: Optional[Literal["problem_statement", "outcome", "toc_node", "practice", "template"]] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100)
+):
+
+    start = time.perf_counter()
+
+    ranked, terms = get_search_index(org_id).search(q, kind)
+    page_rows = ranked[(page - 1) * page_size: page * page_size]
+
+    return {
+        "query": q,
+        "total": len(ranked),
+        "page": page,
+        "page_size": page_size,
+        "results": [
+            {
+                "kind": meta["kind"],
+                "ref_id": meta["ref_id"],
+                "score": round(score, 4),
+                "snippet": search_snippet(meta["text"], terms)
+            }
+            for _, score, meta in page_rows
+        ],
+        "took_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
 
 # -------------------- COMMON LFA TEMPLATE ENGINE --------------------
 class LFATemplate(BaseModel):
@@ -1692,15 +4163,58 @@ class LFATemplate(BaseModel):
     created_by: str  # "system" or organization_id
     is_public: bool
     created_at: datetime
+    rating_stats: Optional[Dict[str, Any]] = None  # maintained by the rating API
+    fork_count: int = 0  # maintained by the fork API
+
+# Listing screens only draw cards, so the summary view leaves out lfa_structure
+TEMPLATE_VIEWS = {
+    "summary": [
+        "template_id", "name", "theme", "system_level", "geography_type",
+        "applicable_states", "description", "created_by", "is_public",
+        "rating_stats", "fork_count"
+    ]
+}
+
+TEMPLATE_SORTS = {
+    "rating": ("rating_stats.bayesian_score", -1),
+    "recent": ("created_at", -1),
+    "popular": ("fork_count", -1)
+}
+
+# Bayesian smoothing: every template starts as if it had PRIOR_WEIGHT ratings of PRIOR_MEAN
+TEMPLATE_RATING_PRIOR_MEAN = float(os.getenv("TEMPLATE_RATING_PRIOR_MEAN", "3.0"))
+TEMPLATE_RATING_PRIOR_WEIGHT = float(os.getenv("TEMPLATE_RATING_PRIOR_WEIGHT", "5"))
+
+def unrated_rating_stats() -> Dict[str, Any]:
+    """
+    Stats for a template nobody has rated yet. The smoothed score is the prior
+    mean, so sort=rating places it among the ratings rather than after them.
+    """
+    return {"count": 0, "sum": 0, "mean": None, "bayesian_score": TEMPLATE_RATING_PRIOR_MEAN}
+
+def backfill_unrated_rating_stats():
+
+    for collection in (lfa_templates_collection, organization_templates_collection):
+        collection.update_many(
+            {"rating_stats.bayesian_score": {"$exists": False}},
+            {"$set": {"rating_stats": unrated_rating_stats()}}
+        )
 
 # LFA TEMPLATE LISTING API
 @app.get("/lfa/templates")
 def list_lfa_templates(
+    request: Request,
+    response: Response,
     theme: Optional[str] = None,
     system_level: Optional[str] = None,
-    geography_type: Optional[str] = None
+    geography_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+    sort: Optional[Literal["rating", "recent", "popular"]] = None
 ):
 
+    projection = build_projection(fields, view, LFATemplate, TEMPLATE_VIEWS)
+
     query = {"is_public": True}
 
     if theme:
@@ -1710,40 +4224,271 @@ def list_lfa_templates(
     if geography_type:
         query["geography_type"] = geography_type
 
-    templates = list(
-        lfa_templates_collection.find(query, {"_id": 0})
+    # Ratings and forks touch updated_at, so listing order and stats are covered
+    not_modified = conditional_get(
+        request,
+        response,
+        response_etag(request, latest_update(lfa_templates_collection, query)),
+        CACHE_POLICIES["reference"]
     )
+    if not_modified:
+        return not_modified
 
-    return {
+    cursor = lfa_templates_collection.find(query, projection)
+    if sort:
+        cursor = cursor.sort([TEMPLATE_SORTS[sort]])
+
+    templates = list(cursor)
+
+    return fast_json_response({
         "count": len(templates),
         "templates": templates
+    }, response)
+
+# Marketplace facets counted alongside discovery results
+TEMPLATE_FACET_FIELDS = ["theme", "system_level", "geography_type", "applicable_states", "rating_band"]
+
+RATING_BAND_EXPRESSION = {"$switch": {
+    "branches": [
+        {"case": {"$eq": [{"$ifNull": ["$rating_stats.mean", None]}, None]}, "then": "unrated"},
+        {"case": {"$lt": ["$rating_stats.mean", 2]}, "then": "1-2"},
+        {"case": {"$lt": ["$rating_stats.mean", 3]}, "then": "2-3"},
+        {"case": {"$lt": ["$rating_stats.mean", 4]}, "then": "3-4"}
+    ],
+    "default": "4-5"
+}}
+
+# LFA TEMPLATE FACETED DISCOVERY API
+@app.get("/lfa/templates/discover")
+def discover_lfa_templates(
+    theme: Optional[str] = None,
+    system_level: Optional[str] = None,
+    geography_type: Optional[str] = None,
+    state: Optional[str] = None,
+    rating_band: Optional[str] = None,
+    sort: Optional[Literal["rating", "recent", "popular"]] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100)
+):
+
+    projection = build_projection(fields, view, LFATemplate, TEMPLATE_VIEWS)
+
+    filters = {
+        "theme": theme,
+        "system_level": system_level,
+        "geography_type": geography_type,
+        "applicable_states": state,
+        "rating_band": rating_band
     }
+    filters = {field: value for field, value in filters.items() if value}
+
+    pipeline = [
+        {"$match": {"is_public": True}},
+        {"$addFields": {"rating_band": RATING_BAND_EXPRESSION}}
+    ]
+
+    results = [{"$match": filters}]
+    if sort:
+        field, direction = TEMPLATE_SORTS[sort]
+        results.append({"$sort": {field: direction}})
+    results.extend([
+        {"$skip": (page - 1) * page_size},
+        {"$limit": page_size},
+        {"$project": projection}
+    ])
+
+    # Disjunctive facets: each one counts under every filter except its own,
+    # so picking a theme still shows how many templates the other themes have
+    facets = {
+        field: [{"$match": {f: v for f, v in filters.items() if f != field}}]
+        + ([{"$unwind": f"${field}"}] if field == "applicable_states" else [])
+        + [
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}}
+        ]
+        for field in TEMPLATE_FACET_FIELDS
+    }
+
+    pipeline.append({"$facet": {
+        "results": results,
+        "total": [{"$match": filters}, {"$count": "count"}],
+        **facets
+    }})
+
+    outcome = next(lfa_templates_collection.aggregate(pipeline), {})
+
+    return fast_json_response({
+        "count": outcome["total"][0]["count"] if outcome.get("total") else 0,
+        "page": page,
+        "page_size": page_size,
+        "templates": outcome.get("results", []),
+        # Templates without the field are not a facet value
+        "facets": {
+            field: {row["_id"]: row["count"] for row in outcome.get(field, []) if row["_id"] is not None}
+            for field in TEMPLATE_FACET_FIELDS
+        }
+    })
 
 class ForkTemplateRequest(BaseModel):
     organization_id: str
     template_id: str
     new_name: str
 
+class TemplateOverridesRequest(BaseModel):
+    overrides: Dict[str, Any]  # nested; a null value removes the field from the base
+    revision: int  # fork revision the edit was made against
+
+class RebaseTemplateRequest(BaseModel):
+    base_template_id: Optional[str] = None  # defaults to the current base
+
+# -------------------- COPY-ON-WRITE TEMPLATE FORKS --------------------
+# A fork stores a reference to its marketplace base plus a sparse override
+# document. The effective template is materialized on read; base templates
+# must bump updated_at whenever their content changes, as listing ETags
+# already require. A fork records the content hash of the base it was
+# made against, so ratings and forks that also touch updated_at do not mark
+# it as behind.
+TEMPLATE_MATERIALIZATION_CACHE_SIZE = int(os.getenv("TEMPLATE_MATERIALIZATION_CACHE_SIZE", "512"))
+
+# Kept on the fork itself rather than inherited from the base
+FORK_OWN_FIELDS = [
+    "template_id", "name", "created_by", "is_public", "created_at",
+    "rating_stats", "fork_count"
+]
+
+def merge_overrides(base: Dict[str, Any], overrides: Dict[str, Any], keep_nulls: bool = False):
+
+    merged = dict(base)
+
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_overrides(merged[key], value, keep_nulls)
+        elif value is None and not keep_nulls:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+
+    return merged
+
+def prune_overrides(overrides: Dict[str, Any], base: Dict[str, Any]):
+    """
+    Drop overrides that the base already satisfies.
+    """
+    pruned = {}
+
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            nested = prune_overrides(value, base[key])
+            if nested:
+                pruned[key] = nested
+        elif value is None:
+            if key in base:
+                pruned[key] = None
+        elif base.get(key) != value:
+            pruned[key] = value
+
+    return pruned
+
+# Bookkeeping on the base that does not change what a fork inherits
+BASE_VOLATILE_FIELDS = {"_id", "rating_stats", "fork_count", "updated_at", "revision"}
+
+def template_content_hash(base: Dict[str, Any]) -> str:
+
+    content = {k: v for k, v in base.items() if k not in BASE_VOLATILE_FIELDS}
+
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+def load_base_template(template_id: str, projection=None):
+
+    base = lfa_templates_collection.find_one(
+        {"template_id": template_id},
+        projection or {"_id": 0, "rating_stats": 0, "fork_count": 0}
+    )
+
+    if not base:
+        raise HTTPException(status_code=404, detail="Base template not found")
+
+    return base
+
+_materialized_templates = OrderedDict()
+_materialized_templates_lock = threading.Lock()
+
+def materialize_template(template: Dict[str, Any]) -> Dict[str, Any]:
+
+    # Standalone templates and full copies made before forks were sparse
+    if not template.get("base_template_id"):
+        return template
+
+    base_id = template["base_template_id"]
+    base_updated_at = load_base_template(base_id, {"_id": 0, "updated_at": 1}).get("updated_at")
+
+    key = (template["template_id"], template.get("revision", 0), base_id, base_updated_at)
+
+    with _materialized_templates_lock:
+        cached = _materialized_templates.get(key)
+        if cached is not None:
+            _materialized_templates.move_to_end(key)
+
+    if cached is None:
+        base = load_base_template(base_id)
+        content = merge_overrides(base, template.get("overrides", {}))
+        for field in BASE_VOLATILE_FIELDS:
+            content.pop(field, None)
+        cached = (content, template_content_hash(base))
+
+        with _materialized_templates_lock:
+            _materialized_templates[key] = cached
+            if len(_materialized_templates) > TEMPLATE_MATERIALIZATION_CACHE_SIZE:
+                _materialized_templates.popitem(last=False)
+
+    content, base_hash = cached
+
+    return {
+        **content,
+        **{field: template[field] for field in FORK_OWN_FIELDS if field in template},
+        "base_template_id": base_id,
+        # Forks made before base hashes were recorded count as current
+        "behind_base": template.get("base_hash", base_hash) != base_hash,
+        "revision": template.get("revision", 0)
+    }
+
+def load_organization_template(template_id: str):
+
+    template = organization_templates_collection.find_one({"template_id": template_id}, {"_id": 0})
+
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    return template
+
 # LFA TEMPLATE FORKING API
 @app.post("/lfa/templates/fork")
 def fork_lfa_template(payload: ForkTemplateRequest):
 
-    base_template = lfa_templates_collection.find_one(
-        {"template_id": payload.template_id},
-        {"_id": 0}
-    )
-
-    if not base_template:
-        raise HTTPException(status_code=404, detail="Template not found")
-
-    forked_template = base_template.copy()
-    forked_template["template_id"] = f"{payload.organization_id}_{int(datetime.now(timezone.utc).timestamp())}"
-    forked_template["name"] = payload.new_name
-    forked_template["created_by"] = payload.organization_id
-    forked_template["is_public"] = False
-    forked_template["created_at"] = datetime.utcnow()
+    base_template = load_base_template(payload.template_id)
+
+    forked_template = {
+        "template_id": f"{payload.organization_id}_{int(datetime.now(timezone.utc).timestamp())}",
+        "base_template_id": payload.template_id,
+        "base_hash": template_content_hash(base_template),
+        "overrides": {},
+        "revision": 0,
+        "name": payload.new_name,
+        "created_by": payload.organization_id,
+        "is_public": False,
+        "created_at": datetime.utcnow(),
+        "rating_stats": unrated_rating_stats()
+    }
 
     organization_templates_collection.insert_one(forked_template)
+    index_search_artifact(payload.organization_id, "template", forked_template)
+
+    lfa_templates_collection.update_one(
+        {"template_id": payload.template_id},
+        {"$inc": {"fork_count": 1}, "$currentDate": {"updated_at": True}}
+    )
 
     return {
         "message": "Template forked successfully",
@@ -1754,7 +4499,10 @@ def fork_lfa_template(payload: ForkTemplateRequest):
 @app.post("/lfa/templates/save")
 def save_custom_template(template: LFATemplate):
 
-    organization_templates_collection.insert_one(template.dict())
+    doc = template.dict(exclude={"rating_stats", "fork_count"})
+    doc["rating_stats"] = unrated_rating_stats()
+    organization_templates_collection.insert_one(doc)
+    index_search_artifact(template.created_by, "template", doc)
 
     return {
         "message": "Custom template saved successfully",
@@ -1780,19 +4528,196 @@ class TemplateRatingRequest(BaseModel):
     organization_id: str
     rating: int = Field(..., ge=1, le=5)
 
+def rating_stats_update(count_delta: int, sum_delta: float):
+    """
+    Update pipeline applying a rating change to a template's running aggregates
+    and re-deriving the mean and smoothed score in the same atomic write.
+    """
+    prior_total = TEMPLATE_RATING_PRIOR_MEAN * TEMPLATE_RATING_PRIOR_WEIGHT
+
+    return [
+        {"$set": {
+            "rating_stats.count": {"$add": [{"$ifNull": ["$rating_stats.count", 0]}, count_delta]},
+            "rating_stats.sum": {"$add": [{"$ifNull": ["$rating_stats.sum", 0]}, sum_delta]}
+        }},
+        {"$set": {
+            "rating_stats.mean": {"$cond": [
+                {"$gt": ["$rating_stats.count", 0]},
+                {"$divide": ["$rating_stats.sum", "$rating_stats.count"]},
+                None
+            ]},
+            "rating_stats.bayesian_score": {"$divide": [
+                {"$add": [prior_total, "$rating_stats.sum"]},
+                {"$add": [TEMPLATE_RATING_PRIOR_WEIGHT, "$rating_stats.count"]}
+            ]},
+            "updated_at": "$$NOW"
+        }}
+    ]
+
+def apply_rating_stats(template_id: str, count_delta: int, sum_delta: float):
+
+    update = rating_stats_update(count_delta, sum_delta)
+
+    # Marketplace and organization templates share the rating API
+    for collection in (lfa_templates_collection, organization_templates_collection):
+        collection.update_one({"template_id": template_id}, update)
+
+def dedupe_template_ratings():
+    """
+    Keep only the latest rating per organization per template.
+    """
+    pipeline = [
+        {"$sort": {"rated_at": -1}},
+        {"$group": {
+            "_id": {"template_id": "$template_id", "organization_id": "$organization_id"},
+            "ids": {"$push": "$_id"}
+        }},
+        {"$match": {"ids.1": {"$exists": True}}}
+    ]
+
+    for row in template_ratings_collection.aggregate(pipeline, allowDiskUse=True):
+        template_ratings_collection.delete_many({"_id": {"$in": row["ids"][1:]}})
+
+def rebuild_template_rating_stats():
+
+    pipeline = [
+        {"$group": {"_id": "$template_id", "count": {"$sum": 1}, "sum": {"$sum": "$rating"}}}
+    ]
+
+    for collection in (lfa_templates_collection, organization_templates_collection):
+        collection.update_many({}, {"$unset": {"rating_stats": ""}})
+
+    for row in template_ratings_collection.aggregate(pipeline, allowDiskUse=True):
+        apply_rating_stats(row["_id"], row["count"], row["sum"])
+
 # LFA TEMPLATE RATING API
 @app.post("/lfa/templates/rate")
 def rate_template(payload: TemplateRatingRequest):
 
-    template_ratings_collection.insert_one({
-        "template_id": payload.template_id,
-        "organization_id": payload.organization_id,
-        "rating": payload.rating,
-        "rated_at": datetime.utcnow()
-    })
+    template_exists = any(
+        collection.count_documents({"template_id": payload.template_id}, limit=1)
+        for collection in (lfa_templates_collection, organization_templates_collection)
+    )
+
+    if not template_exists:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    def upsert_rating():
+        return template_ratings_collection.find_one_and_update(
+            {"template_id": payload.template_id, "organization_id": payload.organization_id},
+            {"$set": {"rating": payload.rating, "rated_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    # One rating per organization per template; a concurrent first rating loses the upsert race once
+    try:
+        previous = upsert_rating()
+    except DuplicateKeyError:
+        previous = upsert_rating()
+
+    if previous:
+        apply_rating_stats(payload.template_id, 0, payload.rating - previous["rating"])
+    else:
+        apply_rating_stats(payload.template_id, 1, payload.rating)
 
     return {"message": "Rating submitted"}
 
+# LFA TEMPLATE DETAIL API
+@app.get("/lfa/templates/{template_id}")
+def get_lfa_template(template_id: str):
+
+    template = organization_templates_collection.find_one({"template_id": template_id}, {"_id": 0})
+
+    if template:
+        return materialize_template(template)
+
+    return load_base_template(template_id, {"_id": 0})
+
+# LFA TEMPLATE FORK OVERRIDES API
+@app.patch("/lfa/templates/{template_id}/overrides")
+def update_template_overrides(template_id: str, payload: TemplateOverridesRequest):
+
+    template = load_organization_template(template_id)
+
+    if not template.get("base_template_id"):
+        raise HTTPException(status_code=400, detail="Template is not a fork")
+
+    overrides = merge_overrides(template.get("overrides", {}), payload.overrides, keep_nulls=True)
+
+    result = organization_templates_collection.update_one(
+        {"template_id": template_id, "revision": payload.revision},
+        {"$set": {"overrides": overrides}, "$inc": {"revision": 1}}
+    )
+
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Template was modified concurrently")
+
+    template.update(overrides=overrides, revision=payload.revision + 1)
+    index_search_artifact(template["created_by"], "template", template)
+
+    return {
+        "message": "Template overrides updated",
+        "revision": payload.revision + 1
+    }
+
+# LFA TEMPLATE FORK REBASE API
+@app.post("/lfa/templates/{template_id}/rebase")
+def rebase_template(template_id: str, payload: RebaseTemplateRequest):
+
+    template = load_organization_template(template_id)
+
+    if not template.get("base_template_id"):
+        raise HTTPException(status_code=400, detail="Template is not a fork")
+
+    base_id = payload.base_template_id or template["base_template_id"]
+    base = load_base_template(base_id)
+
+    overrides = prune_overrides(template.get("overrides", {}), base)
+    revision = template.get("revision", 0)
+    base_hash = template_content_hash(base)
+
+    result = organization_templates_collection.update_one(
+        {"template_id": template_id, "revision": revision},
+        {
+            "$set": {
+                "base_template_id": base_id,
+                "base_hash": base_hash,
+                "overrides": overrides
+            },
+            "$inc": {"revision": 1}
+        }
+    )
+
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Template was modified concurrently")
+
+    if base_id != template["base_template_id"]:
+        lfa_templates_collection.update_one(
+            {"template_id": template["base_template_id"]},
+            {"$inc": {"fork_count": -1}, "$currentDate": {"updated_at": True}}
+        )
+        lfa_templates_collection.update_one(
+            {"template_id": base_id},
+            {"$inc": {"fork_count": 1}, "$currentDate": {"updated_at": True}}
+        )
+
+    template.update(
+        base_template_id=base_id,
+        base_hash=base_hash,
+        overrides=overrides,
+        revision=revision + 1
+    )
+    index_search_artifact(template["created_by"], "template", template)
+
+    return {
+        "message": "Template rebased",
+        "base_template_id": base_id,
+        "base_hash": base_hash,
+        "overrides": overrides,
+        "revision": revision + 1
+    }
+
 # --------------------  EXPORT & INTEGRATION ENGINE --------------------
 EXPORT_TYPES = [
     "LFA_PDF",
@@ -1805,8 +4730,9 @@ EXPORT_TYPES = [
 class ExportRequest(BaseModel):
     organization_id: str
     export_type: str
-    lfa_snapshot: Dict[str, Any]
+    lfa_snapshot: Optional[Dict[str, Any]] = None  # defaults to the materialized snapshot
 
+@traced("render.lfa_pdf")
 def generate_lfa_pdf(lfa_snapshot):
 
     file_path = f"/tmp/LFA_{int(datetime.now(timezone.utc).timestamp())}.pdf"
@@ -1826,6 +4752,7 @@ def generate_lfa_pdf(lfa_snapshot):
     doc.build(content)
     return file_path
 
+@traced("render.toc_diagram")
 def generate_toc_diagram(toc: dict):
 
     G = nx.DiGraph()
@@ -1892,6 +4819,7 @@ def generate_toc_diagram(toc: dict):
 
     return file_path
 
+@traced("render.indicator_excel")
 def generate_indicator_excel(measurement):
 
     file_path = f"/tmp/Indicators_{int(datetime.now(timezone.utc).timestamp())}.xlsx"
@@ -1901,7 +4829,23 @@ def generate_indicator_excel(measurement):
 
     ws.append(["Outcome", "Indicator", "Baseline", "Target", "Timeline"])
 
+    targets = {
+        t.get("indicator_name"): t
+        for t in measurement.get("targets", [])
+        if isinstance(t, dict)
+    }
+
     for item in measurement.get("indicators", []):
+        # The materialized snapshot stores indicator names; targets carry the numbers
+        if isinstance(item, str):
+            target = targets.get(item, {})
+            item = {
+                "indicator": item,
+                "baseline": target.get("baseline"),
+                "target": target.get("target"),
+                "timeline": target.get("end_date")
+            }
+
         ws.append([
             item.get("outcome"),
             item.get("indicator"),
@@ -1913,6 +4857,7 @@ def generate_indicator_excel(measurement):
     wb.save(file_path)
     return file_path
 
+@traced("render.budget_template")
 def generate_budget_template():
 
     file_path = f"/tmp/Budget_{int(datetime.now(timezone.utc).timestamp())}.xlsx"
@@ -1925,6 +4870,7 @@ def generate_budget_template():
     wb.save(file_path)
     return file_path
 
+@traced("render.presentation")
 def generate_presentation(lfa_snapshot):
 
     file_path = f"/tmp/Program_Overview_{int(datetime.now(timezone.utc).timestamp())}.pptx"
@@ -1964,6 +4910,10 @@ def handle_export(export_type, lfa_snapshot):
 
     raise HTTPException(status_code=400, detail="Unsupported export type")
 
+export_duration = register_metric(Histogram(
+    "export_duration_seconds", "Time spent rendering export files", ("export_type",)
+))
+
 # EXPORT API
 @app.post("/export")
 def export_lfa(payload: ExportRequest):
@@ -1971,7 +4921,11 @@ def export_lfa(payload: ExportRequest):
     if payload.export_type not in EXPORT_TYPES:
         raise HTTPException(status_code=400, detail="Invalid export type")
 
-    file_path = handle_export(payload.export_type, payload.lfa_snapshot)
+    lfa_snapshot = resolve_lfa_snapshot(payload.organization_id, payload.lfa_snapshot)
+
+    start = time.perf_counter()
+    file_path = handle_export(payload.export_type, lfa_snapshot)
+    export_duration.observe(time.perf_counter() - start, payload.export_type)
 
     export_jobs_collection.insert_one({
         "organization_id": payload.organization_id,
@@ -1986,9 +4940,255 @@ def export_lfa(payload: ExportRequest):
         media_type="application/octet-stream"
     )
 
+# -------------------- BATCH API --------------------
+# Sub-requests are dispatched straight into app.router as ASGI calls, so they
+# skip the HTTP stack and the middleware; the batch response as a whole goes
+# through translation once. "${op_id.field.0.name}" inside a path, query or
+# body value is replaced with that field of an earlier operation's response
+# and makes the operation wait for it. Independent operations run concurrently.
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "20"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_FORWARDED_HEADERS = {"authorization", "x-admin-token"}
+
+BATCH_REFERENCE_PATTERN = re.compile(r"\$\{([A-Za-z0-9_-]+)((?:\.[^.}]+)*)\}")
+
+class BatchOperation(BaseModel):
+    id: str = Field(..., pattern=r"^[A-Za-z0-9_-]+$")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "POST"
+    path: str
+    query: Dict[str, Any] = {}
+    body: Optional[Any] = None
+    depends_on: List[str] = []  # ordering without a data reference
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=BATCH_MAX_OPERATIONS)
+
+def batch_references(value: Any) -> set:
+
+    if isinstance(value, str):
+        return {match.group(1) for match in BATCH_REFERENCE_PATTERN.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(batch_references(v) for v in value.values())) if value else set()
+    if isinstance(value, list):
+        return set().union(*(batch_references(v) for v in value)) if value else set()
+
+    return set()
+
+def lookup_batch_reference(results: Dict[str, Any], op_id: str, path: str) -> Any:
+
+    value = results[op_id]["body"]
+
+    for part in filter(None, path.split(".")):
+        try:
+            value = value[int(part)] if isinstance(value, list) else value[part]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Reference ${{{op_id}{path}}} not found in response"
+            )
+
+    return value
+
+def resolve_batch_references(value: Any, results: Dict[str, Any]) -> Any:
+
+    if isinstance(value, str):
+        whole = BATCH_REFERENCE_PATTERN.fullmatch(value)
+        if whole:
+            return lookup_batch_reference(results, whole.group(1), whole.group(2))
+        return BATCH_REFERENCE_PATTERN.sub(
+            lambda match: str(lookup_batch_reference(results, match.group(1), match.group(2))),
+            value
+        )
+    if isinstance(value, dict):
+        return {k: resolve_batch_references(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve_batch_references(v, results) for v in value]
+
+    return value
+
+async def dispatch_batch_operation(request: Request, method: str, path: str, query: Dict[str, Any], body: Any):
+
+    # A query string written into the path is kept, ahead of the query dict
+    url = urlsplit(path)
+    query_string = "&".join(filter(None, [url.query, urlencode(query, doseq=True)]))
+
+    payload = b"" if body is None else json_dumps(body)
+
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(payload)).encode())
+    ] + [
+        (name.encode(), value.encode())
+        for name, value in request.headers.items()
+        if name in BATCH_FORWARDED_HEADERS
+    ]
+
+    scope = {
+        # Exception handlers and FastAPI's per-request state come from the batch request
+        **{k: v for k, v in request.scope.items() if k.startswith(("starlette.", "fastapi"))},
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": method,
+        "scheme": request.url.scheme,
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "root_path": request.scope.get("root_path", ""),
+        "query_string": query_string.encode(),
+        "headers": headers,
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+        "app": app
+    }
+
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    response = {"status": 500, "headers": {}, "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app.router(scope, receive, send)
+
+    content_type = response["headers"].get("content-type", "")
+
+    if "application/json" in content_type and response["body"]:
+        parsed = json_loads(response["body"])
+    else:
+        parsed = None
+
+    return {"status": response["status"], "content_type": content_type, "body": parsed}
+
+# BATCH API
+@app.post("/batch")
+async def run_batch(payload: BatchRequest, request: Request):
+
+    positions = {}
+    dependencies = {}
+
+    for position, op in enumerate(payload.operations):
+        if op.id in positions:
+            raise HTTPException(status_code=400, detail=f"Duplicate operation id '{op.id}'")
+        if urlsplit(op.path).path.rstrip("/") == "/batch":
+            raise HTTPException(status_code=400, detail="Batches cannot be nested")
+
+        deps = set(op.depends_on) | batch_references([op.path, op.query, op.body])
+        for dep in deps:
+            if dep not in positions:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Operation '{op.id}' references '{dep}', which is not an earlier operation"
+                )
+
+        positions[op.id] = position
+        dependencies[op.id] = deps
+
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    results: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(op: BatchOperation):
+
+        for dep in dependencies[op.id]:
+            await tasks[dep]
+
+        failed = [dep for dep in dependencies[op.id] if results[dep]["status"] >= 400]
+        if failed:
+            results[op.id] = {
+                "status": 424,
+                "body": {"detail": f"Dependency failed: {', '.join(sorted(failed))}"}
+            }
+            return
+
+        op_start = time.perf_counter()
+
+        try:
+            path, query, body = resolve_batch_references([op.path, op.query, op.body], results)
+            async with semaphore:
+                outcome = await dispatch_batch_operation(request, op.method, path, query, body)
+        except HTTPException as e:
+            outcome = {"status": e.status_code, "body": {"detail": e.detail}}
+        except Exception:
+            outcome = {"status": 500, "body": {"detail": "Internal Server Error"}}
+
+        results[op.id] = {**outcome, "took_ms": round((time.perf_counter() - op_start) * 1000, 3)}
+
+    for op in payload.operations:
+        tasks[op.id] = asyncio.ensure_future(run(op))
+
+    await asyncio.gather(*tasks.values())
+
+    return {
+        "results": [{"id": op.id, **results[op.id]} for op in payload.operations],
+        "took_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+
 # -------------------- Multi Lingual Support--------------------
 translator = Translator()
 
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "10000"))
+
+_translation_cache = OrderedDict()
+_translation_cache_lock = threading.Lock()
+
+translation_duration = register_metric(Histogram(
+    "translation_duration_seconds", "Latency of translation API calls", ("language",)
+))
+translation_errors = register_metric(Counter(
+    "translation_errors_total", "Failed translation API calls", ("language",)
+))
+translation_cache_lookups = register_metric(Counter(
+    "translation_cache_lookups_total", "Translation cache lookups", ("result",)
+))
+
+def language_label(language: str) -> str:
+    # ?language= is caller-supplied; unknown codes share one series
+    return language if language in LANGUAGES else "other"
+
+def translate_text(text: str, target_lang: str) -> str:
+
+    key = (target_lang, text)
+
+    with _translation_cache_lock:
+        cached = _translation_cache.get(key)
+        if cached is not None:
+            _translation_cache.move_to_end(key)
+
+    if cached is not None:
+        translation_cache_lookups.inc("hit")
+        return cached
+
+    translation_cache_lookups.inc("miss")
+    start = time.perf_counter()
+
+    try:
+        with trace_span("translation.text", language=target_lang, chars=len(text)):
+            translated = translator.translate(text, dest=target_lang).text
+    except Exception:
+        translation_errors.inc(language_label(target_lang))
+        return text
+    finally:
+        translation_duration.observe(time.perf_counter() - start, language_label(target_lang))
+
+    with _translation_cache_lock:
+        _translation_cache[key] = translated
+        if len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+            _translation_cache.popitem(last=False)
+
+    return translated
+
 def translate_object(obj: Any, target_lang: str = "en") -> Any:
     """
     Recursively translate all strings in dict, list, or str.
@@ -1996,10 +5196,7 @@ def translate_object(obj: Any, target_lang: str = "en") -> Any:
     if isinstance(obj, str):
         if target_lang == "en":
             return obj
-        try:
-            return translator.translate(obj, dest=target_lang).text
-        except Exception:
-            return obj
+        return translate_text(obj, target_lang)
     elif isinstance(obj, dict):
         return {k: translate_object(v, target_lang) for k, v in obj.items()}
     elif isinstance(obj, list):
@@ -2028,17 +5225,471 @@ async def translate_middleware(request: Request, call_next):
     if "application/json" in response.headers.get("content-type", ""):
         body = [section async for section in response.body_iterator]
         if body:
-            raw = b"".join(body).decode()
+            raw = b"".join(body)
+            # Keep ETag, Cache-Control etc.; the length is recomputed
+            headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+            if language == "en":
+                return Response(content=raw, status_code=response.status_code, headers=headers)
             try:
-                data = json.loads(raw)
-            except json.JSONDecodeError:
-                return response
-            translated = translate_response(data, language)
-            return JSONResponse(content=translated, status_code=response.status_code)
+                data = json_loads(raw)
+            except ValueError:
+                return Response(content=raw, status_code=response.status_code, headers=headers)
+            with trace_span("translation.response", language=language):
+                translated = translate_response(data, language)
+            return FastJSONResponse(content=translated, status_code=response.status_code, headers=headers)
     
     # 4️⃣ For non-JSON responses, return as-is
     return response
 
+# -------------------- IDEMPOTENCY KEYS --------------------
+# Registered after the translation middleware so it wraps it: a replayed
+# response is the already-translated body and costs a single lookup.
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+_idempotency_locks = weakref.WeakValueDictionary()
+
+def idempotency_client(request: Request) -> str:
+    """
+    Keys are scoped per caller: the credential when one is sent, otherwise the
+    originating address. Only a digest is stored.
+    """
+    identity = (
+        request.headers.get("Authorization")
+        or request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
+        or (request.client.host if request.client else "")
+    )
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+@app.middleware("http")
+async def idempotency_middleware(request: Request, call_next):
+
+    key = request.headers.get("Idempotency-Key")
+
+    if not key or request.method != "POST":
+        return await call_next(request)
+
+    scope = {
+        "key": key,
+        "client": idempotency_client(request),
+        "path": request.url.path,
+        "query": request.url.query
+    }
+    body_hash = hashlib.sha256(await request.body()).hexdigest()
+
+    lock_key = (scope["client"], key)
+    lock = _idempotency_locks.get(lock_key)
+    if lock is None:
+        lock = _idempotency_locks.setdefault(lock_key, asyncio.Lock())
+
+    # Concurrent retries with the same key wait for the first one to finish
+    async with lock:
+        stored = await run_in_threadpool(
+            idempotency_keys_collection.find_one, scope, {"_id": 0}
+        )
+
+        if stored and stored.get("body_hash") != body_hash:
+            return JSONResponse(
+                status_code=422,
+                content={"detail": "Idempotency-Key was already used with a different request body"}
+            )
+
+        if stored:
+            return Response(
+                content=stored["body"],
+                status_code=stored["status_code"],
+                media_type=stored["media_type"],
+                headers={"Idempotent-Replayed": "true"}
+            )
+
+        response = await call_next(request)
+        content_type = response.headers.get("content-type", "")
+
+        if not (200 <= response.status_code < 300 and "application/json" in content_type):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+
+        await run_in_threadpool(
+            idempotency_keys_collection.update_one,
+            scope,
+            {"$setOnInsert": {
+                "body_hash": body_hash,
+                "status_code": response.status_code,
+                "media_type": content_type,
+                "body": body,
+                "created_at": utc_now()
+            }},
+            upsert=True
+        )
+
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=dict(response.headers)
+        )
+
+# -------------------- RESPONSE COMPRESSION --------------------
+# Registered after the idempotency and translation middleware so it wraps
+# them: replays and translations work on plain bodies and only the bytes on
+# the wire are encoded. A 304 from conditional_get has no body or content type
+# and passes through unencoded. Metrics, profiling and tracing wrap this layer.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "image/svg+xml")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+
+    accepted = {}
+
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in (["br"] if brotli else []) + ["gzip"]:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+
+    return None
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+@app.middleware("http")
+async def compression_middleware(request: Request, call_next):
+
+    response = await call_next(request)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    content_type = response.headers.get("content-type", "")
+
+    if (
+        not encoding
+        or "content-encoding" in response.headers
+        or not content_type.startswith(COMPRESSIBLE_TYPES)
+    ):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return Response(content=body, status_code=response.status_code, headers=headers)
+
+    headers["Content-Encoding"] = encoding
+    headers["Vary"] = ", ".join(filter(None, [headers.pop("vary", ""), "Accept-Encoding"]))
+    if headers.get("etag", "").startswith('"'):
+        headers["etag"] = f"W/{headers['etag']}"
+
+    compressed = await run_in_threadpool(compress_body, body, encoding)
+
+    return Response(content=compressed, status_code=response.status_code, headers=headers)
+
+# -------------------- REQUEST METRICS --------------------
+# Wraps compression, idempotency and translation, so latency covers them.
+# Profiling and tracing wrap this layer and their overhead is not counted,
+# which keeps a profiled request from skewing the histogram. Routes are
+# labelled by their path template to keep label cardinality bounded.
+http_requests = register_metric(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+http_request_duration = register_metric(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+))
+
+_requests_in_progress = {"count": 0}
+
+def executor_queue_depths():
+
+    depths = {}
+
+    executors = {
+        "quality_rules": lfa_scoring._quality_rule_executor,
+        "process_pool": _process_pool
+    }
+
+    for name, executor in executors.items():
+        if executor is not None:
+            depths[(name,)] = executor.pending_tasks
+
+    return depths
+
+def threadpool_usage():
+    # Sync routes run on AnyIO's default thread limiter; sampled on the event loop
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    return {
+        ("borrowed",): statistics.borrowed_tokens,
+        ("total",): limiter.total_tokens,
+        ("waiting",): statistics.tasks_waiting
+    }
+
+register_metric(Gauge(
+    "http_requests_in_progress", "Requests currently being served",
+    collect=lambda: {(): _requests_in_progress["count"]}
+))
+register_metric(Gauge(
+    "executor_queue_depth", "Tasks submitted to background executors and not yet finished", ("executor",),
+    collect=executor_queue_depths
+))
+register_metric(Gauge(
+    "threadpool_threads", "AnyIO worker thread usage for sync routes", ("state",),
+    collect=threadpool_usage
+))
+register_metric(Gauge(
+    "translation_cache_entries", "Entries in the translation cache",
+    collect=lambda: {(): len(_translation_cache)}
+))
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+
+    if not METRICS_ENABLED:
+        return await call_next(request)
+
+    _requests_in_progress["count"] += 1
+    start = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        _requests_in_progress["count"] -= 1
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        http_request_duration.observe(time.perf_counter() - start, request.method, path)
+        http_requests.inc(request.method, path, status)
+
+# PROMETHEUS METRICS API
+@app.get("/metrics")
+async def metrics():
+    lines = [line for metric in METRICS for line in metric.render()]
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+# -------------------- REQUEST PROFILING --------------------
+# An admin request carrying `X-Profile: 1` runs under the profiling module's
+# stack sampler. Only one request is profiled at a time, but other requests
+# served meanwhile are sampled too: a thread cannot be attributed to a request
+# from outside it, so profiles are marked "scope": "process" and record how
+# many other requests were in flight.
+_profile_lock = threading.Lock()
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+
+    if not request.headers.get("X-Profile"):
+        return await call_next(request)
+
+    if not is_admin_token(request.headers.get("X-Admin-Token")):
+        return JSONResponse(status_code=403, content={"detail": "Admin token required"})
+
+    if not _profile_lock.acquire(blocking=False):
+        return JSONResponse(status_code=409, content={"detail": "Another request is being profiled"})
+
+    sampler = StackSampler(PROFILE_INTERVAL_SECONDS)
+    start = time.perf_counter()
+    # The metrics middleware is inside this one, so this request is not counted yet
+    concurrent_requests = _requests_in_progress["count"]
+
+    try:
+        sampler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            # stop() joins the sampler thread, so keep it off the event loop
+            await run_in_threadpool(sampler.stop)
+    finally:
+        _profile_lock.release()
+
+    route = request.scope.get("route")
+    profile_id = uuid.uuid4().hex
+    document = {
+        "profile_id": profile_id,
+        "method": request.method,
+        "path": request.url.path,
+        "query": str(request.url.query),
+        "route": getattr(route, "path", None),
+        "status_code": response.status_code,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        "trace_id": current_trace_id(),
+        "created_at": utc_now(),
+        # Samples cover every thread in the worker, not just this request's
+        "scope": "process",
+        "concurrent_requests": concurrent_requests if METRICS_ENABLED else None,
+        **sampler.report()
+    }
+    await run_in_threadpool(profiles_collection.insert_one, document)
+
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+@app.get("/debug/profiles", dependencies=[Depends(require_admin)])
+def list_profiles(
+    route: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    query = {"route": route} if route else {}
+    profiles = profiles_collection.find(
+        query,
+        {"_id": 0, "stacks": 0, "cumulative_functions": 0, "hot_lines": 0}
+    ).sort("created_at", -1).limit(limit)
+
+    return {"profiles": [
+        {**profile, "hot_functions": profile.get("hot_functions", [])[:5]}
+        for profile in profiles
+    ]}
+
+@app.get("/debug/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str, format: Literal["json", "folded"] = "json"):
+
+    profile = profiles_collection.find_one({"profile_id": profile_id}, {"_id": 0})
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "folded":
+        folded = "\n".join(f"{entry['stack']} {entry['samples']}" for entry in profile["stacks"])
+        return Response(content=folded + "\n", media_type="text/plain")
+
+    return profile
+
+# -------------------- MEMORY DIAGNOSTICS --------------------
+# tracemalloc snapshots held in process so growth between two points (e.g.
+# before and after a batch of exports or translated requests) can be diffed.
+# Tracing is started by the first snapshot and slows allocations while on;
+# DELETE /debug/memory turns it off again. Starting, snapshotting and
+# stopping share one lock so a stop cannot land mid-snapshot. Diagnostics
+# are per worker process, like the caches they are usually chasing.
+MEMORY_SNAPSHOT_LIMIT = 5
+
+_memory_snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_memory_snapshots_lock = threading.Lock()
+
+def memory_state() -> Dict[str, Any]:
+    traced, peak = tracemalloc.get_traced_memory()
+    return {
+        "traced_kib": round(traced / 1024, 1),
+        "peak_kib": round(peak / 1024, 1),
+        "gc_objects": len(gc.get_objects()),
+        "open_matplotlib_figures": len(plt.get_fignums()),
+        "translation_cache_entries": len(_translation_cache)
+    }
+
+@app.post("/debug/memory/snapshots", dependencies=[Depends(require_admin)])
+def create_memory_snapshot(key_type: Literal["lineno", "traceback"] = "lineno"):
+
+    snapshot_id = uuid.uuid4().hex
+
+    with _memory_snapshots_lock:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+        snapshot = take_memory_snapshot()
+        state = memory_state()
+
+        _memory_snapshots[snapshot_id] = {
+            "snapshot": snapshot,
+            "created_at": utc_now(),
+            "state": state
+        }
+        while len(_memory_snapshots) > MEMORY_SNAPSHOT_LIMIT:
+            _memory_snapshots.popitem(last=False)
+
+    return {
+        "snapshot_id": snapshot_id,
+        "tracing_started": started,
+        **state,
+        "top": [
+            format_memory_stat(stat, key_type)
+            for stat in snapshot.statistics(key_type)[:MEMORY_TOP_STATS]
+        ]
+    }
+
+@app.get("/debug/memory/snapshots", dependencies=[Depends(require_admin)])
+def list_memory_snapshots():
+    with _memory_snapshots_lock:
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "snapshots": [
+                {"snapshot_id": snapshot_id, "created_at": entry["created_at"], **entry["state"]}
+                for snapshot_id, entry in _memory_snapshots.items()
+            ]
+        }
+
+@app.get("/debug/memory/diff", dependencies=[Depends(require_admin)])
+def diff_memory_snapshots(
+    base: str,
+    target: Optional[str] = Query(None, description="Snapshot id; defaults to a fresh snapshot"),
+    key_type: Literal["lineno", "traceback"] = "lineno"
+):
+    with _memory_snapshots_lock:
+        base_entry = _memory_snapshots.get(base)
+        target_entry = _memory_snapshots.get(target) if target else None
+
+        if base_entry is None or (target and target_entry is None):
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        if target_entry is None and not tracemalloc.is_tracing():
+            raise HTTPException(status_code=409, detail="tracemalloc is not running")
+
+        target_snapshot = target_entry["snapshot"] if target_entry else take_memory_snapshot()
+        target_state = target_entry["state"] if target_entry else memory_state()
+
+    stats = target_snapshot.compare_to(base_entry["snapshot"], key_type)
+
+    return {
+        "base": base,
+        "target": target,
+        "size_diff_kib": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+        "gc_objects_diff": target_state["gc_objects"] - base_entry["state"]["gc_objects"],
+        "open_matplotlib_figures": target_state["open_matplotlib_figures"],
+        "top": [format_memory_stat(stat, key_type) for stat in stats[:MEMORY_TOP_STATS]]
+    }
+
+@app.delete("/debug/memory", dependencies=[Depends(require_admin)])
+def stop_memory_tracing():
+    with _memory_snapshots_lock:
+        _memory_snapshots.clear()
+        tracemalloc.stop()
+    return {"tracing": False}
+
+# -------------------- REQUEST TRACING --------------------
+# Registered last so the root span is the outermost layer and every other
+# middleware, route and background thread inherits it through contextvars.
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+
+    root = start_root_span(f"{request.method} {request.url.path}", request.headers.get("traceparent"))
+    root.attributes.update({"http.method": request.method, "http.target": request.url.path})
+    token = current_span.set(root)
+
+    try:
+        response = await call_next(request)
+        root.attributes["http.status_code"] = response.status_code
+        response.headers["X-Trace-Id"] = root.trace_id
+        return response
+    except Exception as e:
+        root.error = repr(e)
+        raise
+    finally:
+        current_span.reset(token)
+        route = request.scope.get("route")
+        if route is not None:
+            root.name = f"{request.method} {route.path}"
+        if root.sampled:
+            root.end()
+            export_trace(root.finished)
+
 # Translation Test Endpoint 
 @app.get("/test-translation")
 async def test_translation(language: str = Query("en", description="Target language for translation")):
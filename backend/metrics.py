@@ -0,0 +1,173 @@
+"""
+Prometheus metrics.
+
+An in-process registry: counters and histograms are label-keyed dicts behind
+a lock, and gauges are sampled by callbacks at scrape time. main imports this
+before creating the Mongo client so the command listener sees every operation.
+"""
+import bisect
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from pymongo import monitoring
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        if not METRICS_ENABLED:
+            return
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in self.values.items():
+                lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: Dict[tuple, List[float]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        if not METRICS_ENABLED:
+            return
+        position = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(label_values)
+            if series is None:
+                series = self.values[label_values] = [0] * (len(self.buckets) + 2)
+            series[position] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in self.values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    labels = format_labels(self.labels + ("le",), label_values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Gauge:
+
+    def __init__(self, name: str, help_text: str, labels=(), collect=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.collect = collect  # () -> {label values: value}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self.collect()
+        except Exception:
+            samples = {}
+        for label_values, value in samples.items():
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class TrackedExecutor:
+    """
+    Executor mixin counting tasks submitted and not yet finished, so depth
+    gauges do not read the pools' private queues. map() goes through submit().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending_tasks = 0
+        self._pending_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = super().submit(fn, *args, **kwargs)
+        with self._pending_lock:
+            self.pending_tasks += 1
+        future.add_done_callback(self._task_finished)
+        return future
+
+    def _task_finished(self, future):
+        with self._pending_lock:
+            self.pending_tasks -= 1
+
+class TrackedThreadPoolExecutor(TrackedExecutor, ThreadPoolExecutor):
+    pass
+
+class TrackedProcessPoolExecutor(TrackedExecutor, ProcessPoolExecutor):
+    pass
+
+METRICS: List[Any] = []
+
+def register_metric(metric):
+    METRICS.append(metric)
+    return metric
+
+mongo_command_duration = register_metric(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("collection", "command")
+))
+mongo_command_errors = register_metric(Counter(
+    "mongo_command_errors_total", "Failed MongoDB commands", ("collection", "command")
+))
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Events arrive on whichever thread ran the command, so pending is locked.
+    """
+
+    def __init__(self):
+        self.pending: Dict[tuple, tuple] = {}
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def finish(self, event) -> tuple:
+        with self.lock:
+            return self.pending.pop((event.connection_id, event.request_id), ("", event.command_name))
+
+    def succeeded(self, event):
+        labels = self.finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, *labels)
+
+    def failed(self, event):
+        labels = self.finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, *labels)
+        mongo_command_errors.inc(*labels)
+
+MONGO_EVENT_LISTENERS = [MongoCommandMetrics()] if METRICS_ENABLED else []
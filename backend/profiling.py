@@ -0,0 +1,131 @@
+"""
+Request profiling and memory diagnostics.
+
+StackSampler reads every thread's stack at a fixed interval, so work done in
+middleware on the event loop (translation) and in worker threads (sync
+routes, export renderers, quality rules) are both visible, at a cost that
+does not depend on how many Python calls the request makes. Stacks are kept
+in folded form ("outer;inner;leaf" -> samples), which feeds flamegraph.pl and
+speedscope directly and stays within Mongo's document nesting limit.
+
+The tracemalloc helpers format snapshots for the /debug/memory endpoints;
+main owns the snapshot store and the lock around it.
+"""
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Any, Dict
+
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+PROFILE_TTL_SECONDS = int(os.getenv("PROFILE_TTL_SECONDS", str(7 * 86400)))
+PROFILE_MAX_STACKS = 500
+PROFILE_HOTSPOTS = 25
+
+# Leaf frames of threads that are parked rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+class StackSampler:
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self.lines: Dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def run(self):
+
+        own = threading.get_ident()
+        names = {}
+
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+
+            for thread_id, frame in sys._current_frames().items():
+                leaf = frame.f_code
+                if thread_id == own or (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                    continue
+
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+
+                # Line-level counts point at the hot loop inside a function
+                line = f"{leaf.co_name} ({leaf.co_filename}:{frame.f_lineno})"
+                self.lines[line] = self.lines.get(line, 0) + 1
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+
+                folded = ";".join(reversed(stack))
+                self.stacks[folded] = self.stacks.get(folded, 0) + 1
+
+    def report(self) -> Dict[str, Any]:
+
+        self_samples: Dict[str, int] = {}
+        total_samples: Dict[str, int] = {}
+
+        for folded, count in self.stacks.items():
+            frames = folded.split(";")[1:]
+            self_samples[frames[-1]] = self_samples.get(frames[-1], 0) + count
+            for name in set(frames):
+                total_samples[name] = total_samples.get(name, 0) + count
+
+        def top(counts):
+            ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:PROFILE_HOTSPOTS]
+            return [{"frame": name, "samples": count} for name, count in ranked]
+
+        stacks = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "hot_functions": top(self_samples),
+            "cumulative_functions": top(total_samples),
+            "hot_lines": top(self.lines),
+            "stacks": [{"stack": folded, "samples": count} for folded, count in stacks[:PROFILE_MAX_STACKS]],
+            "truncated_stacks": max(0, len(stacks) - PROFILE_MAX_STACKS)
+        }
+
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "10"))
+MEMORY_TOP_STATS = 25
+
+def format_memory_stat(stat, key_type: str) -> Dict[str, Any]:
+
+    entry = {
+        "location": str(stat.traceback[0]) if key_type == "lineno" else stat.traceback.format(),
+        "size_kib": round(stat.size / 1024, 1),
+        "count": stat.count
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_kib"] = round(stat.size_diff / 1024, 1)
+        entry["count_diff"] = stat.count_diff
+
+    return entry
+
+def take_memory_snapshot():
+    # Collect first so the snapshot shows what is retained, not pending garbage
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
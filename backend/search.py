@@ -0,0 +1,236 @@
+"""
+In-process text indexes.
+
+BM25Index is an inverted index for keyword search with snippets.
+TextVectorIndex holds hashed word uni/bi-gram TF-IDF vectors in one
+L2-normalized matrix, so a nearest-neighbour lookup is a single
+matrix-vector product. Both are pure data structures; main decides what
+goes in them and when they are rebuilt.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SEARCH_SNIPPET_RADIUS = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+SEARCH_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "the", "to", "with"
+}
+
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+")
+
+def search_tokens(text: str) -> List[str]:
+    return [
+        t for t in SEARCH_TOKEN_PATTERN.findall(text.lower())
+        if t not in SEARCH_STOPWORDS
+    ]
+
+class BM25Index:
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.total_length = 0
+        self.lock = threading.Lock()
+        self.built_at = time.monotonic()
+
+    def add(self, doc_id: str, text: str, meta: Dict[str, Any]):
+
+        tokens = search_tokens(text)
+
+        with self.lock:
+            if doc_id in self.docs:
+                return
+
+            self.docs[doc_id] = {**meta, "text": text}
+            self.doc_lengths[doc_id] = len(tokens)
+            self.total_length += len(tokens)
+
+            for token in tokens:
+                postings = self.postings.setdefault(token, {})
+                postings[doc_id] = postings.get(doc_id, 0) + 1
+
+    def remove(self, doc_id: str):
+
+        with self.lock:
+            doc = self.docs.pop(doc_id, None)
+            if doc is None:
+                return
+
+            self.total_length -= self.doc_lengths.pop(doc_id)
+
+            for token in set(search_tokens(doc["text"])):
+                postings = self.postings[token]
+                del postings[doc_id]
+                if not postings:
+                    del self.postings[token]
+
+    def search(self, query: str, kind: Optional[str] = None):
+
+        terms = set(search_tokens(query))
+
+        with self.lock:
+            n = len(self.docs)
+            if not n or not terms:
+                return [], terms
+
+            average_length = self.total_length / n or 1
+            scores: Dict[str, float] = {}
+
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+
+                for doc_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            ranked = [
+                (doc_id, score, self.docs[doc_id])
+                for doc_id, score in scores.items()
+                if kind is None or self.docs[doc_id]["kind"] == kind
+            ]
+
+        ranked.sort(key=lambda row: row[1], reverse=True)
+        return ranked, terms
+
+def search_snippet(text: str, terms) -> str:
+
+    lowered = text.lower()
+    positions = [lowered.find(t) for t in terms if lowered.find(t) >= 0]
+
+    if not positions or len(text) <= SEARCH_SNIPPET_RADIUS * 2:
+        return text[:SEARCH_SNIPPET_RADIUS * 2]
+
+    start = max(0, min(positions) - SEARCH_SNIPPET_RADIUS)
+    end = min(len(text), start + SEARCH_SNIPPET_RADIUS * 2)
+
+    return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+
+SIMILARITY_DIMENSIONS = int(os.getenv("SIMILARITY_DIMENSIONS", "1024"))
+
+def text_features(text: str) -> List[str]:
+    tokens = search_tokens(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def hashed_term_counts(texts: List[str], dimensions: int = SIMILARITY_DIMENSIONS) -> np.ndarray:
+
+    counts = np.zeros((len(texts), dimensions), dtype=np.float32)
+
+    for row, text in enumerate(texts):
+        for feature in text_features(text):
+            counts[row, zlib.crc32(feature.encode("utf-8")) % dimensions] += 1
+
+    return counts
+
+def tfidf_rows(counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+    weighted = np.log1p(counts) * idf
+    norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+    return weighted / np.where(norms > 0, norms, 1)
+
+def fit_idf(counts: np.ndarray) -> np.ndarray:
+    document_frequency = (counts > 0).sum(axis=0)
+    return (np.log((1 + len(counts)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+class TextVectorIndex:
+    """
+    Append-only matrix of hashed TF-IDF rows with an entry (metadata) per row.
+    Entries carry a "ref_id"; adding an id that is already indexed is a no-op.
+    """
+
+    def __init__(self, idf: np.ndarray, vectors: np.ndarray, entries: List[Dict[str, Any]]):
+        self.idf = idf
+        self.entries = list(entries)
+        self.ref_ids = {entry["ref_id"] for entry in self.entries}
+        self.size = len(self.entries)
+        self.matrix = np.zeros((max(self.size, 64), idf.shape[0]), dtype=np.float32)
+        self.matrix[:self.size] = vectors
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, texts: List[str], entries: List[Dict[str, Any]], dimensions: int = SIMILARITY_DIMENSIONS):
+
+        counts = hashed_term_counts(texts, dimensions)
+        idf = fit_idf(counts)
+
+        return cls(idf, tfidf_rows(counts, idf), entries)
+
+    def vectorize(self, texts: List[str]) -> np.ndarray:
+        return tfidf_rows(hashed_term_counts(texts, self.idf.shape[0]), self.idf)
+
+    def add(self, texts: List[str], entries: List[Dict[str, Any]]):
+
+        vectors = self.vectorize(texts)
+
+        with self.lock:
+            new = [i for i, entry in enumerate(entries) if entry["ref_id"] not in self.ref_ids]
+            if not new:
+                return
+            vectors = vectors[new]
+            entries = [entries[i] for i in new]
+
+            needed = self.size + len(entries)
+            if needed > self.matrix.shape[0]:
+                grown = np.zeros((max(needed, self.matrix.shape[0] * 2), self.matrix.shape[1]), dtype=np.float32)
+                grown[:self.size] = self.matrix[:self.size]
+                self.matrix = grown
+
+            self.matrix[self.size:needed] = vectors
+            self.entries.extend(entries)
+            self.ref_ids.update(entry["ref_id"] for entry in entries)
+            self.size = needed
+
+    def scores(self, text: str):
+        """
+        Cosine similarity of text against every row, with the matching entries.
+        """
+        query = self.vectorize([text])[0]
+
+        with self.lock:
+            return self.matrix[:self.size] @ query, self.entries[:self.size]
+
+    def snapshot(self):
+        """
+        (rows, entries) as of one moment; later adds never touch these rows.
+        """
+        with self.lock:
+            return self.matrix[:self.size], self.entries[:self.size]
+
+    def save(self, path: str, meta: Dict[str, Any]):
+
+        with self.lock:
+            vectors = self.matrix[:self.size].copy()
+            entries = list(self.entries)
+
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            idf=self.idf,
+            vectors=vectors,
+            entries=np.array(json.dumps(entries)),
+            meta=np.array(json.dumps(meta))
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+
+        with np.load(path) as data:
+            index = cls(data["idf"], data["vectors"], json.loads(str(data["entries"])))
+            meta = json.loads(str(data["meta"]))
+
+        return index, meta
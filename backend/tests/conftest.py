@@ -0,0 +1,64 @@
+"""
+The suite runs against mongomock, so no MongoDB server is needed:
+
+    pip install -r requirements-dev.txt
+    pytest
+"""
+import asyncio
+import os
+
+import httpx
+import mongomock
+import pymongo
+import pytest
+
+os.environ["MONGODB_URI"] = "mongodb://localhost:27017"
+os.environ["ADMIN_API_TOKEN"] = "test-admin-token"
+pymongo.MongoClient = mongomock.MongoClient
+
+import caches  # noqa: E402
+import main  # noqa: E402
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    for name in main.db.list_collection_names():
+        main.db.drop_collection(name)
+    caches._collection_versions.clear()
+    yield
+
+
+class ApiClient:
+    """
+    Drives the ASGI app in-process, middleware included.
+    """
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+
+        async def send():
+            async with httpx.AsyncClient(app=main.app, base_url="http://testserver") as client:
+                return await client.request(method, path, **kwargs)
+
+        return asyncio.run(send())
+
+    def get(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("DELETE", path, **kwargs)
+
+
+@pytest.fixture
+def api():
+    return ApiClient()
@@ -0,0 +1,17 @@
+import main
+from tests.conftest import ADMIN_HEADERS
+
+
+def test_admin_token_comparison():
+    assert main.is_admin_token("test-admin-token")
+    assert not main.is_admin_token("wrong-token")
+    assert not main.is_admin_token(None)
+    assert not main.is_admin_token("tëst-admin-token")
+
+
+def test_admin_endpoints_reject_missing_and_non_ascii_tokens(api):
+    assert api.post("/context-rules/reload").status_code == 403
+    assert api.post(
+        "/context-rules/reload", headers={"X-Admin-Token": "tëst".encode("latin-1")}
+    ).status_code == 403
+    assert api.post("/context-rules/reload", headers=ADMIN_HEADERS).status_code == 200
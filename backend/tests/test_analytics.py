@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from bson import ObjectId
+
+import main
+from tests.conftest import ADMIN_HEADERS
+
+
+def seed_organization(state="Bihar", themes=("FLN",)):
+    return str(main.organization_profiles_collection.insert_one({
+        "organization_name": state,
+        "geography": {"state": state},
+        "thematic_focus": list(themes),
+        "maturity_level": "new"
+    }).inserted_id)
+
+
+def rollup(metric, dimension, key):
+    return main.analytics_rollups_collection.find_one(
+        {"metric": metric, "dimension": dimension, "key": key}
+    )
+
+
+def test_dimensions_for_many_organizations_come_from_one_query():
+    bihar = seed_organization("Bihar", ["FLN", "STEM"])
+    assam = seed_organization("Assam")
+
+    dimensions = main.organization_dimensions_map([bihar, assam, "not-an-id"])
+
+    assert ["state", "bihar"] in dimensions[bihar]
+    assert ["theme", "stem"] in dimensions[bihar]
+    assert ["state", "assam"] in dimensions[assam]
+    assert dimensions["not-an-id"] == [["all", "all"]]
+
+
+def test_profile_changes_reach_the_next_rollup_write():
+    organization_id = seed_organization("Bihar")
+    main.record_latest_score_rollups("completeness", organization_id, 50)
+
+    main.organization_profiles_collection.update_one(
+        {"_id": ObjectId(organization_id)}, {"$set": {"geography.state": "Assam"}}
+    )
+    main.record_latest_score_rollups("completeness", organization_id, 90)
+
+    assert rollup("completeness", "state", "assam")["count"] == 1
+    assert rollup("completeness", "state", "bihar")["count"] == 0
+
+
+def test_rebuild_recomputes_latest_scores():
+    organization_id = seed_organization("Bihar")
+    now = main.utc_now()
+    main.lfa_completeness_collection.insert_many([
+        {"organization_id": organization_id, "completion_percentage": 40, "evaluated_at": now - timedelta(days=1)},
+        {"organization_id": organization_id, "completion_percentage": 85, "evaluated_at": now}
+    ])
+    main.analytics_rollups_collection.insert_one({
+        "metric": "completeness", "dimension": "state", "key": "kerala",
+        "count": 3, "updated_at": now - timedelta(days=1)
+    })
+
+    main.rebuild_analytics_rollups()
+
+    bihar = rollup("completeness", "state", "bihar")
+    assert bihar["count"] == 1
+    assert bihar["sum"] == 85
+    assert rollup("completeness", "state", "kerala") is None
+
+
+def test_rebuild_leaves_rollups_updated_while_it_ran():
+    organization_id = seed_organization("Bihar")
+    main.lfa_completeness_collection.insert_one({
+        "organization_id": organization_id, "completion_percentage": 85, "evaluated_at": main.utc_now()
+    })
+    # Stands in for a $inc that lands after the rebuild has started reading
+    concurrent = {
+        "metric": "completeness", "dimension": "state", "key": "bihar",
+        "count": 2, "sum": 170, "updated_at": main.utc_now() + timedelta(minutes=5)
+    }
+    main.analytics_rollups_collection.insert_one(dict(concurrent))
+
+    main.rebuild_analytics_rollups()
+
+    bihar = rollup("completeness", "state", "bihar")
+    assert (bihar["count"], bihar["sum"]) == (2, 170)
+    assert main.analytics_rollups_collection.count_documents(
+        {"metric": "completeness", "dimension": "state", "key": "bihar"}
+    ) == 1
+    assert rollup("completeness", "all", "all")["count"] == 1
+
+
+def test_rebuild_endpoint_requires_admin(api):
+    assert api.post("/analytics/rebuild").status_code == 403
+    assert api.post("/analytics/rebuild", headers=ADMIN_HEADERS).status_code == 200
+
+
+def test_rebuild_joins_issue_types_to_the_problem_organization():
+    organization_id = seed_organization("Bihar")
+    problem_id = main.problem_statements_collection.insert_one({"organization_id": organization_id}).inserted_id
+    main.problem_refinements_collection.insert_one({
+        "problem_statement_id": str(problem_id),
+        "identified_issues": [{"issue_type": "vague"}, {"issue_type": "vague"}, {"issue_type": "no_baseline"}]
+    })
+
+    main.rebuild_analytics_rollups()
+
+    assert rollup("problem_issue_types", "state", "bihar")["distribution"] == {"vague": 2, "no_baseline": 1}
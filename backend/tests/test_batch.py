@@ -0,0 +1,101 @@
+import pytest
+
+import main
+from tests.conftest import ADMIN_HEADERS
+
+PROFILE = {
+    "organization_name": "Pratham Bihar",
+    "geography": {"state": "Bihar"},
+    "thematic_focus": ["FLN"],
+    "maturity_level": "growing",
+    "reach_metrics": {"schools": 120},
+    "team_size": 8,
+    "team_expertise": []
+}
+
+
+def test_later_operations_use_earlier_responses(api):
+    response = api.post("/batch", json={"operations": [
+        {"id": "profile", "path": "/organization/profile", "body": PROFILE},
+        {"id": "problem", "path": "/problem-statement", "body": {
+            "organization_id": "${profile._id}",
+            "core_problem": "Grade three students cannot read fluently",
+            "affected_stakeholders": ["Students"],
+            "evidence": []
+        }},
+        {"id": "snapshot", "method": "GET", "path": "/organization/${profile._id}/lfa-snapshot"}
+    ]})
+
+    assert response.status_code == 200
+    results = {r["id"]: r for r in response.json()["results"]}
+    assert [r["status"] for r in results.values()] == [200, 200, 200]
+    org_id = results["profile"]["body"]["_id"]
+    assert results["problem"]["body"]["organization_id"] == org_id
+    assert results["snapshot"]["body"]["problem_definition"]["affected_group"] == ["Students"]
+
+
+def test_failed_dependency_short_circuits_dependents_only(api):
+    response = api.post("/batch", json={"operations": [
+        {"id": "missing", "method": "GET", "path": "/organization/profile/000000000000000000000000"},
+        {"id": "after", "method": "GET", "path": "/organization/${missing._id}/lfa-snapshot"},
+        {"id": "ordered", "method": "GET", "path": "/methodologies", "depends_on": ["missing"]},
+        {"id": "independent", "method": "GET", "path": "/methodologies"}
+    ]})
+
+    statuses = {r["id"]: r["status"] for r in response.json()["results"]}
+    assert statuses == {"missing": 404, "after": 424, "ordered": 424, "independent": 200}
+
+
+@pytest.mark.parametrize("operations, detail", [
+    ([{"id": "a", "path": "/batch"}], "Batches cannot be nested"),
+    ([{"id": "a", "path": "/batch/?x=1"}], "Batches cannot be nested"),
+    ([{"id": "a", "method": "GET", "path": "/methodologies"},
+      {"id": "a", "method": "GET", "path": "/methodologies"}], "Duplicate operation id 'a'"),
+    ([{"id": "a", "method": "GET", "path": "/organization/${b.id}/lfa-snapshot"},
+      {"id": "b", "method": "GET", "path": "/methodologies"}], "not an earlier operation")
+])
+def test_invalid_batches_are_rejected_up_front(api, operations, detail):
+    response = api.post("/batch", json={"operations": operations})
+
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
+
+
+def test_unresolvable_reference_fails_that_operation(api):
+    response = api.post("/batch", json={"operations": [
+        {"id": "list", "method": "GET", "path": "/methodologies"},
+        {"id": "first", "method": "GET", "path": "/organization/${list.0.name}/lfa-snapshot"}
+    ]})
+
+    first = response.json()["results"][1]
+    assert first["status"] == 422
+    assert "list.0.name" in first["body"]["detail"]
+
+
+def test_admin_header_is_forwarded_to_sub_requests(api):
+    denied = api.post("/batch", json={"operations": [{"id": "rebuild", "path": "/analytics/rebuild"}]})
+    allowed = api.post(
+        "/batch",
+        json={"operations": [{"id": "rebuild", "path": "/analytics/rebuild"}]},
+        headers=ADMIN_HEADERS
+    )
+
+    assert denied.json()["results"][0]["status"] == 403
+    assert allowed.json()["results"][0]["status"] == 200
+
+
+def test_query_string_in_the_path_is_honoured(api):
+    main.methodology_library_collection.insert_one({
+        "name": "Reading Camps", "theme": "FLN", "description": "Camps", "components": ["Camps"],
+        "geographies": ["all"], "budget_range_lakhs": [0, 50]
+    })
+
+    response = api.post("/batch", json={"operations": [
+        {"id": "summary", "method": "GET", "path": "/methodologies?view=summary"},
+        {"id": "merged", "method": "GET", "path": "/methodologies?view=summary", "query": {"fields": "components"}}
+    ]})
+
+    summary, merged = response.json()["results"]
+    assert summary["status"] == merged["status"] == 200
+    assert summary["body"]["methodologies"] == [{"name": "Reading Camps", "theme": "FLN", "description": "Camps"}]
+    assert merged["body"]["methodologies"][0]["components"] == ["Camps"]
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+
+import lfa_scoring
+import main
+from lfa_scoring import SECTION_REQUIREMENTS, calculate_lfa_completeness, score_lfa_section
+
+COMPLETE_LFA = {
+    "organization_profile": {"organization_id": "org-1", "theme": "FLN", "geography": {"state": "Bihar"}, "scale": 100},
+    "problem_definition": {"core_problem": "Low reading levels", "affected_group": "Grade 3"},
+    "problem_tree": {"root_causes": ["a"], "core_problem": "b", "effects": ["c"]},
+    "outcomes": {"smart_outcomes": ["Increase reading from 20% to 50%"]},
+    "methodology": {"interventions": ["Reading Camps"]},
+    "theory_of_change": {"activities": ["a"], "outputs": ["b"], "outcomes": ["c"], "impact": "d"},
+    "measurement": {"indicators": ["ORF"], "targets": ["50%"]}
+}
+
+
+def test_weights_add_up_to_100():
+    assert sum(rules["weight"] for rules in SECTION_REQUIREMENTS.values()) == 100
+
+
+def test_complete_lfa_scores_100():
+    result = calculate_lfa_completeness(COMPLETE_LFA)
+
+    assert result["completion_percentage"] == 100
+    assert result["missing_sections"] == []
+
+
+def test_partial_section_scores_present_fields():
+    result = score_lfa_section("measurement", {"indicators": ["ORF"], "targets": []})
+
+    assert result["status"] == "partial"
+    assert result["score"] == 5
+    assert result["missing_fields"] == ["targets"]
+
+
+def test_missing_sections_are_reported():
+    result = calculate_lfa_completeness({"outcomes": COMPLETE_LFA["outcomes"]})
+
+    assert result["completion_percentage"] == 20
+    assert "methodology" in result["missing_sections"]
+
+
+def test_snapshot_hash_fingerprints_the_input():
+    same = calculate_lfa_completeness(COMPLETE_LFA)["snapshot_hash"]
+    reordered = dict(reversed(list(COMPLETE_LFA.items())))
+    reworded = dict(COMPLETE_LFA, outcomes={"smart_outcomes": ["Different wording"]})
+
+    assert calculate_lfa_completeness(reordered)["snapshot_hash"] == same
+    assert calculate_lfa_completeness(reworded)["snapshot_hash"] != same
+
+
+def test_only_changed_sections_are_rescored(monkeypatch):
+    calculate_lfa_completeness(COMPLETE_LFA)
+
+    scored = []
+    original = lfa_scoring.score_lfa_section
+    monkeypatch.setattr(lfa_scoring, "score_lfa_section", lambda *args: scored.append(args[0]) or original(*args))
+
+    result = calculate_lfa_completeness(dict(COMPLETE_LFA, measurement={"indicators": ["ORF"]}))
+
+    assert scored == ["measurement"]
+    assert result["completion_percentage"] == 95
+
+
+def test_section_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(lfa_scoring, "LFA_SECTION_CACHE_SIZE", 3)
+    monkeypatch.setattr(lfa_scoring, "_section_score_cache", OrderedDict())
+
+    for i in range(5):
+        calculate_lfa_completeness({"outcomes": {"smart_outcomes": [f"Outcome {i}"]}})
+
+    assert len(lfa_scoring._section_score_cache) == 3
+
+
+def test_unchanged_evaluation_is_not_recorded_twice():
+    result = calculate_lfa_completeness(COMPLETE_LFA)
+
+    assert main.record_lfa_completeness("org-1", result) is True
+    assert main.record_lfa_completeness("org-1", result) is False
+    assert main.lfa_completeness_collection.count_documents({"organization_id": "org-1"}) == 1
+
+
+def test_batch_scoring_on_process_pool(api):
+    main.lfa_snapshots_collection.insert_many([
+        {"organization_id": "org-1", **COMPLETE_LFA},
+        {"organization_id": "org-2", "outcomes": COMPLETE_LFA["outcomes"]}
+    ])
+
+    response = api.post("/lfa/completeness-score/batch", json={
+        "organization_ids": ["org-1", "org-2", "org-3"],
+        "use_process_pool": True
+    })
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["results"]["org-1"]["completion_percentage"] == 100
+    assert body["results"]["org-2"]["completion_percentage"] == 20
+    assert body["missing_organizations"] == ["org-3"]
+    assert body["recorded"] == 2
+    main.shutdown_process_pool()
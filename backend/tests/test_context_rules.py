@@ -0,0 +1,88 @@
+import pytest
+
+import main
+from tests.conftest import ADMIN_HEADERS
+
+PROFILE = {
+    "organization_name": "Pratham Bihar",
+    "geography": {"state": "Bihar"},
+    "thematic_focus": ["FLN"],
+    "maturity_level": "startup",
+    "reach_metrics": {"schools": 120},
+    "team_size": 8,
+    "team_expertise": []
+}
+
+RULES = [
+    {"rule_id": "lfa-bihar-large", "kind": "lfa_template", "priority": 30,
+     "when": {"themes": ["FLN"], "states": ["Bihar"], "min_schools": 100},
+     "then": {"template_key": "FLN_Bihar_Scale", "rationale": "Large Bihar FLN programs"}},
+    {"rule_id": "lfa-fln", "kind": "lfa_template", "priority": 20,
+     "when": {"themes": ["FLN"]},
+     "then": {"template_key": "FLN_System_Strengthening", "rationale": "FLN"}},
+    {"rule_id": "pattern-disabled", "kind": "program_pattern", "enabled": False,
+     "then": {"pattern_name": "Disabled", "relevance_reason": "Never shown"}}
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_rule_table(monkeypatch):
+    monkeypatch.setattr(main, "_context_rules_cache", {"version": None, "checked_at": 0.0, "table": None})
+
+
+def profile(**overrides):
+    return {**PROFILE, **overrides}
+
+
+def test_defaults_apply_while_the_collection_is_empty():
+    analysis = main.analyze_context(profile())
+
+    assert analysis["lfa_recommendation"]["template_key"] == "FLN_System_Strengthening"
+    assert [p["pattern_name"] for p in analysis["similar_program_patterns"]] == [
+        "Teacher Coaching + Classroom Observation",
+        "Pilot → Iterate → Scale"
+    ]
+
+
+def test_candidates_only_include_rules_that_can_match():
+    table = main.ContextRuleTable([main.ContextRule(**rule) for rule in RULES])
+
+    assert [r.rule_id for r in table.rules] == ["lfa-bihar-large", "lfa-fln"]
+    assert table.candidates({"themes": ["fln"], "maturity": ["growing"], "state": ["odisha"]}) == [1]
+    assert table.candidates({"themes": ["stem"], "maturity": ["growing"], "state": ["bihar"]}) == []
+
+
+def test_replaced_rules_are_used_by_priority_and_school_bounds(api):
+    response = api.put("/context-rules", json={"rules": RULES}, headers=ADMIN_HEADERS)
+    assert response.json()["count"] == 2
+
+    large = main.analyze_context(profile())
+    small = main.analyze_context(profile(reach_metrics={"schools": 10}))
+
+    assert large["lfa_recommendation"]["template_key"] == "FLN_Bihar_Scale"
+    assert small["lfa_recommendation"]["template_key"] == "FLN_System_Strengthening"
+    assert large["similar_program_patterns"] == []
+
+
+def test_invalid_rule_outputs_are_rejected(api):
+    bad = {"rule_id": "bad", "kind": "lfa_template", "then": {"pattern_name": "Wrong kind"}}
+
+    response = api.put("/context-rules", json={"rules": [bad]}, headers=ADMIN_HEADERS)
+
+    assert response.status_code == 400
+    assert main.context_rules_collection.count_documents({}) == 0
+
+
+def test_rule_changes_require_the_admin_token(api):
+    assert api.put("/context-rules", json={"rules": RULES}).status_code == 403
+    assert api.post("/context-rules/reload").status_code == 403
+
+
+def test_ai_context_endpoint_records_the_analysis(api):
+    org_id = api.post("/organization/profile", json=PROFILE).json()["_id"]
+
+    response = api.post(f"/organization/{org_id}/ai-context")
+
+    assert response.status_code == 200
+    assert response.json()["lfa_recommendation"]["template_key"] == "FLN_System_Strengthening"
+    assert main.ai_context_analysis_collection.count_documents({"organization_id": org_id}) == 1
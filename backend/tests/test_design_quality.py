@@ -0,0 +1,67 @@
+import pytest
+
+from lfa_scoring import QUALITY_CHECKS, QUALITY_RULES, SEVERITY_PENALTIES, generate_design_quality_feedback
+
+
+def checks(result):
+    return [item["check"] for item in result["feedback_items"]]
+
+
+def test_rules_run_in_quality_checks_order():
+    assert list(QUALITY_RULES) == list(QUALITY_CHECKS)
+
+
+@pytest.mark.parametrize("problem", [
+    "Schools lack infrastructure",
+    "Crumbling infrastructures in rural schools",
+    "No hardware for digital lessons"
+])
+def test_infrastructure_problem_needs_infrastructure_intervention(problem):
+    lfa = {
+        "problem_definition": {"core_problem": problem},
+        "methodology": {"interventions": ["Teacher Training"]}
+    }
+
+    result = generate_design_quality_feedback(lfa)
+
+    assert "problem_intervention_alignment" in checks(result)
+
+
+def test_matching_intervention_clears_the_mismatch():
+    lfa = {
+        "problem_definition": {"core_problem": "Infrastructural gaps in classrooms"},
+        "methodology": {"interventions": ["School infrastructure upgrades"]}
+    }
+
+    assert "problem_intervention_alignment" not in checks(generate_design_quality_feedback(lfa))
+
+
+def test_vague_and_unmeasurable_outcomes_are_flagged():
+    lfa = {"outcomes": {"smart_outcomes": ["Enhance learning", "Increase reading from 20% to 50%"]}}
+
+    items = [i for i in generate_design_quality_feedback(lfa)["feedback_items"] if i["check"] == "outcome_quality"]
+
+    assert len(items) == 1
+    assert items[0]["issue"] == "Enhance learning"
+    assert set(items[0]["problems"]) == {"Outcome is not clearly measurable", "Outcome uses vague language"}
+
+
+def test_score_subtracts_severity_penalties():
+    result = generate_design_quality_feedback({})
+
+    expected = 100 - sum(SEVERITY_PENALTIES[item["severity"]] for item in result["feedback_items"])
+    assert result["quality_score"] == max(0, expected)
+
+
+def test_parallel_and_serial_runs_agree():
+    lfa = {
+        "outcomes": {"smart_outcomes": ["Improve reading"]},
+        "measurement": {"indicators": ["Teacher perception survey"]},
+        "theory_of_change": {"activities": ["a"] * 4, "outcomes": ["b"]}
+    }
+
+    serial = generate_design_quality_feedback(lfa, parallel=False)
+    parallel = generate_design_quality_feedback(lfa, parallel=True)
+
+    assert serial["feedback_items"] == parallel["feedback_items"]
+    assert serial["quality_score"] == parallel["quality_score"]
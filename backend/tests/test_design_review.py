@@ -0,0 +1,86 @@
+import pytest
+
+import main
+from tests.test_completeness import COMPLETE_LFA
+
+
+def seed_organizations():
+    organizations = [
+        {"organization_name": "A", "geography": {"state": "Bihar"}, "thematic_focus": ["FLN"], "maturity_level": "new"},
+        {"organization_name": "B", "geography": {"state": "Bihar"}, "thematic_focus": ["FLN", "STEM"], "maturity_level": "new"},
+        {"organization_name": "C", "geography": {"state": "Assam"}, "thematic_focus": ["STEM"], "maturity_level": "new"}
+    ]
+    ids = main.organization_profiles_collection.insert_many(organizations).inserted_ids
+    main.lfa_snapshots_collection.insert_one({"organization_id": str(ids[0]), **COMPLETE_LFA})
+    return [str(i) for i in ids]
+
+
+def start_job(api, **overrides):
+    response = api.post("/portfolio/design-review", json={"chunk_size": 2, "use_process_pool": False, **overrides})
+    assert response.status_code == 200
+    return response.json()["job_id"]
+
+
+def test_job_reviews_every_organization_and_reports_bands(api):
+    seed_organizations()
+
+    job = api.get(f"/portfolio/design-review/{start_job(api)}").json()
+
+    assert job["status"] == "completed"
+    assert job["processed"] == 3
+    assert job["progress_percentage"] == 100
+
+    bihar = job["report"]["by_state"]["Bihar"]
+    assert bihar["organizations"] == 2
+    assert bihar["completeness_distribution"] == {"80-100": 1, "0-20": 1}
+    assert sum(bihar["quality_distribution"].values()) == 2
+    assert job["report"]["by_theme"]["STEM"]["organizations"] == 2
+
+
+def test_completed_job_cannot_be_resumed(api):
+    seed_organizations()
+    job_id = start_job(api)
+
+    assert api.post(f"/portfolio/design-review/{job_id}/resume").status_code == 409
+
+
+def test_running_job_with_fresh_heartbeat_is_not_resumed(api):
+    seed_organizations()
+    job_id = start_job(api)
+    main.design_review_jobs_collection.update_one(
+        {"job_id": job_id},
+        {"$set": {"status": "running", "heartbeat": main.utc_now().timestamp()}}
+    )
+
+    response = api.post(f"/portfolio/design-review/{job_id}/resume")
+
+    assert response.status_code == 409
+    assert "still running" in response.json()["detail"]
+
+
+def test_stale_job_resumes_after_its_checkpoint(api):
+    ids = seed_organizations()
+    job_id = start_job(api)
+
+    # Simulate a crash after the first chunk: one result is dropped and must not be redone
+    main.design_review_results_collection.delete_many({"job_id": job_id, "organization_id": {"$in": ids[:2]}})
+    main.design_review_jobs_collection.update_one(
+        {"job_id": job_id},
+        {"$set": {"status": "running", "heartbeat": 0, "last_organization_id": ids[1], "processed": 2}}
+    )
+
+    assert api.post(f"/portfolio/design-review/{job_id}/resume").status_code == 200
+
+    job = api.get(f"/portfolio/design-review/{job_id}").json()
+    reviewed = main.design_review_results_collection.distinct("organization_id", {"job_id": job_id})
+    assert job["status"] == "completed"
+    assert reviewed == [ids[2]]
+
+
+def test_unknown_job_is_404(api):
+    assert api.post("/portfolio/design-review/nope/resume").status_code == 404
+
+
+@pytest.mark.parametrize("score, band", [(0, "0-20"), (59.9, "40-60"), (100, "80-100")])
+def test_score_band(score, band):
+    assert main.score_band(score) == band
@@ -0,0 +1,73 @@
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def geography():
+    main.state_context_rules_collection.insert_one({
+        "state": "odisha",
+        "education_challenges": [{"challenge": "Tribal language gap", "reason": "Home language differs"}]
+    })
+    main.district_challenges_collection.insert_many([
+        {"state": "odisha", "district": "koraput", "challenges": ["Seasonal migration", "Teacher vacancies"]},
+        {"state": "odisha", "district": "koraput", "block": "lamtaput", "aliases": ["lamtaput block"],
+         "challenges": [{"challenge": "Remote hamlets", "reason": "Hilly terrain"}]}
+    ])
+
+
+def test_resolver_handles_aliases_suffixes_and_misspellings():
+    location = main.resolve_geography("Orissa", "Koraput District", "Lamtput")
+
+    assert (location["state"], location["district"], location["block"]) == ("odisha", "koraput", "lamtaput")
+    assert location["matched_level"] == "block"
+    assert [c["level"] for c in location["challenges"]] == ["block", "district", "district", "state"]
+
+
+def test_unknown_district_falls_back_to_the_state():
+    location = main.resolve_geography("odisha", "Nowhere")
+
+    assert location["matched_level"] == "state"
+    assert [c["challenge"] for c in location["challenges"]] == ["Tribal language gap"]
+
+
+def test_district_challenges_keep_their_stored_shape():
+    assert main.get_district_challenges("odisha", "koraput") == ["Seasonal migration", "Teacher vacancies"]
+    assert main.get_district_challenges("Orissa", "Koraput", "Lamtaput") == [
+        {"challenge": "Remote hamlets", "reason": "Hilly terrain"},
+        "Seasonal migration",
+        "Teacher vacancies"
+    ]
+    assert main.get_district_challenges("odisha", "Nowhere") == []
+
+
+def test_bulk_resolve_counts_unresolved_locations(api):
+    response = api.post("/geography/resolve", json={"locations": [
+        {"state": "odisha", "district": "koraput"},
+        {"state": "atlantis"}
+    ]})
+
+    body = response.json()
+    assert body["unresolved"] == 1
+    assert "challenges" not in body["results"][0]
+
+
+def test_malformed_entries_are_skipped_and_reasons_are_optional():
+    main.state_context_rules_collection.insert_many([
+        {"state": "odisha", "education_challenges": [{"reason": "No challenge named"}, "Teacher vacancies"]},
+        {"education_challenges": ["No state"]}
+    ])
+    main.district_challenges_collection.insert_many([
+        {"state": "odisha", "district": "koraput", "block": "boipariguda",
+         "challenges": [{"challenge": "Teacher vacancies"}, 42]},
+        {"state": "odisha", "challenges": ["No district"]}
+    ])
+
+    location = main.resolve_geography("odisha", "koraput", "boipariguda")
+
+    assert [(c["challenge"], c["level"]) for c in location["challenges"]] == [
+        ("Teacher vacancies", "block"),
+        ("Seasonal migration", "district"),
+        ("Tribal language gap", "state")
+    ]
+    assert main.get_district_challenges("odisha", "koraput", "boipariguda")[0] == {"challenge": "Teacher vacancies"}
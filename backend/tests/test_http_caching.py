@@ -0,0 +1,97 @@
+from starlette.requests import Request
+
+import main
+
+PROFILE = {
+    "organization_name": "Pratham Bihar",
+    "geography": {"state": "Bihar"},
+    "thematic_focus": ["FLN"],
+    "maturity_level": "growing",
+    "reach_metrics": {"schools": 120},
+    "team_size": 8,
+    "team_expertise": []
+}
+
+
+def seed_methodology():
+    main.methodology_library_collection.insert_one({
+        "name": "Reading Camps", "theme": "FLN", "description": "Camps",
+        "components": ["Camps"], "geographies": ["all"], "budget_range_lakhs": [0, 50]
+    })
+
+
+def make_request(query_string):
+    return Request({"type": "http", "method": "GET", "path": "/methodologies",
+                    "query_string": query_string.encode(), "headers": []})
+
+
+def test_reference_data_is_publicly_cacheable_and_revalidates(api):
+    seed_methodology()
+
+    first = api.get("/methodologies")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == main.CACHE_POLICIES["reference"]
+
+    repeat = api.get("/methodologies", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["ETag"] == etag
+    assert repeat.content == b""
+
+    weak = api.get("/methodologies", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+
+def test_local_write_changes_the_etag(api):
+    seed_methodology()
+    etag = api.get("/methodologies").headers["ETag"]
+
+    main.bump_collection_version(main.methodology_library_collection)
+
+    response = api.get("/methodologies", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_etag_varies_with_query_and_language_but_not_parameter_order():
+    assert main.response_etag(make_request("fields=name&view=summary"), "v1") == \
+        main.response_etag(make_request("view=summary&fields=name"), "v1")
+    assert main.response_etag(make_request("fields=name"), "v1") != main.response_etag(make_request(""), "v1")
+    assert main.response_etag(make_request("language=hi"), "v1") != main.response_etag(make_request(""), "v1")
+    assert main.response_etag(make_request(""), "v1") != main.response_etag(make_request(""), "v2")
+
+
+def test_organization_data_is_private_and_tracks_writes(api):
+    org_id = api.post("/organization/profile", json=PROFILE).json()["_id"]
+
+    profile = api.get(f"/organization/profile/{org_id}")
+    assert profile.headers["Cache-Control"] == "private, no-cache"
+    assert api.get(
+        f"/organization/profile/{org_id}", headers={"If-None-Match": profile.headers["ETag"]}
+    ).status_code == 304
+
+    statements = api.get(f"/organization/{org_id}/problem-statements")
+    api.post("/problem-statement", json={
+        "organization_id": org_id,
+        "core_problem": "Grade three students cannot read fluently",
+        "affected_stakeholders": ["Students"],
+        "evidence": []
+    })
+
+    response = api.get(
+        f"/organization/{org_id}/problem-statements", headers={"If-None-Match": statements.headers["ETag"]}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def test_compressed_responses_carry_a_weak_etag(api, monkeypatch):
+    monkeypatch.setattr(main, "COMPRESSION_MIN_BYTES", 0)
+    seed_methodology()
+
+    response = api.get("/methodologies", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].startswith('W/"')
+    assert api.get("/methodologies", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]
+    }).status_code == 304
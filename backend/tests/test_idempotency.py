@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+import caches
+import main
+
+PROFILE = {
+    "organization_name": "Pratham Bihar",
+    "geography": {"state": "Bihar"},
+    "thematic_focus": ["FLN"],
+    "maturity_level": "growing",
+    "reach_metrics": {"schools": 120},
+    "team_size": 8,
+    "team_expertise": []
+}
+
+
+def test_retry_with_same_key_replays_first_response(api):
+    first = api.post("/organization/profile", json=PROFILE, headers={"Idempotency-Key": "k1"})
+    retry = api.post("/organization/profile", json=PROFILE, headers={"Idempotency-Key": "k1"})
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["_id"] == first.json()["_id"]
+    assert main.organization_profiles_collection.count_documents({}) == 1
+
+
+def test_same_key_with_different_body_is_rejected(api):
+    api.post("/organization/profile", json=PROFILE, headers={"Idempotency-Key": "k1"})
+
+    response = api.post(
+        "/organization/profile",
+        json={**PROFILE, "organization_name": "Other"},
+        headers={"Idempotency-Key": "k1"}
+    )
+
+    assert response.status_code == 422
+    assert main.organization_profiles_collection.count_documents({}) == 1
+
+
+def test_keys_are_scoped_per_client(api):
+    api.post("/organization/profile", json=PROFILE, headers={
+        "Idempotency-Key": "k1", "Authorization": "Bearer client-a"
+    })
+
+    response = api.post("/organization/profile", json=PROFILE, headers={
+        "Idempotency-Key": "k1", "Authorization": "Bearer client-b"
+    })
+
+    # Executed for real: the profile already exists, so no replayed 200
+    assert response.status_code == 409
+    assert "Idempotent-Replayed" not in response.headers
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = caches.SingleFlight(ttl_seconds=5)
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return "result"
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.run("key", slow)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["result"] * 5
+
+
+def test_single_flight_does_not_cache_errors():
+    flight = caches.SingleFlight(ttl_seconds=5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        flight.run("key", flaky)
+
+    assert flight.run("key", flaky) == "ok"
+
+
+def test_single_flight_result_expires_after_ttl():
+    flight = caches.SingleFlight(ttl_seconds=0)
+    values = iter(["first", "second"])
+
+    assert flight.run("key", lambda: next(values)) == "first"
+    assert flight.run("key", lambda: next(values)) == "second"
+
+
+def test_request_fingerprint_ignores_key_order():
+    assert caches.request_fingerprint("e", {"a": 1, "b": 2}) == caches.request_fingerprint("e", {"b": 2, "a": 1})
@@ -0,0 +1,77 @@
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def indicator_master(monkeypatch):
+    monkeypatch.setattr(main, "_indicator_match_cache", main.VersionedLRU(main.THEME_CACHE_MAX_ENTRIES))
+    main.indicator_master_collection.insert_many([
+        {"theme": "FLN", "type": "student_outcome", "indicator_templates": [
+            "% of students reading grade level text fluently",
+            "% of students solving two digit subtraction",
+            "Average words correct per minute in oral reading"
+        ]},
+        {"theme": "FLN", "type": "practice_change", "stakeholder_id": "TCH", "indicator_templates": [
+            "% of teachers using structured pedagogy daily",
+            "% of teachers conducting weekly assessments"
+        ]}
+    ])
+
+
+def test_outcomes_match_the_closest_template_with_runner_ups():
+    indicators, alternatives = main.generate_outcome_indicators("FLN", [
+        "Students read grade level text fluently",
+        "Students solve subtraction problems"
+    ])
+
+    assert indicators["Students read grade level text fluently"] == "% of students reading grade level text fluently"
+    assert indicators["Students solve subtraction problems"] == "% of students solving two digit subtraction"
+    runner_ups = alternatives["Students read grade level text fluently"]
+    assert len(runner_ups) == main.INDICATOR_ALTERNATIVES
+    assert runner_ups[0]["score"] >= runner_ups[1]["score"]
+
+
+def test_practices_match_within_their_stakeholder_only():
+    indicators, _ = main.generate_practice_indicators("FLN", [
+        {"stakeholder_id": "TCH", "desired_practices": ["Teachers run weekly assessments"]},
+        {"stakeholder_id": "HM", "desired_practices": ["Head teachers observe classrooms"]}
+    ])
+
+    assert indicators["TCH"] == {"Teachers run weekly assessments": "% of teachers conducting weekly assessments"}
+    assert indicators["HM"] == {
+        "Head teachers observe classrooms": "% adoption of practice: 'Head teachers observe classrooms'"
+    }
+
+
+def test_unknown_theme_falls_back_to_generic_indicators(api):
+    response = api.post("/indicators/auto-generate", json={
+        "organization_id": "org-1",
+        "theme": "STEM",
+        "student_outcomes": ["Students build circuits"],
+        "practice_changes": []
+    })
+
+    assert response.status_code == 200
+    assert response.json()["outcome_indicators"] == {
+        "Students build circuits": "% of students achieving 'Students build circuits'"
+    }
+
+
+def test_index_is_rebuilt_after_a_local_master_write():
+    first = main.get_indicator_match_index("FLN")
+    assert main.get_indicator_match_index("FLN") is first
+
+    main.bump_collection_version(main.indicator_master_collection)
+
+    assert main.get_indicator_match_index("FLN") is not first
+
+
+def test_cache_keeps_at_most_the_configured_number_of_themes(monkeypatch):
+    monkeypatch.setattr(main, "_indicator_match_cache", main.VersionedLRU(2))
+
+    for theme in ("FLN", "STEM", "Career Readiness"):
+        main.get_indicator_match_index(theme)
+
+    assert len(main._indicator_match_cache) == 2
+    assert main._indicator_match_cache.get("FLN", main.collection_version(main.indicator_master_collection)) is None
@@ -0,0 +1,73 @@
+import main
+
+PROFILE = {
+    "organization_name": "Pratham Bihar",
+    "geography": {"state": "Bihar"},
+    "thematic_focus": ["FLN"],
+    "maturity_level": "growing",
+    "reach_metrics": {"schools": 120},
+    "team_size": 8,
+    "team_expertise": []
+}
+
+
+def test_writes_fill_the_snapshot_section_by_section(api):
+    org_id = api.post("/organization/profile", json=PROFILE).json()["_id"]
+    api.post("/problem-statement", json={
+        "organization_id": org_id,
+        "core_problem": "Grade three students cannot read fluent text",
+        "affected_stakeholders": ["Students"],
+        "evidence": []
+    })
+
+    snapshot = api.get(f"/organization/{org_id}/lfa-snapshot").json()
+
+    assert snapshot["organization_profile"] == {
+        "organization_id": org_id, "theme": "FLN", "geography": {"state": "Bihar", "district": None, "block": None},
+        "scale": 120
+    }
+    assert snapshot["problem_definition"] == {
+        "core_problem": "Grade three students cannot read fluent text",
+        "affected_group": ["Students"]
+    }
+    assert "updated_at" not in snapshot
+
+
+def test_appended_values_are_not_duplicated():
+    main.update_lfa_snapshot("org-1", append={"outcomes.smart_outcomes": ["Read 40 wpm"]})
+    main.update_lfa_snapshot("org-1", append={"outcomes.smart_outcomes": ["Read 40 wpm", "Add to 100"]})
+
+    assert main.load_lfa_snapshot("org-1")["outcomes"] == {"smart_outcomes": ["Read 40 wpm", "Add to 100"]}
+
+
+def test_scoring_reads_the_materialized_snapshot(api):
+    main.update_lfa_snapshot("org-1", append={"outcomes.smart_outcomes": ["Read 40 wpm"]})
+
+    response = api.post("/lfa/completeness-score", json={"organization_id": "org-1"})
+
+    assert response.status_code == 200
+    assert response.json()["completion_percentage"] == 20
+
+
+def test_client_snapshot_still_wins_and_missing_one_is_404(api):
+    supplied = api.post("/lfa/completeness-score", json={"organization_id": "org-2", "lfa_snapshot": {}})
+    missing = api.post("/lfa/completeness-score", json={"organization_id": "org-3"})
+
+    assert supplied.status_code == 200
+    assert supplied.json()["completion_percentage"] == 0
+    assert missing.status_code == 404
+
+
+def test_practice_changes_are_keyed_by_stakeholder(api):
+    practice = {"organization_id": "org-1", "theme": "FLN", "current_practices": ["Rote reading"],
+                "desired_practices": ["Daily guided reading"]}
+
+    saved = api.post("/practice-change", json={**practice, "stakeholder_id": "TCH"})
+    dotted = api.post("/practice-change", json={**practice, "stakeholder_id": "TCH.lead"})
+    operator = api.post("/practice-change", json={**practice, "stakeholder_id": "$set"})
+
+    assert saved.status_code == 200
+    assert dotted.status_code == operator.status_code == 422
+    assert main.load_lfa_snapshot("org-1")["practice_changes"] == {
+        "TCH": {"current": ["Rote reading"], "desired": ["Daily guided reading"]}
+    }
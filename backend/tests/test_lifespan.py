@@ -0,0 +1,30 @@
+import asyncio
+
+import main
+
+
+def test_hooks_are_registered_in_file_order():
+    assert [hook.__name__ for hook in main.STARTUP_HOOKS] == [
+        "ensure_indexes",
+        "start_reference_watcher",
+        "load_problem_similarity_index",
+        "schedule_analytics_rebuild"
+    ]
+    assert [hook.__name__ for hook in main.SHUTDOWN_HOOKS] == [
+        "persist_problem_similarity_index",
+        "shutdown_process_pool"
+    ]
+
+
+def test_lifespan_runs_startup_then_shutdown_hooks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "STARTUP_HOOKS", [lambda: calls.append("start")])
+    monkeypatch.setattr(main, "SHUTDOWN_HOOKS", [lambda: calls.append("stop")])
+
+    async def serve():
+        async with main.lifespan(main.app):
+            calls.append("serving")
+
+    asyncio.run(serve())
+
+    assert calls == ["start", "serving", "stop"]
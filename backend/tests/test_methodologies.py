@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+import main
+
+METHODOLOGIES = [
+    {"name": "Reading Camps", "geographies": ["all"], "budget_range_lakhs": [0, 50]},
+    {"name": "Library Periods", "geographies": ["bihar"], "budget_range_lakhs": [10, 20],
+     "scale_range_schools": [50, 500]},
+    {"name": "Teacher Circles", "geographies": ["odisha"], "budget_range_lakhs": [5, 30]},
+    {"name": "Large Scale Assessment", "geographies": ["bihar", "odisha"], "budget_range_lakhs": [40, 200],
+     "scale_range_schools": [1000, 50000]}
+]
+
+
+@pytest.fixture(autouse=True)
+def methodologies(monkeypatch):
+    monkeypatch.setattr(main, "_methodology_index_cache", main.VersionedLRU(main.THEME_CACHE_MAX_ENTRIES))
+    main.methodology_library_collection.insert_many([
+        {"theme": "FLN", "description": m["name"], "components": ["Camps"], **m}
+        for m in METHODOLOGIES
+    ])
+    main.backfill_methodology_ranges()
+
+
+def test_interval_index_matches_a_linear_scan():
+    rng = random.Random(7)
+    intervals = []
+    for pos in range(200):
+        low = rng.randint(0, 100)
+        intervals.append((low, low + rng.randint(0, 30), pos))
+
+    index = main.IntervalIndex(intervals)
+
+    for x in range(-5, 140):
+        expected = sorted(pos for low, high, pos in intervals if low <= x <= high)
+        assert sorted(index.stab(x)) == expected
+
+
+def test_backfill_adds_the_indexed_range_fields():
+    doc = main.methodology_library_collection.find_one({"name": "Library Periods"})
+
+    assert (doc["budget_min_lakhs"], doc["budget_max_lakhs"]) == (10, 20)
+    assert (doc["scale_min_schools"], doc["scale_max_schools"]) == (50, 500)
+
+
+@pytest.mark.parametrize("state, scale, budget", [
+    ("Bihar", 100, 15),
+    ("Bihar", 10, 15),
+    ("Odisha", 2000, 45),
+    ("Kerala", 100, 25),
+    ("Bihar", 100, 500)
+])
+def test_memory_and_db_filters_agree(monkeypatch, state, scale, budget):
+    in_memory = main.filter_methodologies("FLN", state, scale, budget)
+
+    monkeypatch.setattr(main, "METHODOLOGY_FILTER_MODE", "db")
+    in_db = main.filter_methodologies("FLN", state, scale, budget)
+
+    assert sorted(m["name"] for m in in_memory) == sorted(m["name"] for m in in_db)
+    assert all("budget_min_lakhs" not in m for m in in_memory + in_db)
+
+
+def test_filter_applies_geography_budget_and_scale():
+    names = {m["name"] for m in main.filter_methodologies("FLN", "Bihar", 100, 15)}
+
+    assert names == {"Reading Camps", "Library Periods"}
+    assert {m["name"] for m in main.filter_methodologies("FLN", "Bihar", 10, 15)} == {"Reading Camps"}
+
+
+def test_index_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(main, "_methodology_index_cache", main.VersionedLRU(2))
+
+    for theme in ("FLN", "STEM", "Career Readiness"):
+        main.get_methodology_index(theme)
+
+    assert len(main._methodology_index_cache) == 2
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+import main
+import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, "/x")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/x",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/x"} 3' in lines
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    counter = metrics.Counter("calls_total", "Calls", ("kind",))
+    histogram = metrics.Histogram("calls_seconds", "Calls", ("kind",))
+
+    counter.inc("a")
+    histogram.observe(0.2, "a")
+
+    assert counter.values == {} and histogram.values == {}
+
+
+def test_translation_language_label_is_bounded(monkeypatch):
+    def fail(text, dest):
+        raise ValueError("invalid destination language")
+
+    monkeypatch.setattr(main.translator, "translate", fail)
+    before = dict(main.translation_errors.values)
+
+    assert main.translate_text("Hello", "xx-made-up") == "Hello"
+    assert main.translate_text("Hello", "hi") == "Hello"
+
+    added = {k: v - before.get(k, 0) for k, v in main.translation_errors.values.items()}
+    assert added == {("other",): 1, ("hi",): 1}
+
+
+def test_tracked_executor_counts_unfinished_tasks():
+    release = threading.Event()
+    executor = metrics.TrackedThreadPoolExecutor(max_workers=1)
+
+    try:
+        for _ in range(3):
+            executor.submit(release.wait)
+        assert executor.pending_tasks == 3
+    finally:
+        release.set()
+        # Done callbacks may run just after result() returns; shutdown waits for them
+        executor.shutdown(wait=True)
+
+    assert executor.pending_tasks == 0
+
+
+def test_metrics_endpoint_exposes_request_counts(api):
+    api.get("/lfa/templates")
+
+    body = api.get("/metrics").text
+
+    assert 'http_requests_total{method="GET",route="/lfa/templates",status="200"}' in body
+    assert "executor_queue_depth" in body
+
+
+@pytest.mark.parametrize("language", ["hi", "zh-cn"])
+def test_known_languages_keep_their_label(language):
+    assert main.language_label(language) == language
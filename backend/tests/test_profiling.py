@@ -0,0 +1,67 @@
+import tracemalloc
+
+import pytest
+
+import main
+import profiling
+from tests.conftest import ADMIN_HEADERS
+
+
+def test_report_ranks_self_and_cumulative_samples():
+    sampler = profiling.StackSampler(0.01)
+    sampler.samples = 4
+    sampler.stacks = {
+        "MainThread;handler (main.py:1);score (lfa.py:5)": 3,
+        "MainThread;handler (main.py:1)": 1
+    }
+
+    report = sampler.report()
+
+    assert report["hot_functions"][0] == {"frame": "score (lfa.py:5)", "samples": 3}
+    assert report["cumulative_functions"][0] == {"frame": "handler (main.py:1)", "samples": 4}
+    assert report["stacks"][0]["samples"] == 3
+    assert report["truncated_stacks"] == 0
+
+
+def test_profiled_request_stores_a_process_wide_profile(api):
+    response = api.get("/health", headers={"X-Profile": "1", **ADMIN_HEADERS})
+
+    profile_id = response.headers["X-Profile-Id"]
+    profile = api.get(f"/debug/profiles/{profile_id}", headers=ADMIN_HEADERS).json()
+
+    assert profile["route"] == "/health"
+    assert profile["scope"] == "process"
+    assert "concurrent_requests" in profile
+
+
+@pytest.mark.parametrize("token", [None, "wrong", "tëst".encode("latin-1")])
+def test_profiling_requires_the_admin_token(api, token):
+    headers = {"X-Profile": "1"}
+    if token:
+        headers["X-Admin-Token"] = token
+
+    response = api.get("/health", headers=headers)
+
+    assert response.status_code == 403
+    assert main.profiles_collection.count_documents({}) == 0
+
+
+@pytest.fixture
+def memory_tracing():
+    yield
+    main._memory_snapshots.clear()
+    tracemalloc.stop()
+
+
+def test_memory_snapshots_diff_and_stop(api, memory_tracing):
+    base = api.post("/debug/memory/snapshots", headers=ADMIN_HEADERS).json()
+    assert base["tracing_started"] is True
+
+    diff = api.get("/debug/memory/diff", params={"base": base["snapshot_id"]}, headers=ADMIN_HEADERS)
+    assert diff.status_code == 200
+
+    assert api.delete("/debug/memory", headers=ADMIN_HEADERS).json() == {"tracing": False}
+    assert not tracemalloc.is_tracing()
+
+    missing = api.get("/debug/memory/diff", params={"base": base["snapshot_id"]}, headers=ADMIN_HEADERS)
+    assert missing.status_code == 404
@@ -0,0 +1,46 @@
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+def test_view_and_fields_are_merged_into_projection():
+    projection = main.build_projection(
+        "components", "summary", main.MethodologyRecord, main.METHODOLOGY_VIEWS
+    )
+    assert projection == {"_id": 0, "name": 1, "theme": 1, "description": 1, "components": 1}
+
+
+def test_no_fields_returns_whole_document():
+    assert main.build_projection(None, None, main.StakeholderRecord, main.STAKEHOLDER_VIEWS) == {"_id": 0}
+
+
+def test_projection_accepts_stored_methodology_fields():
+    projection = main.build_projection(
+        "scale_range_schools", None, main.MethodologyRecord, main.METHODOLOGY_VIEWS
+    )
+    assert projection["scale_range_schools"] == 1
+
+
+@pytest.mark.parametrize("fields", ["description", "nmae"])
+def test_projection_rejects_fields_stakeholders_do_not_have(fields):
+    with pytest.raises(HTTPException) as error:
+        main.build_projection(fields, None, main.StakeholderRecord, main.STAKEHOLDER_VIEWS)
+    assert error.value.status_code == 400
+
+
+def test_unknown_view_is_rejected():
+    with pytest.raises(HTTPException):
+        main.build_projection(None, "full", main.MethodologyRecord, main.METHODOLOGY_VIEWS)
+
+
+def test_methodologies_endpoint_projects_fields(api):
+    main.methodology_library_collection.insert_one({
+        "name": "Reading Camps", "theme": "FLN", "description": "Camps",
+        "components": ["Camps"], "geographies": ["all"], "budget_range_lakhs": [0, 10]
+    })
+
+    response = api.get("/methodologies", params={"fields": "name,components"})
+
+    assert response.status_code == 200
+    assert response.json()["methodologies"] == [{"name": "Reading Camps", "components": ["Camps"]}]
@@ -0,0 +1,96 @@
+import pytest
+
+import main
+
+
+def methodology(name, geographies=("all",), budget=(0, 100), components=("Camps",), scale=None):
+    doc = {
+        "name": name, "theme": "FLN", "components": list(components),
+        "geographies": list(geographies), "budget_range_lakhs": list(budget)
+    }
+    if scale:
+        doc["scale_range_schools"] = list(scale)
+    return doc
+
+
+def recommend(methodologies, organization_id="org-1", budget=50, scale=100, top_k=5):
+    main.methodology_library_collection.insert_many(methodologies)
+    main.backfill_methodology_ranges()
+    return main.recommend_methodologies(organization_id, "FLN", "Bihar", scale, budget, top_k)
+
+
+def test_weights_sum_to_one():
+    assert sum(main.RECOMMENDATION_WEIGHTS.values()) == pytest.approx(1.0)
+
+
+def test_state_specific_methodology_ranks_first():
+    results = recommend([methodology("General"), methodology("Bihar Camps", geographies=["bihar"])])
+
+    assert [r["name"] for r in results] == ["Bihar Camps", "General"]
+    assert results[0]["factor_scores"]["geography_specificity"] == 1.0
+    assert set(results[0]["factor_scores"]) == set(main.RECOMMENDATION_WEIGHTS)
+
+
+def test_out_of_budget_and_other_states_are_excluded():
+    results = recommend([
+        methodology("Too Expensive", budget=(80, 200)),
+        methodology("Elsewhere", geographies=["kerala"]),
+        methodology("Fits")
+    ])
+
+    assert [r["name"] for r in results] == ["Fits"]
+
+
+def test_component_history_lifts_overlapping_methodologies():
+    main.selected_methodologies_collection.insert_one({
+        "organization_id": "org-1", "selected_methodology_ids": [], "custom_components": ["Libraries"]
+    })
+
+    results = recommend([
+        methodology("Camps Only", components=["Camps"]),
+        methodology("Library Periods", components=["Libraries"])
+    ])
+
+    assert results[0]["name"] == "Library Periods"
+    assert results[0]["factor_scores"]["component_overlap"] == 1.0
+
+
+def test_top_k_limits_results():
+    results = recommend([methodology(f"M{i}") for i in range(4)], top_k=2)
+    assert len(results) == 2
+
+
+def test_selection_stores_methodology_ids_and_feeds_history(api):
+    main.methodology_library_collection.insert_many([
+        methodology("Camps Only", components=["Camps"]),
+        methodology("Library Periods", components=["Libraries"])
+    ])
+    main.backfill_methodology_ranges()
+    library_id = str(main.methodology_library_collection.find_one({"name": "Library Periods"})["_id"])
+
+    response = api.post("/methodologies/select", json={
+        "organization_id": "org-1", "selected_methodology_ids": ["Library Periods"], "custom_components": []
+    })
+
+    assert response.status_code == 200
+    assert main.selected_methodologies_collection.find_one()["selected_methodology_ids"] == [library_id]
+    assert main.load_lfa_snapshot("org-1")["methodology"]["interventions"] == ["Library Periods"]
+    assert main.recommend_methodologies("org-1", "FLN", "Bihar", 100, 50, 5)[0]["name"] == "Library Periods"
+
+
+def test_unknown_selection_is_rejected(api):
+    response = api.post("/methodologies/select", json={
+        "organization_id": "org-1", "selected_methodology_ids": ["Missing"], "custom_components": []
+    })
+
+    assert response.status_code == 422
+    assert main.selected_methodologies_collection.count_documents({}) == 0
+
+
+def test_features_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(main, "_methodology_features_cache", main.VersionedLRU(1))
+
+    recommend([methodology("Fits")])
+    main.get_methodology_features("STEM")
+
+    assert len(main._methodology_features_cache) == 1
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import caches
+import main
+
+
+@pytest.fixture
+def no_version_ttl(monkeypatch):
+    monkeypatch.setattr(caches, "REFERENCE_VERSION_TTL_SECONDS", -1)
+    monkeypatch.setattr(main, "REFERENCE_VERSION_TTL_SECONDS", -1)
+
+
+def seed_methodology(**overrides):
+    doc = {
+        "name": "Reading Camps", "theme": "FLN", "description": "Camps",
+        "components": ["Camps", "Teacher Training"], "geographies": ["all"],
+        "budget_range_lakhs": [0, 50]
+    }
+    doc.update(overrides)
+    main.methodology_library_collection.insert_one(doc)
+    main.backfill_methodology_ranges()
+
+
+def test_version_is_cached_within_ttl():
+    seed_methodology()
+    version = main.collection_version(main.methodology_library_collection)
+
+    seed_methodology(name="Library Periods")
+
+    assert main.collection_version(main.methodology_library_collection) == version
+
+
+def test_version_changes_on_in_place_edit(no_version_ttl):
+    seed_methodology()
+    version = main.collection_version(main.methodology_library_collection)
+
+    main.methodology_library_collection.update_one(
+        {"name": "Reading Camps"},
+        {"$set": {"components": ["Camps"], "updated_at": datetime.now(timezone.utc)}}
+    )
+
+    assert main.collection_version(main.methodology_library_collection) != version
+
+
+def test_bump_invalidates_immediately():
+    seed_methodology()
+    version = main.collection_version(main.methodology_library_collection)
+
+    main.bump_collection_version(main.methodology_library_collection)
+
+    assert main.collection_version(main.methodology_library_collection) != version
+
+
+def test_methodology_index_sees_edited_record(no_version_ttl):
+    seed_methodology()
+    assert main.get_methodology_index("FLN").methodologies[0]["components"] == ["Camps", "Teacher Training"]
+
+    main.methodology_library_collection.update_one(
+        {"name": "Reading Camps"},
+        {"$set": {"components": ["Camps"], "updated_at": datetime.now(timezone.utc)}}
+    )
+
+    assert main.get_methodology_index("FLN").methodologies[0]["components"] == ["Camps"]
+
+
+def test_component_library_is_returned_once(api):
+    seed_methodology()
+    seed_methodology(name="Library Periods", components=["Camps", "Libraries"])
+
+    response = api.post("/methodologies", json={
+        "theme": "FLN", "state": "Bihar", "scale_schools": 10, "budget_lakhs": 20
+    })
+
+    body = response.json()
+    assert response.status_code == 200
+    assert all("available_components" not in m for m in body["methodologies"])
+    library = {entry["component"]: entry["used_in"] for entry in body["component_library"]}
+    assert library["Camps"] == ["Reading Camps", "Library Periods"]
+    assert library["Libraries"] == ["Library Periods"]
+
+
+class FakeChangeStream:
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for change in self.changes:
+            self.resume_token = {"_data": change["ns"]["coll"]}
+            yield change
+
+
+def test_starter_kit_collections_are_watched():
+    watched = {collection.name for collection in main.REFERENCE_COLLECTIONS}
+
+    assert {collection.name for collection in main.STARTER_KIT_COLLECTIONS} <= watched
+
+
+def test_change_stream_invalidates_starter_kit(monkeypatch):
+    main.toc_pattern_library_collection.insert_one({"theme": "FLN", "outcomes": ["Reading"]})
+    version, kit = main.get_theme_starter_kit("FLN")
+
+    # An edit that leaves updated_at alone: only the change stream notices it
+    main.toc_pattern_library_collection.update_one({"theme": "FLN"}, {"$set": {"outcomes": ["Numeracy"]}})
+
+    calls = []
+
+    def watch(pipeline, start_after=None):
+        calls.append(pipeline)
+        if len(calls) > 1:
+            raise main.OperationFailure("change streams unavailable")
+        change = {"ns": {"coll": main.toc_pattern_library_collection.name}}
+        assert change["ns"]["coll"] in pipeline[0]["$match"]["ns.coll"]["$in"]
+        return FakeChangeStream([change])
+
+    monkeypatch.setattr(main.db, "watch", watch)
+    main.watch_reference_collections()
+
+    new_version, kit = main.get_theme_starter_kit("FLN")
+    assert new_version != version
+    assert kit["toc_pattern"]["outcomes"] == ["Numeracy"]
+
+
+def test_starter_kit_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(main, "_starter_kit_cache", main.VersionedLRU(2))
+
+    for theme in ("FLN", "STEM", "Career Readiness"):
+        main.get_theme_starter_kit(theme)
+
+    assert len(main._starter_kit_cache) == 2
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+import pytest
+
+import main
+from search import BM25Index, search_snippet, search_tokens
+
+PROFILE = {
+    "organization_name": "Pratham Bihar",
+    "geography": {"state": "Bihar"},
+    "thematic_focus": ["FLN"],
+    "maturity_level": "growing",
+    "reach_metrics": {"schools": 120},
+    "team_size": 8,
+    "team_expertise": []
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_search_indexes(monkeypatch):
+    monkeypatch.setattr(main, "_search_indexes", OrderedDict())
+
+
+def test_tokens_drop_case_punctuation_and_stopwords():
+    assert search_tokens("The Reading-gap of Grade 3!") == ["reading", "gap", "grade", "3"]
+
+
+def test_bm25_prefers_rare_terms_and_shorter_documents():
+    index = BM25Index()
+    index.add("a", "reading camps for reading fluency", {"kind": "outcome"})
+    index.add("b", "reading camps", {"kind": "outcome"})
+    index.add("c", "teacher absence in remote schools and reading", {"kind": "practice"})
+
+    ranked, _ = index.search("camps")
+    assert [doc_id for doc_id, _, _ in ranked] == ["b", "a"]
+
+    ranked, _ = index.search("reading", kind="practice")
+    assert [doc_id for doc_id, _, _ in ranked] == ["c"]
+
+
+def test_remove_takes_a_document_out_of_postings_and_lengths():
+    index = BM25Index()
+    index.add("a", "reading camps", {"kind": "outcome"})
+    index.add("b", "teacher training", {"kind": "outcome"})
+
+    index.remove("a")
+    index.remove("missing")
+
+    assert index.search("reading")[0] == []
+    assert "reading" not in index.postings
+    assert index.total_length == 2
+
+
+def test_snippet_centres_on_the_first_match():
+    text = "x" * 200 + " fluency " + "y" * 200
+    snippet = search_snippet(text, {"fluency"})
+
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "fluency" in snippet
+    assert search_snippet("short text", {"absent"}) == "short text"
+
+
+def test_search_spans_artifact_kinds_and_pages(api):
+    main.student_outcomes_collection.insert_many([
+        {"organization_id": "org-1", "outcome_statement": f"Reading outcome {i}"} for i in range(3)
+    ])
+    main.theory_of_change_collection.insert_one({
+        "organization_id": "org-1",
+        "nodes": [{"id": "n1", "label": "Reading camps run weekly"}, {"id": "n2", "label": "Teachers trained"}]
+    })
+    main.student_outcomes_collection.insert_one({"organization_id": "org-2", "outcome_statement": "Reading"})
+
+    body = api.get("/organization/org-1/search", params={"q": "reading", "page_size": 2}).json()
+    assert body["total"] == 4
+    assert len(body["results"]) == 2
+
+    toc = api.get("/organization/org-1/search", params={"q": "reading", "kind": "toc_node"}).json()
+    assert [r["kind"] for r in toc["results"]] == ["toc_node"]
+    assert toc["results"][0]["snippet"] == "Reading camps run weekly"
+
+
+def test_new_artifacts_are_added_to_a_loaded_index(api):
+    org_id = api.post("/organization/profile", json=PROFILE).json()["_id"]
+    assert api.get(f"/organization/{org_id}/search", params={"q": "fluently"}).json()["total"] == 0
+
+    created = api.post("/problem-statement", json={
+        "organization_id": org_id,
+        "core_problem": "Grade three students cannot read fluently",
+        "affected_stakeholders": ["Students"],
+        "evidence": []
+    }).json()
+
+    results = api.get(f"/organization/{org_id}/search", params={"q": "fluently"}).json()["results"]
+    assert [(r["kind"], r["ref_id"]) for r in results] == [("problem_statement", created["_id"])]
@@ -0,0 +1,87 @@
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from bson import ObjectId
+
+import main
+from tests.test_templates import seed_template
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def serializer(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(main, "orjson", None)
+    elif main.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+def test_both_serializers_write_the_same_json(serializer):
+    oid = ObjectId()
+    content = {
+        "_id": oid,
+        "at": datetime(2024, 1, 2, tzinfo=timezone.utc),
+        "score": np.float64(0.5),
+        "missing": float("nan"),
+        "vector": np.array([1.0, np.inf]),
+        "counts": {None: 1, 3: 2, "FLN": 3},
+        "tags": ("a", "b")
+    }
+
+    assert json.loads(main.json_dumps(content)) == {
+        "_id": str(oid),
+        "at": "2024-01-02T00:00:00+00:00",
+        "score": 0.5,
+        "missing": None,
+        "vector": [1.0, None],
+        "counts": {"null": 1, "3": 2, "FLN": 3},
+        "tags": ["a", "b"]
+    }
+
+
+def test_facets_skip_templates_missing_the_field(api, serializer):
+    seed_template("with-level")
+    seed_template("without-level", system_level=None)
+
+    response = api.get("/lfa/templates/discover")
+
+    assert response.status_code == 200
+    assert response.json()["facets"]["system_level"] == {"school": 1}
+
+
+def test_negotiate_encoding_honours_quality_values():
+    assert main.negotiate_encoding("gzip;q=0, identity") is None
+    assert main.negotiate_encoding("gzip, deflate") == "gzip"
+    assert main.negotiate_encoding("*") == ("br" if main.brotli else "gzip")
+
+
+def test_large_json_bodies_are_compressed(api):
+    for i in range(30):
+        seed_template(f"template-{i}", description="Foundational literacy " * 10)
+
+    response = api.get("/lfa/templates/discover", headers={"Accept-Encoding": "gzip"})
+    raw = api.get("/lfa/templates/discover", headers={"Accept-Encoding": "identity"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert "content-encoding" not in raw.headers
+    # httpx decodes the body, so equal JSON means the round trip is lossless
+    assert response.json() == raw.json()
+
+
+def test_compression_wraps_idempotency_replays(api, monkeypatch):
+    monkeypatch.setattr(main, "COMPRESSION_MIN_BYTES", 0)
+    profile = {
+        "organization_name": "Pratham Bihar", "geography": {"state": "Bihar"}, "thematic_focus": ["FLN"],
+        "maturity_level": "growing", "reach_metrics": {"schools": 120}, "team_size": 8, "team_expertise": []
+    }
+    headers = {"Idempotency-Key": "k1", "Accept-Encoding": "gzip"}
+
+    first = api.post("/organization/profile", json=profile, headers=headers)
+    replay = api.post("/organization/profile", json=profile, headers=headers)
+
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.headers["Content-Encoding"] == "gzip"
+    assert replay.json() == first.json()
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import main
+import search
+
+
+@pytest.fixture(autouse=True)
+def fresh_similarity_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "SIMILARITY_INDEX_PATH", str(tmp_path / "index.npz"))
+    monkeypatch.setattr(main, "_problem_similarity", {"index": None, "meta": None, "dirty": False})
+
+
+def seed_problems(organization_id, *texts):
+    docs = [{"organization_id": organization_id, "core_problem": text} for text in texts]
+    return [str(i) for i in main.problem_statements_collection.insert_many(docs).inserted_ids]
+
+
+def test_tfidf_rows_are_unit_length_and_weight_rare_terms():
+    counts = search.hashed_term_counts(["reading gaps in grade three", "reading gaps", "teacher absence"], 256)
+    idf = search.fit_idf(counts)
+    rows = search.tfidf_rows(counts, idf)
+
+    assert np.allclose(np.linalg.norm(rows, axis=1), 1)
+    assert rows[0] @ rows[1] > rows[0] @ rows[2]
+
+
+def test_similar_problems_split_own_duplicates_from_other_organizations():
+    own = seed_problems("org-1", "Students in grade three cannot read fluently")
+    other = seed_problems("org-2", "Students in grade three cannot read fluently at all")
+
+    results = main.find_similar_problems(
+        "Students in grade three cannot read fluently", organization_id="org-1"
+    )
+
+    assert [hit["ref_id"] for hit in results["possible_duplicates"]] == own
+    assert [hit["ref_id"] for hit in results["similar_problems"]] == other
+
+
+def test_duplicates_list_each_pair_once(api):
+    ids = seed_problems(
+        "org-1",
+        "Children drop out after primary school",
+        "Children drop out after primary school in rural blocks",
+        "Teachers lack training in phonics"
+    )
+
+    pairs = api.get(
+        "/organization/org-1/problem-statements/duplicates", params={"threshold": 0}
+    ).json()["pairs"]
+
+    assert sorted(sorted(pair["problem_ids"]) for pair in pairs) == sorted(
+        sorted([ids[a], ids[b]]) for a, b in [(0, 1), (0, 2), (1, 2)]
+    )
+    assert pairs[0]["problem_ids"] == ids[:2]
+
+
+def test_duplicates_respect_the_threshold(api):
+    ids = seed_problems(
+        "org-1",
+        "Children drop out after primary school",
+        "Children drop out after primary school",
+        "Teachers lack training in phonics"
+    )
+
+    pairs = api.get("/organization/org-1/problem-statements/duplicates").json()["pairs"]
+
+    assert [pair["problem_ids"] for pair in pairs] == [ids[:2]]
+
+
+def test_snapshot_is_unaffected_by_later_adds():
+    index = search.TextVectorIndex.build(["reading gaps"], [{"ref_id": "a"}], 64)
+    matrix, entries = index.snapshot()
+
+    index.add(["teacher absence", "reading gaps"], [{"ref_id": "b"}, {"ref_id": "a"}])
+
+    assert len(matrix) == len(entries) == 1
+    assert [e["ref_id"] for e in index.snapshot()[1]] == ["a", "b"]
+
+
+def test_out_of_order_statements_are_indexed_once():
+    first, second = main.ObjectId(), main.ObjectId()
+    main.get_problem_similarity_index()
+
+    # The later id is indexed first, then the earlier one arrives
+    for oid in (second, first):
+        doc = {"_id": oid, "organization_id": "org-1", "core_problem": f"Problem statement {oid}"}
+        main.problem_statements_collection.insert_one(doc)
+        main.index_problem_statement(doc)
+
+    main.bump_collection_version(main.problem_statements_collection)
+    _, entries = main.get_problem_similarity_index().snapshot()
+
+    ref_ids = [e["ref_id"] for e in entries if e["kind"] == "problem"]
+    assert sorted(ref_ids) == sorted([str(first), str(second)])
+    assert main._problem_similarity["meta"]["last_problem_id"] == str(second)
@@ -0,0 +1,151 @@
+import main
+
+
+def seed_template(template_id, **fields):
+    main.lfa_templates_collection.insert_one({
+        "template_id": template_id,
+        "name": template_id,
+        "theme": "FLN",
+        "system_level": "school",
+        "geography_type": "rural",
+        "applicable_states": ["Bihar"],
+        "description": "",
+        "lfa_structure": {"goal": "Improve reading"},
+        "created_by": "system",
+        "is_public": True,
+        "created_at": main.utc_now(),
+        **fields
+    })
+
+
+def rate(api, template_id, *ratings):
+    for i, rating in enumerate(ratings):
+        response = api.post("/lfa/templates/rate", json={
+            "template_id": template_id, "organization_id": f"org-{i}", "rating": rating
+        })
+        assert response.status_code == 200
+
+
+def test_rating_smooths_towards_the_prior(api):
+    seed_template("t1")
+    main.backfill_unrated_rating_stats()
+
+    rate(api, "t1", 5)
+
+    stats = main.lfa_templates_collection.find_one({"template_id": "t1"})["rating_stats"]
+    prior = main.TEMPLATE_RATING_PRIOR_MEAN * main.TEMPLATE_RATING_PRIOR_WEIGHT
+    assert stats["count"] == 1
+    assert stats["mean"] == 5
+    assert stats["bayesian_score"] == (prior + 5) / (main.TEMPLATE_RATING_PRIOR_WEIGHT + 1)
+
+
+def test_rerating_replaces_the_previous_rating(api):
+    seed_template("t1")
+
+    rate(api, "t1", 1)
+    rate(api, "t1", 4)
+
+    stats = main.lfa_templates_collection.find_one({"template_id": "t1"})["rating_stats"]
+    assert (stats["count"], stats["sum"]) == (1, 4)
+
+
+def test_unrated_templates_sort_at_the_prior_not_last(api):
+    for template_id in ("loved", "unrated", "panned"):
+        seed_template(template_id)
+    main.backfill_unrated_rating_stats()
+
+    rate(api, "loved", 5, 5, 5)
+    rate(api, "panned", 1, 1, 1)
+
+    templates = api.get("/lfa/templates?sort=rating").json()["templates"]
+
+    assert [t["template_id"] for t in templates] == ["loved", "unrated", "panned"]
+
+
+
+def test_discover_sorts_unrated_templates_at_the_prior(api):
+    for template_id in ("loved", "unrated", "panned"):
+        seed_template(template_id)
+    main.backfill_unrated_rating_stats()
+    rate(api, "loved", 5, 5, 5)
+    rate(api, "panned", 1, 1, 1)
+
+    templates = api.get("/lfa/templates/discover?sort=rating").json()["templates"]
+
+    assert [t["template_id"] for t in templates] == ["loved", "unrated", "panned"]
+
+
+def test_discover_facets_ignore_their_own_filter(api):
+    seed_template("fln-bihar")
+    seed_template("fln-assam", applicable_states=["Assam"])
+    seed_template("stem-bihar", theme="STEM")
+    main.backfill_unrated_rating_stats()
+
+    body = api.get("/lfa/templates/discover", params={"theme": "FLN", "state": "Bihar"}).json()
+
+    assert [t["template_id"] for t in body["templates"]] == ["fln-bihar"]
+    assert body["count"] == 1
+    # Themes are counted within Bihar, states within FLN
+    assert body["facets"]["theme"] == {"FLN": 1, "STEM": 1}
+    assert body["facets"]["applicable_states"] == {"Assam": 1, "Bihar": 1}
+    assert body["facets"]["system_level"] == {"school": 1}
+    assert body["facets"]["rating_band"] == {"unrated": 1}
+
+
+def fork(api, template_id="base", organization_id="org-1"):
+    response = api.post("/lfa/templates/fork", json={
+        "organization_id": organization_id, "template_id": template_id, "new_name": "My fork"
+    })
+    assert response.status_code == 200
+    return response.json()["template_id"]
+
+
+def test_fork_materializes_base_content_with_overrides(api):
+    seed_template("base", description="Foundational literacy programme")
+    fork_id = fork(api)
+
+    response = api.patch(f"/lfa/templates/{fork_id}/overrides", json={
+        "overrides": {"lfa_structure": {"goal": "Improve numeracy"}}, "revision": 0
+    })
+    template = api.get(f"/lfa/templates/{fork_id}").json()
+
+    assert response.json()["revision"] == 1
+    assert template["name"] == "My fork"
+    assert template["description"] == "Foundational literacy programme"
+    assert template["lfa_structure"] == {"goal": "Improve numeracy"}
+    assert template["behind_base"] is False
+
+
+def test_fork_is_behind_only_when_base_content_changes(api):
+    seed_template("base")
+    fork_id = fork(api)
+
+    # Ratings touch the base's updated_at but not what the fork inherits
+    rate(api, "base", 4)
+    assert api.get(f"/lfa/templates/{fork_id}").json()["behind_base"] is False
+
+    main.lfa_templates_collection.update_one(
+        {"template_id": "base"},
+        {"$set": {"description": "Revised"}, "$currentDate": {"updated_at": True}}
+    )
+    template = api.get(f"/lfa/templates/{fork_id}").json()
+    assert template["description"] == "Revised"
+    assert template["behind_base"] is True
+
+    api.post(f"/lfa/templates/{fork_id}/rebase", json={})
+    assert api.get(f"/lfa/templates/{fork_id}").json()["behind_base"] is False
+
+
+def test_search_indexes_fork_content_and_overrides(api):
+    seed_template("base", description="Foundational literacy programme")
+    fork_id = fork(api)
+
+    hits = api.get("/organization/org-1/search", params={"q": "literacy"}).json()["results"]
+    assert [hit["ref_id"] for hit in hits] == [fork_id]
+
+    api.patch(f"/lfa/templates/{fork_id}/overrides", json={
+        "overrides": {"description": "Early numeracy"}, "revision": 0
+    })
+
+    assert api.get("/organization/org-1/search", params={"q": "literacy"}).json()["results"] == []
+    assert api.get("/organization/org-1/search", params={"q": "numeracy"}).json()["results"]
@@ -0,0 +1,72 @@
+import logging
+
+import pytest
+
+import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "garbage",
+    f"00-{TRACE_ID}-{PARENT_ID}-zz",
+    f"00-{TRACE_ID.upper()}-{PARENT_ID}-01",
+    f"00-{'0' * 32}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{'0' * 16}-01",
+    f"ff-{TRACE_ID}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{PARENT_ID}-01-extra",
+])
+def test_malformed_traceparent_is_ignored(header):
+    assert tracing.parse_traceparent(header) is None
+
+
+def test_traceparent_is_parsed():
+    assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == {
+        "trace_id": TRACE_ID, "parent_id": PARENT_ID, "sampled": True
+    }
+
+
+def test_caller_cannot_force_sampling_when_tracing_is_off(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+
+    span = tracing.start_root_span("GET /", f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+    assert (span.trace_id, span.parent_id, span.sampled) == (TRACE_ID, PARENT_ID, False)
+
+
+@pytest.mark.parametrize("flags, sampled", [("01", True), ("00", False)])
+def test_caller_sampling_decision_is_followed_when_tracing_is_on(monkeypatch, flags, sampled):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.5)
+
+    span = tracing.start_root_span("GET /", f"00-{TRACE_ID}-{PARENT_ID}-{flags}")
+
+    assert span.sampled is sampled
+
+
+def test_malformed_traceparent_starts_a_fresh_trace(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+
+    span = tracing.start_root_span("GET /", f"00-{TRACE_ID}-{PARENT_ID}-zz")
+
+    assert span.trace_id != TRACE_ID and span.parent_id is None and span.sampled
+
+
+def test_console_exporter_logs_span_ids(caplog):
+    root = tracing.Span("GET /", TRACE_ID, None, True)
+    child = root.child("mongo.find")
+    child.end()
+
+    with caplog.at_level(logging.INFO, logger="margdarshak"):
+        tracing.ConsoleSpanExporter().export([child])
+
+    assert f"trace_id={TRACE_ID} span_id={child.span_id}" in caplog.text
+
+
+def test_bad_traceparent_does_not_fail_the_request(api):
+    response = api.get("/health", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-zz"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] != TRACE_ID
@@ -0,0 +1,308 @@
+"""
+Request tracing.
+
+Every request gets a trace id (visible in logs and the X-Trace-Id header);
+a sampled fraction also records spans for the request, Mongo commands, rule
+functions, translation and renderers. Finished traces are handed to the
+configured exporter on a background thread. An incoming W3C traceparent
+header continues the caller's trace id, and its sampled flag is honoured
+only while TRACE_SAMPLE_RATE > 0: with tracing switched off, a caller cannot
+make the server record spans.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.0"))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "console")  # console | jsonfile | otlp
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "/tmp/margdarshak_traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "margdarshak-backend")
+TRACE_EXPORT_QUEUE_SIZE = 1000
+
+logger = logging.getLogger("margdarshak")
+
+class Span:
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes",
+                 "start_ns", "end_ns", "error", "sampled", "finished")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, **attributes):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self.sampled = sampled
+        # Spans of the trace, shared by reference with every child span
+        self.finished: List["Span"] = []
+
+    def child(self, name: str, **attributes) -> "Span":
+        span = Span(name, self.trace_id, self.span_id, True, **attributes)
+        span.finished = self.finished
+        return span
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        self.finished.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+def current_trace_id() -> Optional[str]:
+    span = current_span.get()
+    return span.trace_id if span else None
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """
+    Child span of the current span; a no-op outside sampled requests.
+    """
+    parent = current_span.get()
+
+    if parent is None or not parent.sampled:
+        yield None
+        return
+
+    span = parent.child(name, **attributes)
+    token = current_span.set(span)
+
+    try:
+        yield span
+    except Exception as e:
+        span.error = repr(e)
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
+
+def traced(name: Optional[str] = None):
+
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace_span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+TRACEPARENT_PATTERN = re.compile(
+    r"^(?P<version>[0-9a-f]{2})-(?P<trace_id>[0-9a-f]{32})-(?P<parent_id>[0-9a-f]{16})-(?P<flags>[0-9a-f]{2})$"
+)
+
+def parse_traceparent(traceparent: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Trace id, parent span id and sampled flag from a W3C traceparent header,
+    or None when the header is missing or malformed.
+    """
+    match = TRACEPARENT_PATTERN.match((traceparent or "").strip())
+
+    if (
+        not match
+        or match["version"] == "ff"
+        or set(match["trace_id"]) == {"0"}
+        or set(match["parent_id"]) == {"0"}
+    ):
+        return None
+
+    return {
+        "trace_id": match["trace_id"],
+        "parent_id": match["parent_id"],
+        "sampled": int(match["flags"], 16) & 1 == 1
+    }
+
+def start_root_span(name: str, traceparent: Optional[str]) -> Span:
+
+    parent = parse_traceparent(traceparent)
+
+    if TRACE_SAMPLE_RATE <= 0:
+        sampled = False
+    elif parent:
+        sampled = parent["sampled"]
+    else:
+        sampled = random.random() < TRACE_SAMPLE_RATE
+
+    if parent:
+        return Span(name, parent["trace_id"], parent["parent_id"], sampled)
+
+    return Span(name, os.urandom(16).hex(), None, sampled)
+
+class ConsoleSpanExporter:
+
+    def export(self, spans: List[Span]):
+        for span in spans:
+            # Exported off the request thread, so the record factory cannot
+            # see the span; its ids go in the message instead of extra=
+            logger.info(
+                "span %s %.3fms trace_id=%s span_id=%s parent=%s %s%s",
+                span.name,
+                (span.end_ns - span.start_ns) / 1e6,
+                span.trace_id,
+                span.span_id,
+                span.parent_id,
+                span.attributes,
+                f" error={span.error}" if span.error else ""
+            )
+
+class JsonFileSpanExporter:
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+class OTLPHttpSpanExporter:
+    """
+    OTLP/HTTP JSON, as accepted by a local OpenTelemetry collector.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+
+    def export(self, spans: List[Span]):
+
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "margdarshak"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 2 if span.parent_id is None else 1,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": [
+                            {"key": key, "value": {"stringValue": str(value)}}
+                            for key, value in span.attributes.items()
+                        ],
+                        "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+                    }
+                    for span in spans
+                ]
+            }]
+        }]}
+
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        urllib.request.urlopen(request, timeout=5).close()
+
+SPAN_EXPORTERS = {
+    "console": lambda: ConsoleSpanExporter(),
+    "jsonfile": lambda: JsonFileSpanExporter(TRACE_FILE_PATH),
+    "otlp": lambda: OTLPHttpSpanExporter(TRACE_OTLP_ENDPOINT)
+}
+
+_span_export_queue: queue.Queue = queue.Queue(maxsize=TRACE_EXPORT_QUEUE_SIZE)
+_span_exporter_thread = None
+
+def export_trace(spans: List[Span]):
+
+    global _span_exporter_thread
+
+    if _span_exporter_thread is None:
+        exporter = SPAN_EXPORTERS[TRACE_EXPORTER]()
+
+        def loop():
+            while True:
+                batch = _span_export_queue.get()
+                try:
+                    exporter.export(batch)
+                except Exception:
+                    logger.warning("Span export failed", exc_info=True)
+
+        _span_exporter_thread = threading.Thread(target=loop, name="span-exporter", daemon=True)
+        _span_exporter_thread.start()
+
+    try:
+        _span_export_queue.put_nowait(spans)
+    except queue.Full:
+        pass  # tracing must never slow requests down
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """
+    Mongo command events fire synchronously on the calling thread, so the
+    current span is the operation's parent.
+    """
+
+    def __init__(self):
+        self.pending: Dict[tuple, Span] = {}
+
+    def started(self, event):
+        parent = current_span.get()
+        if parent is None or not parent.sampled:
+            return
+        target = event.command.get(event.command_name)
+        self.pending[(event.connection_id, event.request_id)] = parent.child(
+            f"mongo.{event.command_name}",
+            collection=target if isinstance(target, str) else event.command.get("collection", ""),
+            database=event.database_name
+        )
+
+    def succeeded(self, event):
+        span = self.pending.pop((event.connection_id, event.request_id), None)
+        if span:
+            span.end()
+
+    def failed(self, event):
+        span = self.pending.pop((event.connection_id, event.request_id), None)
+        if span:
+            span.error = str(event.failure)
+            span.end()
+
+# Trace ids on every log record, including library loggers
+_default_log_record_factory = logging.getLogRecordFactory()
+
+def trace_log_record_factory(*args, **kwargs):
+    record = _default_log_record_factory(*args, **kwargs)
+    span = current_span.get()
+    record.trace_id = span.trace_id if span else "-"
+    record.span_id = span.span_id if span else "-"
+    return record
+
+logging.setLogRecordFactory(trace_log_record_factory)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s [trace_id=%(trace_id)s span_id=%(span_id)s] %(name)s: %(message)s"
+)
@@ -181,6 +181,23 @@ export const lfaApi = {
 
   rateTemplate: (data: TemplateRatingRequest, language?: string) =>
     fetchApi<{ message: string }>("/lfa/templates/rate", { method: "POST", body: JSON.stringify(data) }, { language }),
+
+  getTemplate: (templateId: string, language?: string) =>
+    fetchApi<LFATemplate>(`/lfa/templates/${templateId}`, {}, { language }),
+
+  updateTemplateOverrides: (templateId: string, data: TemplateOverridesRequest, language?: string) =>
+    fetchApi<{ message: string; revision: number }>(
+      `/lfa/templates/${templateId}/overrides`,
+      { method: "PATCH", body: JSON.stringify(data) },
+      { language },
+    ),
+
+  rebaseTemplate: (templateId: string, baseTemplateId?: string, language?: string) =>
+    fetchApi<{ message: string; base_template_id: string; base_revision: number; revision: number }>(
+      `/lfa/templates/${templateId}/rebase`,
+      { method: "POST", body: JSON.stringify({ base_template_id: baseTemplateId }) },
+      { language },
+    ),
 }
 
 // Export APIs
@@ -274,6 +291,7 @@ export interface ProblemTreeRequest {
   organization_id: string
   state: string
   district: string
+  block?: string
   theme: string
   refined_problem_statement: string
   suggested_root_causes: { cause: string; rationale: string }[]
@@ -331,8 +349,8 @@ export interface MethodologyResponse {
     components: string[]
     geographies: string[]
     budget_range_lakhs: [number, number]
-    available_components: { component: string; used_in: string[] }[]
   }[]
+  component_library: { component: string; used_in: string[] }[]
 }
 
 export interface SelectMethodologyRequest {
@@ -388,9 +406,16 @@ export interface IndicatorGenerationRequest {
   practice_changes: { stakeholder_id: string; desired_practices: string[] }[]
 }
 
+export interface IndicatorMatch {
+  indicator: string
+  score: number
+}
+
 export interface IndicatorGenerationResponse {
   outcome_indicators: Record<string, string>
   practice_indicators: Record<string, Record<string, string>>
+  outcome_alternatives: Record<string, IndicatorMatch[]>
+  practice_alternatives: Record<string, Record<string, IndicatorMatch[]>>
 }
 
 export interface BaselineTargetRequest {
@@ -468,6 +493,15 @@ export interface LFATemplate {
   created_by: string
   is_public: boolean
   created_at: string
+  base_template_id?: string
+  base_revision?: number
+  behind_base?: boolean
+  revision?: number
+}
+
+export interface TemplateOverridesRequest {
+  overrides: Record<string, any>
+  revision: number
 }
 
 export interface ForkTemplateRequest {